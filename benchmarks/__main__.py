@@ -0,0 +1,62 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+from dataclasses import fields
+
+# The benchmark never reaches Gemini; placeholder keys let the settings load without a .env
+os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+os.environ.setdefault("FIRE_CRAWL_API_KEY", "offline-benchmark")
+os.environ.setdefault("TELEMETRY_EXPORT", "false")
+os.environ.setdefault("LLM_CACHE_BACKEND", "none")
+
+from benchmarks.runner import BenchmarkConfig, compare_reports, format_report, load_report, run_benchmark
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmark explore, generate and execute offline, against a local fixture site with scripted LLMs."
+    )
+    defaults = BenchmarkConfig()
+    parser.add_argument("--iterations", type=int, default=defaults.iterations, help="Explore/generate/execute rounds.")
+    parser.add_argument("--test-cases", type=int, default=defaults.test_cases, help="Test cases generated per round.")
+    parser.add_argument("--concurrency", type=int, default=defaults.concurrency, help="Test cases executed at the same time.")
+    parser.add_argument("--pages", type=int, default=defaults.pages, help="Pages served by the fixture site.")
+    parser.add_argument("--elements", type=int, default=defaults.elements, help="Interactive elements per fixture page.")
+    parser.add_argument("--page-kb", type=int, default=defaults.page_kb, help="Approximate size of a fixture page in KB.")
+    parser.add_argument("--agent-steps", type=int, default=defaults.agent_steps, help="Scripted agent steps per browser run.")
+    parser.add_argument("--llm-delay", type=float, default=defaults.llm_delay, help="Seconds per scripted agent step.")
+    parser.add_argument(
+        "--generation-delay", type=float, default=defaults.generation_delay,
+        help="Seconds per scripted test suite generation."
+    )
+    parser.add_argument("--stream-generation", action="store_true", help="Generate with the streaming agent.")
+    parser.add_argument("--output", "-o", help="Write the JSON report to this file.")
+    parser.add_argument("--baseline", help="JSON report to compare against; exits 1 on a regression.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression (default 0.2).")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    config = BenchmarkConfig(**{config_field.name: getattr(args, config_field.name) for config_field in fields(BenchmarkConfig)})
+
+    report = asyncio.run(run_benchmark(config))
+    print(format_report(report))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(report.to_dict(), output, indent=2)
+
+    if args.baseline:
+        regressions = compare_reports(report.to_dict(), load_report(args.baseline), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
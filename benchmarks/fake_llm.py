@@ -0,0 +1,206 @@
+import asyncio
+import hashlib
+import re
+import threading
+from collections import defaultdict
+from types import SimpleNamespace
+from typing import Any, Callable, Optional
+
+from browser_use.agent.views import JudgementResult
+from browser_use.llm.views import ChatInvokeCompletion, ChatInvokeUsage
+from pydantic import BaseModel, ValidationError
+
+from playwright_llm_integration.models import PageElement, PageInventory, TestCase, TestSuite
+
+
+# ============================================================================
+# SCRIPTED BROWSER-USE CHAT MODEL - Stand-in for ChatGoogle
+# ============================================================================
+
+_URL = re.compile(r"https?://[^\s\"'<>]+")
+_USER_REQUEST = re.compile(r"<user_request>(.*?)</user_request>", re.DOTALL)
+
+
+def _message_text(message) -> str:
+    content = getattr(message, "content", "")
+    if isinstance(content, str):
+        return content
+    return " ".join(getattr(part, "text", "") for part in content or [])
+
+
+class ScriptedChatModel:
+    """
+    Answers browser-use agent steps with canned actions after ``delay`` seconds: ``steps - 1``
+    scrolls, then ``done``. Each agent is told apart by its task, so one instance can serve
+    concurrent agents. Agents with an output schema get ``done_data(task)`` as structured
+    output, a ``PageInventory`` of the fixture page by default. Judge calls always pass.
+    """
+
+    _verified_api_keys = True
+
+    def __init__(
+        self,
+        delay: float = 0.2,
+        steps: int = 3,
+        prompt_tokens: int = 2_000,
+        completion_tokens: int = 150,
+        done_text: Callable[[str], str] = lambda task: "Status: PASS\n\nAll steps completed on the fixture page.",
+        done_data: Optional[Callable[[str], dict]] = None,
+        model: str = "scripted-gemini",
+    ):
+        self.delay = delay
+        self.steps = steps
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.done_text = done_text
+        self.done_data = done_data or scripted_page_inventory
+        self.model = model
+        self._step_counts: dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    @property
+    def provider(self) -> str:
+        return "scripted"
+
+    @property
+    def name(self) -> str:
+        return self.model
+
+    @property
+    def model_name(self) -> str:
+        return self.model
+
+    def _next_step(self, messages: list) -> tuple[int, str]:
+        text = "\n".join(_message_text(message) for message in messages)
+        # The system prompt mentions <user_request> too; the agent's own task is the last one
+        requests = _USER_REQUEST.findall(text)
+        task = requests[-1].strip() if requests else text
+        key = self._key(task)
+        with self._lock:
+            self._step_counts[key] += 1
+            return self._step_counts[key], task
+
+    @staticmethod
+    def _key(task: str) -> str:
+        return hashlib.sha256(task.encode("utf-8")).hexdigest()
+
+    def _finish(self, task: str):
+        with self._lock:
+            self._step_counts.pop(self._key(task), None)
+
+    def _usage(self) -> ChatInvokeUsage:
+        return ChatInvokeUsage(
+            prompt_tokens=self.prompt_tokens,
+            prompt_cached_tokens=None,
+            prompt_cache_creation_tokens=None,
+            prompt_image_tokens=None,
+            completion_tokens=self.completion_tokens,
+            total_tokens=self.prompt_tokens + self.completion_tokens,
+        )
+
+    async def ainvoke(self, messages: list, output_format: Optional[type[BaseModel]] = None, **kwargs: Any):
+        await asyncio.sleep(self.delay)
+
+        if output_format is None:
+            completion = "ok"
+        elif output_format is JudgementResult:
+            completion = JudgementResult(reasoning="Scripted run", verdict=True)
+        elif "action" in output_format.model_fields:
+            step, task = self._next_step(messages)
+            if step < self.steps:
+                action = {"scroll": {"down": True, "pages": 1.0}}
+            else:
+                action = {"done": {"text": self.done_text(task), "success": True}}
+                self._finish(task)
+            output = {
+                "evaluation_previous_goal": "Success",
+                "memory": f"Scripted step {step}",
+                "next_goal": "Continue",
+                "action": [action],
+            }
+            try:
+                completion = output_format.model_validate(output)
+            except ValidationError:
+                # The agent has an output schema, so done carries structured data instead of text
+                output["action"] = [{"done": {"data": self.done_data(task), "success": True}}]
+                completion = output_format.model_validate(output)
+        else:
+            completion = output_format.model_construct()
+
+        return ChatInvokeCompletion(completion=completion, usage=self._usage())
+
+
+def scripted_page_inventory(task: str, elements: int = 20) -> dict:
+    match = _URL.search(task)
+    url = match.group(0).rstrip(".,;:)") if match else "http://127.0.0.1/"
+    return PageInventory(
+        url=url,
+        title="Fixture page",
+        summary="A generated form used to benchmark the pipeline offline.",
+        elements=[
+            PageElement(element_type="input", text=f"Field {index}", name=f"field-{index}", section="fixture-form")
+            for index in range(elements)
+        ] + [PageElement(element_type="button", text="Submit", test_id="submit", section="fixture-form")],
+    ).model_dump()
+
+
+# ============================================================================
+# SCRIPTED INSTRUCTOR CLIENT - Stand-in for the Gemini structured output client
+# ============================================================================
+
+def scripted_test_cases(base_url: str, count: int) -> list[TestCase]:
+    return [
+        TestCase(
+            test_case_id=f"TC-{index:03d}",
+            test_title=f"Fixture control {index} works",
+            description=f"Verify that control {index} on {base_url} can be used.",
+            preconditions=f"{base_url} is open.",
+            test_steps=f"1. Open {base_url}\n2. Scroll down to control {index}\n3. Use control {index}",
+            test_data=f"value-{index}",
+            expected_result=f"Control {index} responds without errors.",
+            comments="Generated by the scripted benchmark client.",
+        )
+        for index in range(1, count + 1)
+    ]
+
+
+class ScriptedInstructorClient:
+    """
+    Returns ``test_cases`` canned test cases for the first URL in the prompt, after ``delay``
+    seconds. ``create_iterable`` yields them one by one, ``case_delay`` seconds apart.
+    """
+
+    def __init__(self, test_cases: int = 8, delay: float = 0.5, case_delay: float = 0.05):
+        self.test_cases = test_cases
+        self.delay = delay
+        self.case_delay = case_delay
+        self.chat = SimpleNamespace(completions=SimpleNamespace(
+            create=self.create,
+            create_iterable=self.create_iterable,
+        ))
+
+    def on(self, event: str, handler: Callable):
+        pass
+
+    def _base_url(self, messages: list[dict]) -> str:
+        for message in messages:
+            match = _URL.search(str(message.get("content", "")))
+            if match:
+                return match.group(0).rstrip(".,;:)")
+        return "http://127.0.0.1/"
+
+    async def create(self, *, messages: list[dict], response_model: type[BaseModel], **kwargs):
+        await asyncio.sleep(self.delay)
+        if response_model is not TestSuite:
+            raise TypeError(f"ScriptedInstructorClient can't produce {response_model.__name__}")
+        return TestSuite(
+            suite_id="SUITE-BENCH",
+            suite_name="Fixture site suite",
+            test_cases=scripted_test_cases(self._base_url(messages), self.test_cases),
+        )
+
+    async def create_iterable(self, *, messages: list[dict], response_model: type[BaseModel], **kwargs):
+        await asyncio.sleep(self.delay)
+        for test_case in scripted_test_cases(self._base_url(messages), self.test_cases):
+            await asyncio.sleep(self.case_delay)
+            yield test_case
@@ -0,0 +1,119 @@
+import html
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+
+# ============================================================================
+# FIXTURE SITE - Local pages of configurable size and element count
+# ============================================================================
+
+_FILLER = (
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor "
+    "incididunt ut labore et dolore magna aliqua. "
+)
+
+
+def render_page(page: int, elements: int, page_kb: int, pages: int) -> str:
+    """Render fixture page ``page`` with ``elements`` interactive elements, padded to about ``page_kb`` KB."""
+    controls = []
+    for index in range(elements):
+        kind = index % 4
+        if kind == 0:
+            controls.append(
+                f'<label>Field {index} <input type="text" name="field-{index}" data-testid="field-{index}"></label>'
+            )
+        elif kind == 1:
+            controls.append(f'<button type="button" data-testid="button-{index}">Action {index}</button>')
+        elif kind == 2:
+            controls.append(f'<a href="/page/{(page + index) % pages}" data-testid="link-{index}">Go to page {(page + index) % pages}</a>')
+        else:
+            controls.append(
+                f'<select name="choice-{index}" data-testid="choice-{index}">'
+                f'<option value="a">Option A</option><option value="b">Option B</option></select>'
+            )
+
+    body = "\n".join(f"<div class=\"control\">{control}</div>" for control in controls)
+    document = (
+        "<!DOCTYPE html><html><head>"
+        f"<title>Fixture page {page}</title>"
+        "<style>.control{margin:4px 0}</style>"
+        "</head><body>"
+        f"<h1>Fixture page {page}</h1>"
+        f'<form id="fixture-form" onsubmit="event.preventDefault();'
+        f'document.getElementById(\'status\').textContent=\'Submitted\'">{body}'
+        '<button type="submit" data-testid="submit">Submit</button></form>'
+        '<p id="status" role="status"></p>'
+        "{filler}</body></html>"
+    )
+    padding = max(0, page_kb * 1024 - len(document))
+    paragraphs = padding // (len(_FILLER) + 7)
+    filler = "".join(f"<p>{html.escape(_FILLER)}</p>" for _ in range(paragraphs))
+    return document.replace("{filler}", filler)
+
+
+class FixtureSite:
+    """
+    Serves ``pages`` generated pages over HTTP on localhost, in a background thread.
+    ``/`` links to every page; ``/page/<n>`` is a form with ``elements`` controls.
+    """
+
+    def __init__(self, pages: int = 5, elements: int = 50, page_kb: int = 20, port: int = 0):
+        self.pages = pages
+        self.elements = elements
+        self.page_kb = page_kb
+        self.port = port
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def url(self, page: int) -> str:
+        return f"{self.base_url}/page/{page % self.pages}"
+
+    def start(self) -> "FixtureSite":
+        site = self
+        rendered = {page: render_page(page, self.elements, self.page_kb, self.pages).encode("utf-8") for page in range(self.pages)}
+        index = (
+            "<!DOCTYPE html><html><head><title>Fixture site</title></head><body><h1>Fixture site</h1><ul>"
+            + "".join(f'<li><a href="/page/{page}">Page {page}</a></li>' for page in range(self.pages))
+            + "</ul></body></html>"
+        ).encode("utf-8")
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split("?", 1)[0].rstrip("/")
+                if path == "":
+                    content = index
+                elif path.startswith("/page/") and path[len("/page/"):].isdigit() and int(path[len("/page/"):]) < site.pages:
+                    content = rendered[int(path[len("/page/"):])]
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", self.port), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, name="FixtureSite", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FixtureSite":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,85 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+# ============================================================================
+# IMPORT-TIME BUDGET - Cold import cost of each entry point, in a fresh interpreter
+# ============================================================================
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Milliseconds per cold import; pydantic and pydantic-settings alone take about 150 ms
+IMPORT_BUDGETS_MS = {
+    "settings": 300,
+    "playwright_llm_integration.models": 250,
+    "playwright_llm_integration.results_store": 350,
+    "playwright_llm_integration.agents": 500,
+    "playwright_llm_integration.cli": 600,
+    "playwright_llm_integration.sharding": 600,
+}
+
+# SDKs that take seconds to import; none of the entry points above may load them up front
+HEAVY_MODULES = (
+    "google.genai", "langchain_google_genai", "instructor", "browser_use.agent.service",
+    "browser_use.browser.session", "streamlit", "PIL.Image",
+)
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed_ms = (time.perf_counter() - started) * 1000
+print(json.dumps({{"ms": elapsed_ms, "heavy": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+def measure_import(module: str, runs: int = 5) -> dict:
+    """Median cold import time of ``module`` over ``runs`` fresh interpreters, and the heavy SDKs it loaded."""
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(filter(None, (str(REPO_ROOT), os.environ.get("PYTHONPATH")))),
+        # Placeholder keys let the settings load without a .env; nothing is called
+        "GOOGLE_API_KEY": os.environ.get("GOOGLE_API_KEY", "import-budget"),
+        "FIRE_CRAWL_API_KEY": os.environ.get("FIRE_CRAWL_API_KEY", "import-budget"),
+    }
+    samples, heavy = [], []
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            capture_output=True, text=True, env=env, cwd=REPO_ROOT, check=True
+        )
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        samples.append(result["ms"])
+        heavy = result["heavy"]
+    return {"module": module, "ms": round(statistics.median(samples), 1), "heavy": heavy}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.import_budget",
+        description="Check the cold import time of each entry point against its budget."
+    )
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per module (the median counts).")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every budget, e.g. 2 on a slow CI machine.")
+    args = parser.parse_args(argv)
+
+    failures = 0
+    print(f"{'module':<45} {'import ms':>10} {'budget ms':>10}  heavy SDKs loaded")
+    for module, budget in IMPORT_BUDGETS_MS.items():
+        result = measure_import(module, args.runs)
+        budget *= args.scale
+        over_budget = result["ms"] > budget
+        failures += over_budget or bool(result["heavy"])
+        print(
+            f"{module:<45} {result['ms']:>10.1f} {budget:>10.0f}  {', '.join(result['heavy']) or '-'}"
+            + ("  OVER BUDGET" if over_budget else "")
+        )
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+import asyncio
+import json
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Iterator
+
+from playwright_llm_integration import agents
+from playwright_llm_integration.browser_pool import close_browser_pool
+from playwright_llm_integration.cache import CachedStructuredClient
+from playwright_llm_integration.telemetry import InstrumentedChatModel
+
+from benchmarks.fake_llm import ScriptedChatModel, ScriptedInstructorClient
+from benchmarks.fixture_site import FixtureSite
+
+
+STAGES = ("explore", "generate", "execute")
+
+
+# ============================================================================
+# CONFIGURATION & REPORT
+# ============================================================================
+
+@dataclass
+class BenchmarkConfig:
+    iterations: int = 3
+    test_cases: int = 8
+    concurrency: int = 4
+    pages: int = 5
+    elements: int = 50
+    page_kb: int = 20
+    agent_steps: int = 3
+    llm_delay: float = 0.2
+    generation_delay: float = 0.5
+    stream_generation: bool = False
+
+
+@dataclass
+class StageStats:
+    runs: int = 0
+    errors: int = 0
+    p50_s: float = 0.0
+    p95_s: float = 0.0
+    max_s: float = 0.0
+    peak_python_mb: float = 0.0
+
+
+@dataclass
+class BenchmarkReport:
+    config: BenchmarkConfig
+    wall_time_s: float = 0.0
+    tests_executed: int = 0
+    tests_per_minute: float = 0.0
+    stages: dict[str, StageStats] = field(default_factory=dict)
+    peak_rss_mb: float = 0.0
+    peak_browser_rss_mb: float = 0.0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def percentile(samples: list[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method="inclusive")[int(q) - 1]
+
+
+def _max_rss_mb(who: int) -> float:
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    max_rss = resource.getrusage(who).ru_maxrss
+    return max_rss / (1024 * 1024) if sys.platform == "darwin" else max_rss / 1024
+
+
+# ============================================================================
+# OFFLINE LLMS - Route the agents' LLM clients to the scripted stand-ins
+# ============================================================================
+
+@contextmanager
+def offline_llms(chat_model: ScriptedChatModel, instructor_client: ScriptedInstructorClient) -> Iterator[None]:
+    """Swap the LLM clients the agents module calls for scripted ones, without a response cache."""
+    chat_model = InstrumentedChatModel(chat_model)
+    replacements = {
+        "browser_use_llm": chat_model,
+        "browser_use_google_llm": chat_model,
+        "instructor_patched_google_llm_client": instructor_client,
+        "cached_instructor_client": CachedStructuredClient(instructor_client, backend=None, model="scripted"),
+    }
+    originals = {name: getattr(agents, name) for name in replacements}
+    for name, client in replacements.items():
+        setattr(agents, name, client)
+    try:
+        yield
+    finally:
+        for name, client in originals.items():
+            setattr(agents, name, client)
+
+
+# ============================================================================
+# RUNNER
+# ============================================================================
+
+class _StageRecorder:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = {stage: [] for stage in STAGES}
+        self.errors: dict[str, int] = {stage: 0 for stage in STAGES}
+        self.peak_python: dict[str, int] = {stage: 0 for stage in STAGES}
+
+    async def measure(self, stage: str, coro):
+        started = time.perf_counter()
+        try:
+            return await coro
+        except Exception:
+            self.errors[stage] += 1
+            return None
+        finally:
+            self.latencies[stage].append(time.perf_counter() - started)
+
+    @contextmanager
+    def phase(self, stage: str) -> Iterator[None]:
+        """Track the peak Python heap of a stage (all concurrent calls of the stage together)."""
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            self.peak_python[stage] = max(self.peak_python[stage], tracemalloc.get_traced_memory()[1])
+
+    def stats(self, stage: str) -> StageStats:
+        samples = self.latencies[stage]
+        return StageStats(
+            runs=len(samples),
+            errors=self.errors[stage],
+            p50_s=round(percentile(samples, 50), 3),
+            p95_s=round(percentile(samples, 95), 3),
+            max_s=round(max(samples, default=0.0), 3),
+            peak_python_mb=round(self.peak_python[stage] / (1024 * 1024), 2),
+        )
+
+
+async def _execute_all(recorder: _StageRecorder, test_cases: list, concurrency: int) -> int:
+    semaphore = asyncio.Semaphore(concurrency)
+    executed = 0
+
+    async def execute(test_case):
+        nonlocal executed
+        async with semaphore:
+            result = await recorder.measure(
+                "execute", agents.execute_the_test_case_using_browser_use(test_case, use_replay=False)
+            )
+        # Execution errors come back as a message string instead of being raised
+        if isinstance(result, str):
+            recorder.errors["execute"] += 1
+        elif result is not None:
+            executed += 1
+
+    await asyncio.gather(*(execute(test_case) for test_case in test_cases))
+    return executed
+
+
+async def run_benchmark(config: BenchmarkConfig) -> BenchmarkReport:
+    """
+    Run explore, generate and execute ``config.iterations`` times against the local fixture
+    site with scripted LLMs, and report per-stage latency percentiles, throughput and memory.
+    """
+    chat_model = ScriptedChatModel(delay=config.llm_delay, steps=config.agent_steps)
+    instructor_client = ScriptedInstructorClient(test_cases=config.test_cases, delay=config.generation_delay)
+    recorder = _StageRecorder()
+    report = BenchmarkReport(config=config)
+    execute_time = 0.0
+
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        with FixtureSite(pages=config.pages, elements=config.elements, page_kb=config.page_kb) as site, \
+                offline_llms(chat_model, instructor_client):
+            for iteration in range(config.iterations):
+                url = site.url(iteration)
+
+                with recorder.phase("explore"):
+                    exploration = await recorder.measure(
+                        "explore", agents.page_exploration_agent(url, "Offline benchmark fixture page", use_cache=False)
+                    )
+                exploration_text = agents.exploration_text(exploration) if exploration is not None else ""
+
+                with recorder.phase("generate"):
+                    if config.stream_generation:
+                        async def generate():
+                            return [
+                                test_case async for test_case in
+                                agents.stream_test_suite_generation_agent(url, exploration_text or "")
+                            ]
+                        test_cases = await recorder.measure("generate", generate())
+                    else:
+                        test_suite = await recorder.measure(
+                            "generate", agents.test_suite_generation_agent(url, exploration_text or "")
+                        )
+                        test_cases = test_suite.test_cases if test_suite is not None else None
+
+                with recorder.phase("execute"):
+                    execute_started = time.perf_counter()
+                    report.tests_executed += await _execute_all(recorder, test_cases or [], config.concurrency)
+                    execute_time += time.perf_counter() - execute_started
+    finally:
+        await close_browser_pool()
+        report.wall_time_s = round(time.perf_counter() - started, 3)
+        if started_tracing:
+            tracemalloc.stop()
+
+    report.tests_per_minute = round(report.tests_executed / execute_time * 60, 2) if execute_time else 0.0
+    report.stages = {stage: recorder.stats(stage) for stage in STAGES}
+    report.peak_rss_mb = round(_max_rss_mb(resource.RUSAGE_SELF), 1)
+    report.peak_browser_rss_mb = round(_max_rss_mb(resource.RUSAGE_CHILDREN), 1)
+    return report
+
+
+# ============================================================================
+# REGRESSION CHECK
+# ============================================================================
+
+def compare_reports(report: dict, baseline: dict, tolerance: float = 0.2) -> list[str]:
+    """List the metrics of ``report`` that are more than ``tolerance`` worse than ``baseline``."""
+    regressions = []
+    for stage in STAGES:
+        for metric in ("p50_s", "p95_s", "peak_python_mb"):
+            current = report["stages"].get(stage, {}).get(metric, 0.0)
+            reference = baseline["stages"].get(stage, {}).get(metric, 0.0)
+            if reference and current > reference * (1 + tolerance):
+                regressions.append(f"{stage} {metric}: {current} vs baseline {reference}")
+
+    if baseline["tests_per_minute"] and report["tests_per_minute"] < baseline["tests_per_minute"] * (1 - tolerance):
+        regressions.append(f"tests_per_minute: {report['tests_per_minute']} vs baseline {baseline['tests_per_minute']}")
+    return regressions
+
+
+def format_report(report: BenchmarkReport) -> str:
+    lines = [
+        f"Wall time: {report.wall_time_s:.1f}s, tests executed: {report.tests_executed}, "
+        f"tests/min: {report.tests_per_minute:.1f}",
+        f"Peak RSS: {report.peak_rss_mb:.1f} MB (process), {report.peak_browser_rss_mb:.1f} MB (largest browser process)",
+        "",
+        f"{'stage':<10}{'runs':>6}{'errors':>8}{'p50 s':>10}{'p95 s':>10}{'max s':>10}{'peak heap MB':>14}",
+    ]
+    for stage, stats in report.stages.items():
+        lines.append(
+            f"{stage:<10}{stats.runs:>6}{stats.errors:>8}{stats.p50_s:>10.3f}{stats.p95_s:>10.3f}"
+            f"{stats.max_s:>10.3f}{stats.peak_python_mb:>14.2f}"
+        )
+    return "\n".join(lines)
+
+
+def load_report(path: str) -> dict:
+    with open(path, encoding="utf-8") as report_file:
+        return json.load(report_file)
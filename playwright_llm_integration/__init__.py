@@ -1 +1,16 @@
-from .agents import *
\ No newline at end of file
+import importlib
+import importlib.util
+
+
+def __getattr__(name):
+    """
+    Re-export the agents module's API on first access, so importing a light submodule
+    (``models``, ``settings``-only code, the CLI's argument parsing) doesn't load the agents.
+    """
+    if name.startswith("__") or importlib.util.find_spec(f"{__name__}.{name}") is not None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    agents = importlib.import_module(f"{__name__}.agents")
+    try:
+        return getattr(agents, name)
+    except AttributeError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
@@ -0,0 +1,6 @@
+import sys
+
+from playwright_llm_integration.cli import main
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,61 +1,346 @@
-from browser_use import BrowserProfile
-from browser_use.agent.service import Agent
+import asyncio
+import json
+import time
+import uuid
+from datetime import datetime
+from typing import AsyncIterator, Iterable, Optional
 
+from playwright_llm_integration.browser_pool import apply_storage_state, get_browser_pool
+from playwright_llm_integration.cache import exploration_cache, fetch_page_fingerprint
+from playwright_llm_integration.chunking import estimate_text_tokens, split_inventory
+from playwright_llm_integration.crawler import crawl_site
+from playwright_llm_integration.dom_explorer import extract_page_inventory, needs_interaction
+from playwright_llm_integration.incremental import diff_inventories, impacted_test_cases, merge_test_suites, \
+    suite_store
+from playwright_llm_integration.prioritization import NearDuplicateFilter, deduplicate_test_cases, estimated_duration, \
+    refine_test_suite, select_within_budget
 from playwright_llm_integration.prompts import TEST_SUITE_GENERATOR_PROMPT, BROWSER_USE_TEST_EXECUTOR_TASK_PROMPT, \
-    PAGE_EXPLORATION_PROMPT_TEMPLATE
-from playwright_llm_integration.models import TestSuite, TestCase
+    PAGE_EXPLORATION_PROMPT_TEMPLATE, INCREMENTAL_TEST_SUITE_PROMPT, PRECONDITIONS_ESTABLISHED_NOTE, CHUNK_GENERATION_NOTE
+from playwright_llm_integration.models import TestSuite, TestCase, AgentRunSnapshot, IntentEnum, OrchestratorResponse, \
+    PageInventory, SiteMap, VerdictEnum
+from playwright_llm_integration.replay import ReplayError, final_page_text, record_action_trace, replay_action_trace, \
+    replay_report, trace_store
+from playwright_llm_integration.results_store import results_store
+from playwright_llm_integration.telemetry import span, agent_run_metrics, record
 from playwright_llm_integration.tools import browser_use_llm
-from playwright_llm_integration.utils import instructor_patched_google_llm_client, browser_use_google_llm
+from playwright_llm_integration.verdicts import ExecutionOutcome, RetryPolicy, classify_result, final_verdict, \
+    flakiness_store
+from playwright_llm_integration.utils import cached_instructor_client, instructor_patched_google_llm_client, \
+    browser_use_google_llm
+from settings import settings
 
 
-async def test_suite_generation_agent(base_url: str, application_description: str):
-    test_suite = await instructor_patched_google_llm_client.chat.completions.create(
-        messages=[
-            {
-                "role": "system",
-                "content": TEST_SUITE_GENERATOR_PROMPT.format(
-                    application_description=application_description
-                )
-            },
-            {
-                "role": "user",
-                "content": f"The upstream llm has extracted the page elements from {base_url}. Based on this, generate a comprehensive test suite."
-                           f"Apply best practices for web application testing. Ensure the test cases cover functionality, usability, edge cases, and error handling"
-            }
-        ],
-        response_model=TestSuite,
-        generation_config={
-            "temperature": 0.0,
-            # "max_tokens": 1000,
-            # "top_p": 1,
-            # "top_k": 32,
+TEST_SUITE_GENERATION_CONFIG = {
+    "temperature": 0.0,
+    # "max_tokens": 1000,
+    # "top_p": 1,
+    # "top_k": 32,
+}
+
+
+def _test_suite_generation_messages(base_url: str, application_description: str) -> list[dict]:
+    return [
+        {
+            "role": "system",
+            "content": TEST_SUITE_GENERATOR_PROMPT.format(
+                application_description=application_description
+            )
+        },
+        {
+            "role": "user",
+            "content": f"The upstream llm has extracted the page elements from {base_url}. Based on this, generate a comprehensive test suite."
+                       f"Apply best practices for web application testing. Ensure the test cases cover functionality, usability, edge cases, and error handling"
         }
-    )
+    ]
+
+
+def _refined(test_suite: TestSuite, application_description: str, generation_span) -> TestSuite:
+    if not settings.REFINE_TEST_SUITES:
+        return test_suite
+    refined = refine_test_suite(test_suite, application_description)
+    generation_span.set(duplicates_dropped=len(test_suite.test_cases) - len(refined.test_cases))
+    return refined
+
+
+# ============================================================================
+# MAP-REDUCE GENERATION - One partial suite per inventory chunk, generated in parallel
+# ============================================================================
+
+def generation_chunks(application_description: str) -> list[str]:
+    """The chunks ``GENERATION_MODE`` generates from: several for a large inventory, else the whole one."""
+    if settings.GENERATION_MODE == "single":
+        return [application_description]
+    chunks = split_inventory(application_description, settings.GENERATION_CHUNK_TOKENS)
+    return chunks if len(chunks) > 1 else [application_description]
+
+
+async def _generate_chunk(base_url: str, chunk: str, part: int, parts: int, semaphore: asyncio.Semaphore) -> list[TestCase]:
+    messages = _test_suite_generation_messages(base_url, chunk)
+    messages[-1] = {**messages[-1], "content": messages[-1]["content"] + CHUNK_GENERATION_NOTE.format(part=part, parts=parts)}
+    async with semaphore:
+        with span("generate_chunk", base_url=base_url, part=part, tokens=estimate_text_tokens(chunk)) as chunk_span:
+            # Only this chunk is retried when its suite fails validation; the others are unaffected
+            for attempt in range(settings.GENERATION_CHUNK_RETRIES + 1):
+                try:
+                    partial_suite = await cached_instructor_client.chat.completions.create(
+                        messages=messages,
+                        response_model=TestSuite,
+                        generation_config=TEST_SUITE_GENERATION_CONFIG
+                    )
+                except Exception:
+                    if attempt >= settings.GENERATION_CHUNK_RETRIES:
+                        raise
+                    chunk_span.add(retries=1)
+                    continue
+                chunk_span.set(test_cases=len(partial_suite.test_cases))
+                return partial_suite.test_cases
+
+
+async def _map_chunks(base_url: str, chunks: list[str], generation_span) -> AsyncIterator[tuple[int, list[TestCase]]]:
+    """
+    Generate every chunk, at most ``GENERATION_CHUNK_CONCURRENCY`` at a time, yielding
+    ``(chunk index, test cases)`` as each completes. A chunk that still fails after its
+    retries is left out; the last error is raised only if every chunk failed.
+    """
+    semaphore = asyncio.Semaphore(max(1, settings.GENERATION_CHUNK_CONCURRENCY))
+
+    async def generate(index: int, chunk: str):
+        return index, await _generate_chunk(base_url, chunk, index + 1, len(chunks), semaphore)
+
+    tasks = [asyncio.create_task(generate(index, chunk)) for index, chunk in enumerate(chunks)]
+    failures = []
+    try:
+        for completed in asyncio.as_completed(tasks):
+            try:
+                yield await completed
+            except Exception as e:
+                failures.append(e)
+                generation_span.add(failed_chunks=1)
+        if len(failures) == len(chunks):
+            raise failures[-1]
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _unique_id(test_case: TestCase, taken_ids: set[str]) -> TestCase:
+    """Chunks are generated independently, so their ids can collide; later duplicates get a new one."""
+    if test_case.test_case_id in taken_ids:
+        test_case = test_case.model_copy(update={"test_case_id": str(uuid.uuid4())})
+    taken_ids.add(test_case.test_case_id)
+    return test_case
+
+
+async def test_suite_generation_agent(base_url: str, application_description: str):
+    chunks = generation_chunks(application_description)
+    with span("generate", base_url=base_url, streaming=False, chunks=len(chunks)) as generation_span:
+        if len(chunks) == 1:
+            test_suite = await cached_instructor_client.chat.completions.create(
+                messages=_test_suite_generation_messages(base_url, application_description),
+                response_model=TestSuite,
+                generation_config=TEST_SUITE_GENERATION_CONFIG
+            )
+        else:
+            partial_suites = dict([partial async for partial in _map_chunks(base_url, chunks, generation_span)])
+            taken_ids: set[str] = set()
+            test_cases = [
+                _unique_id(test_case, taken_ids)
+                for index in sorted(partial_suites) for test_case in partial_suites[index]
+            ]
+            if not settings.REFINE_TEST_SUITES:
+                # Chunks overlap (shared layout, cross-page flows); drop what several chunks generated
+                test_cases = deduplicate_test_cases(test_cases, application_description)
+            test_suite = assemble_test_suite(base_url, test_cases)
+        test_suite = _refined(test_suite, application_description, generation_span)
+        generation_span.set(test_cases=len(test_suite.test_cases))
+
+    suite_store.put(base_url, application_description, test_suite)
+    return test_suite
+
+
+async def stream_test_suite_generation_agent(base_url: str, application_description: str) -> AsyncIterator[TestCase]:
+    """
+    Yield test cases one at a time, each as soon as it validates, instead of waiting
+    for the whole ``TestSuite``. A suite already in the LLM cache is replayed from there.
+    Cases can't be reordered once yielded, so near-duplicates of earlier cases are just dropped.
+    A large inventory is generated chunk by chunk in parallel, each chunk's cases yielded as it completes.
+    """
+    messages = _test_suite_generation_messages(base_url, application_description)
+    chunks = generation_chunks(application_description)
+
+    with span("generate", base_url=base_url, streaming=True, chunks=len(chunks)) as generation_span:
+        cached_suite = cached_instructor_client.lookup(messages, TestSuite, TEST_SUITE_GENERATION_CONFIG)
+        if cached_suite is not None:
+            cached_suite = _refined(cached_suite, application_description, generation_span)
+            generation_span.set(llm_cache_hits=1, test_cases=len(cached_suite.test_cases))
+            suite_store.put(base_url, application_description, cached_suite)
+            for test_case in cached_suite.test_cases:
+                yield test_case
+            return
 
+        async def generated_cases() -> AsyncIterator[TestCase]:
+            if len(chunks) > 1:
+                async for _, partial in _map_chunks(base_url, chunks, generation_span):
+                    for test_case in partial:
+                        yield test_case
+                return
+            stream_messages = messages[:-1] + [{
+                **messages[-1],
+                "content": messages[-1]["content"] + "\nReturn the test cases one by one; suite_id and suite_name are assigned separately."
+            }]
+            async for test_case in instructor_patched_google_llm_client.chat.completions.create_iterable(
+                messages=stream_messages,
+                response_model=TestCase,
+                generation_config=TEST_SUITE_GENERATION_CONFIG
+            ):
+                yield test_case
 
+        test_cases = []
+        taken_ids: set[str] = set()
+        duplicates = NearDuplicateFilter()
+        async for test_case in generated_cases():
+            if (settings.REFINE_TEST_SUITES or len(chunks) > 1) and not duplicates.admit(test_case):
+                generation_span.add(duplicates_dropped=1)
+                continue
+            test_case = _unique_id(test_case, taken_ids)
+            test_cases.append(test_case)
+            if len(test_cases) == 1:
+                generation_span.set(time_to_first_case_s=round(generation_span.duration_s, 3))
+            yield test_case
+        generation_span.set(test_cases=len(test_cases))
+
+    # Cache the completed stream as a suite, so an unchanged rerun is served without the LLM
+    test_suite = assemble_test_suite(base_url, test_cases)
+    cached_instructor_client.store(messages, TestSuite, TEST_SUITE_GENERATION_CONFIG, test_suite)
+    suite_store.put(base_url, application_description, test_suite)
+
+
+async def incremental_test_suite_generation_agent(base_url: str, application_description: str) -> TestSuite:
+    """
+    Update the last suite generated for ``base_url`` instead of regenerating it. The new
+    exploration is diffed against the stored one element by element; only test cases that
+    touch changed elements are regenerated, along with new cases for added elements, and every
+    other case keeps its ``test_case_id``. Falls back to a full generation when there is no
+    stored suite or more than ``INCREMENTAL_MAX_CHANGE_RATIO`` of the elements changed.
+    """
+    previous = suite_store.get(base_url)
+    diff = diff_inventories(previous.exploration, application_description) if previous else None
+    if diff is None or diff.change_ratio > settings.INCREMENTAL_MAX_CHANGE_RATIO:
+        return await test_suite_generation_agent(base_url, application_description)
+
+    with span("generate", base_url=base_url, incremental=True) as generation_span:
+        impacted = impacted_test_cases(previous.test_suite, diff)
+        generation_span.set(
+            added_elements=len(diff.added), removed_elements=len(diff.removed), impacted_test_cases=len(impacted)
+        )
+        regenerated = []
+        if diff.added or impacted:
+            update = await cached_instructor_client.chat.completions.create(
+                messages=[
+                    {
+                        "role": "system",
+                        "content": INCREMENTAL_TEST_SUITE_PROMPT.format(
+                            changed_elements="\n".join(f"- {element}" for element in diff.added) or "None",
+                            removed_elements="\n".join(f"- {element}" for element in diff.removed) or "None",
+                            impacted_test_cases="\n".join(test_case.model_dump_json() for test_case in impacted) or "None"
+                        )
+                    },
+                    {
+                        "role": "user",
+                        "content": f"The page elements of {base_url} changed. Update the affected test cases and cover the added elements."
+                    }
+                ],
+                response_model=TestSuite,
+                generation_config=TEST_SUITE_GENERATION_CONFIG
+            )
+            regenerated = update.test_cases
+
+        test_suite = merge_test_suites(previous.test_suite, impacted, regenerated)
+        test_suite = _refined(test_suite, application_description, generation_span)
+        generation_span.set(regenerated_test_cases=len(regenerated), test_cases=len(test_suite.test_cases))
+
+    suite_store.put(base_url, application_description, test_suite)
     return test_suite
 
 
-async def execute_the_test_case_using_browser_use(test_case: TestCase):
-    browser_profile = BrowserProfile(
-        minimum_wait_page_load_time=0.1,
-        wait_between_actions=0.1,
-        headless=False,
-        is_local=True
+def assemble_test_suite(base_url: str, test_cases: list[TestCase], suite_id: Optional[str] = None) -> TestSuite:
+    """Wrap streamed test cases in a ``TestSuite``."""
+    return TestSuite(
+        suite_id=suite_id or str(uuid.uuid4()),
+        suite_name=f"Test Suite for {base_url}",
+        test_cases=test_cases
     )
 
+
+def browser_agent(llm, vision_mode: str, **kwargs):
+    """A browser-use ``Agent`` running under the ``vision_mode`` screenshot policy."""
+    # Imported on first use: browser_use.agent takes about a second to import
+    from browser_use import Agent
+
+    from playwright_llm_integration.vision import vision_agent_options
+
+    return Agent(**kwargs, **vision_agent_options(llm, vision_mode))
+
+
+async def execute_the_test_case_using_browser_use(
+    test_case: TestCase,
+    use_replay: bool = settings.REPLAY_ENABLED,
+    starting_state: Optional[dict] = None,
+):
+    """
+    Run one test case. ``starting_state`` (a ``capture_storage_state`` snapshot taken once the
+    case's preconditions held) starts it from that state instead of a blank browser.
+    """
     test_execution_task = BROWSER_USE_TEST_EXECUTOR_TASK_PROMPT.format(test_case=test_case.model_dump_json())
-    try:
-        test_execution_agent = Agent(
-            task=test_execution_task,
-            llm=browser_use_google_llm,
-            browser_profile=browser_profile,
-            # browser=browser,
-            use_vision=True
-        )
-        test_execution_result = await test_execution_agent.run()
-    except Exception as e:
-        test_execution_result = f"Error during test execution: {str(e)}"
+    if starting_state is not None:
+        test_execution_task += PRECONDITIONS_ESTABLISHED_NOTE.format(url=starting_state["url"])
+    with span(
+        "execute", test_case_id=test_case.test_case_id, replayed=False, from_snapshot=starting_state is not None
+    ) as execution_span:
+        try:
+            async with get_browser_pool().lease() as browser_session:
+                if starting_state is not None:
+                    await apply_storage_state(browser_session, starting_state)
+
+                # A test case that passed before is replayed from its recorded trace without the LLM;
+                # the agent only runs when there is no trace or a replayed step fails
+                action_trace = trace_store.get(test_case) if use_replay else None
+                if action_trace is not None:
+                    try:
+                        await replay_action_trace(action_trace, browser_session, test_data=test_case.test_data)
+                        execution_span.set(replayed=True, steps=len(action_trace.actions))
+                        return AgentRunSnapshot(final_text=replay_report(action_trace), source="replay")
+                    except ReplayError:
+                        trace_store.delete(test_case.test_case_id)
+                        execution_span.set(replay_failed=True)
+                        if starting_state is not None:
+                            await apply_storage_state(browser_session, starting_state)
+                        else:
+                            page = await browser_session.must_get_current_page()
+                            await page.goto("about:blank")
+
+                test_execution_agent = browser_agent(
+                    browser_use_google_llm,
+                    settings.EXECUTION_VISION,
+                    task=test_execution_task,
+                    browser_session=browser_session
+                )
+                test_execution_result = await test_execution_agent.run()
+                execution_span.set(**agent_run_metrics(test_execution_result))
+
+                # Only a run whose report says PASS is worth replaying; the text of its final page
+                # that shows the expected result is what a replay is checked against
+                if use_replay and classify_result(test_execution_result).verdict == VerdictEnum.PASSED:
+                    action_trace = record_action_trace(
+                        test_case, test_execution_result, await final_page_text(browser_session)
+                    )
+                    if action_trace is not None:
+                        trace_store.put(action_trace)
+        except Exception as e:
+            execution_span.status = "ERROR"
+            execution_span.set(error=str(e))
+            test_execution_result = f"Error during test execution: {str(e)}"
 
 
     return test_execution_result
@@ -63,31 +348,358 @@ async def execute_the_test_case_using_browser_use(test_case: TestCase):
 
 
 
-async def page_exploration_agent(base_url: str, description: str) :
-    navigation_task = PAGE_EXPLORATION_PROMPT_TEMPLATE.format(base_url=base_url)
+async def page_exploration_agent(
+    base_url: str,
+    description: str,
+    use_cache: bool = True,
+    mode: str = settings.EXPLORATION_MODE,
+):
+    """
+    Build the page's element inventory. ``mode`` is ``agent`` (the vision agent explores),
+    ``dom`` (read the inventory from the DOM after one page load, no LLM) or ``auto``
+    (DOM first, the agent only for pages whose content needs interaction to show up).
+    """
+    with span("explore", base_url=base_url, cache_hit=False, mode=mode) as exploration_span:
+        # An unchanged page (same URL, description, HTML fingerprint and mode) is served from the cache
+        # without starting a browser or calling the LLM
+        page_fingerprint = await fetch_page_fingerprint(base_url) if use_cache else None
+        if page_fingerprint:
+            cached_result = exploration_cache.get(base_url, description, page_fingerprint, mode)
+            if cached_result is not None:
+                exploration_span.set(cache_hit=True)
+                return cached_result
+
+        exploration_result = None
+        async with get_browser_pool().lease() as browser_session:
+            if mode in ("dom", "auto"):
+                try:
+                    inventory = await extract_page_inventory(browser_session, base_url)
+                    fallback_reason = None if mode == "dom" else needs_interaction(
+                        inventory, settings.EXPLORATION_DOM_MIN_ELEMENTS
+                    )
+                except Exception as e:
+                    if mode == "dom":
+                        raise
+                    inventory, fallback_reason = None, f"DOM extraction failed: {e}"
+
+                exploration_span.set(dom_elements=len(inventory.elements) if inventory else 0)
+                if fallback_reason is None:
+                    exploration_result = AgentRunSnapshot(
+                        final_text=inventory.model_dump_json(), structured_output=inventory, source="dom"
+                    )
+                else:
+                    exploration_span.set(fallback_reason=fallback_reason)
+
+            if exploration_result is None:
+                navigation_task = PAGE_EXPLORATION_PROMPT_TEMPLATE.format(base_url=base_url)
 
-    if description:
-        navigation_task += f"\n\nThe application is described as: {description}"
+                if description:
+                    navigation_task += f"\n\nThe application is described as: {description}"
+
+                exploration_agent = browser_agent(
+                    browser_use_llm,
+                    settings.EXPLORATION_VISION,
+                    task=navigation_task,
+                    browser_session=browser_session,
+                    output_model_schema=PageInventory
+                )
+                exploration_result = await exploration_agent.run()
+                exploration_span.set(**agent_run_metrics(exploration_result))
+
+    finished = isinstance(exploration_result, AgentRunSnapshot) or exploration_result.is_done()
+    if page_fingerprint and finished and exploration_result.final_result():
+        exploration_cache.put(
+            base_url,
+            description,
+            page_fingerprint,
+            mode,
+            final_text=exploration_result.final_result(),
+            structured_output=exploration_result.structured_output
+        )
+    return exploration_result
 
-    # browser = Browser() # TODO - configure as needed
-    browser_profile = BrowserProfile(
-        minimum_wait_page_load_time=0.1,
-        wait_between_actions=0.1,
-        headless=True,
-        is_local=True
+
+async def site_exploration_agent(
+    base_url: str,
+    description: str,
+    max_pages: int = settings.CRAWL_MAX_PAGES,
+    max_depth: int = settings.CRAWL_MAX_DEPTH,
+    workers: int = settings.CRAWL_WORKERS,
+    mode: str = settings.EXPLORATION_MODE,
+) -> AgentRunSnapshot:
+    """
+    Explore every page of the site reachable from ``base_url`` (see ``crawl_site``), each one
+    like ``page_exploration_agent`` does, and merge their inventories into one ``SiteMap``.
+    """
+    async def explore_page(url: str) -> Optional[PageInventory]:
+        return exploration_inventory(await page_exploration_agent(url, description, mode=mode))
+
+    site_map = await crawl_site(base_url, explore_page, max_pages=max_pages, max_depth=max_depth, workers=workers)
+    return AgentRunSnapshot(final_text=site_map.model_dump_json(), structured_output=site_map, source="crawl")
+
+
+def exploration_inventory(exploration_result) -> Optional[PageInventory]:
+    """The ``PageInventory`` an exploration run produced, or None if it only has free-form text."""
+    inventory = exploration_result.structured_output
+    if inventory is not None and not isinstance(inventory, PageInventory):
+        try:
+            inventory = PageInventory.model_validate(inventory)
+        except ValueError:
+            inventory = None
+    return inventory
+
+
+def exploration_text(exploration_result, token_budget: Optional[int] = None) -> str:
+    """
+    The exploration as prompt text: the compact rendering of its ``SiteMap`` or ``PageInventory``
+    when the run produced one, otherwise its free-form final result.
+    """
+    structured_output = exploration_result.structured_output
+    if isinstance(structured_output, dict) and "pages" in structured_output:
+        structured_output = SiteMap.model_validate(structured_output)
+    if isinstance(structured_output, SiteMap):
+        return structured_output.to_prompt(token_budget or settings.SITE_MAP_TOKEN_BUDGET)
+    inventory = exploration_inventory(exploration_result)
+    if inventory is not None:
+        return inventory.to_prompt(token_budget or settings.INVENTORY_TOKEN_BUDGET)
+    return exploration_result.final_result() or ""
+
+
+async def execute_test_case(
+    test_case: TestCase,
+    starting_state: Optional[dict] = None,
+    policy: Optional[RetryPolicy] = None,
+) -> ExecutionOutcome:
+    """
+    Execute a test case as many times as ``policy`` calls for, each attempt bounded by
+    ``TEST_EXECUTION_TIMEOUT``, and classify the attempts into one verdict. The outcome also
+    goes into the case's flakiness statistics, which steer the policy on later runs.
+    """
+    policy = policy or RetryPolicy()
+    flakiness = flakiness_store.flakiness(test_case.test_case_id)
+    attempts, results = [], []
+    while True:
+        try:
+            async with asyncio.timeout(settings.TEST_EXECUTION_TIMEOUT):
+                execution_result = await execute_the_test_case_using_browser_use(test_case, starting_state=starting_state)
+        except TimeoutError:
+            execution_result = f"Error during test execution: timed out after {settings.TEST_EXECUTION_TIMEOUT:.0f}s"
+        attempts.append(classify_result(execution_result))
+        results.append(execution_result)
+        if not policy.should_retry(attempts, flakiness):
+            break
+        record(test_retries=1)
+        await asyncio.sleep(settings.TEST_RETRY_DELAY)
+
+    standing, flaky = final_verdict(attempts)
+    outcome = ExecutionOutcome(
+        verdict=attempts[standing].verdict,
+        reason=attempts[standing].reason,
+        result=results[standing],
+        attempts=attempts,
+        flaky=flaky
     )
-    exploration_agent = Agent(
-        task=navigation_task,
-        llm=browser_use_llm,
-        browser_profile=browser_profile,
-        # browser=browser,
-        use_vision=True
+    flakiness_store.record(test_case.test_case_id, test_case.test_title, outcome)
+    return outcome
+
+
+def execution_record(base_url: str, suite_id: str, test_case: TestCase, execution_result, duration: float) -> dict:
+    """A ``test_result`` record of an ``ExecutionOutcome``, or of a single attempt's result."""
+    if not isinstance(execution_result, ExecutionOutcome):
+        classification = classify_result(execution_result)
+        execution_result = ExecutionOutcome(
+            verdict=classification.verdict, reason=classification.reason, result=execution_result, attempts=[classification]
+        )
+    result_record = {
+        "event": "test_result",
+        "base_url": base_url,
+        "suite_id": suite_id,
+        "test_case_id": test_case.test_case_id,
+        "test_title": test_case.test_title,
+        "duration_s": round(duration, 3),
+        "timestamp": datetime.now().isoformat(),
+    }
+    result_record.update(
+        status=VerdictEnum(execution_result.verdict).value,
+        result=execution_result.final_result(),
+        attempts=len(execution_result.attempts),
+        flaky=execution_result.flaky,
     )
-    exploration_result = await exploration_agent.run()
-    return exploration_result
+    if execution_result.verdict != VerdictEnum.PASSED:
+        result_record["error"] = execution_result.reason
+    return result_record
 
-async def test_orchestration_agent(base_url: str, description: str = ""):
-    ...
+
+def _message(intent: IntentEnum, **payload) -> OrchestratorResponse:
+    payload.setdefault("timestamp", datetime.now().isoformat())
+    return OrchestratorResponse(intent=intent, response=json.dumps(payload, default=str))
+
+
+async def test_orchestration_agent(
+    base_url: str | Iterable[str | tuple[str, str]],
+    description: str = "",
+    explore_workers: int = settings.ORCHESTRATOR_EXPLORE_WORKERS,
+    generate_workers: int = settings.ORCHESTRATOR_GENERATE_WORKERS,
+    execute_workers: int = settings.MAX_PARALLEL_TESTS,
+    queue_size: int = settings.ORCHESTRATOR_QUEUE_SIZE,
+    max_tests: Optional[int] = None,
+    time_budget: Optional[float] = None,
+    execute: bool = True,
+    stream_generation: bool = settings.STREAM_TEST_GENERATION,
+    incremental: bool = settings.INCREMENTAL_GENERATION,
+    crawl: bool = False,
+    max_pages: int = settings.CRAWL_MAX_PAGES,
+    max_depth: int = settings.CRAWL_MAX_DEPTH,
+) -> AsyncIterator[OrchestratorResponse]:
+    """
+    Explore, generate and execute as a streaming pipeline. Work items are ``OrchestratorResponse``
+    messages routed by intent to per-stage queues, each drained by its own pool of workers, so
+    test cases start executing while other URLs are still being explored or generated.
+    Bounded queues apply backpressure to the upstream stages. With ``stream_generation``,
+    each test case is dispatched as soon as it is generated rather than once its suite is complete.
+    With ``incremental``, a URL that has a stored suite only regenerates the cases its page changes touch.
+    With ``crawl``, each URL's whole site (up to ``max_pages`` pages, ``max_depth`` links deep) is
+    explored and its suite generated from the merged site map.
+    With ``time_budget`` (seconds of wall time per URL, at ``execute_workers`` cases at a time),
+    only the most valuable cases whose estimated run times fit are executed.
+
+    ``base_url`` is a URL or an iterable of URLs / ``(url, description)`` pairs.
+    Yields one ``OrchestratorResponse`` per stage outcome; ``response`` holds a JSON record
+    with an ``event`` of ``exploration``, ``test_suite``, ``test_result`` or ``error``.
+    """
+    targets = [base_url] if isinstance(base_url, str) else list(base_url)
+    stages = {
+        IntentEnum.EXPLORE_PAGE: (asyncio.Queue(queue_size), max(1, explore_workers)),
+        IntentEnum.GENERATE_TEST_SUITE: (asyncio.Queue(queue_size), max(1, generate_workers)),
+        IntentEnum.RUN_TEST: (asyncio.Queue(queue_size), max(1, execute_workers)),
+    }
+    stage_workers: dict[IntentEnum, list[asyncio.Task]] = {}
+    events: asyncio.Queue[Optional[OrchestratorResponse]] = asyncio.Queue()
+
+    async def route(message: OrchestratorResponse):
+        queue, _ = stages[message.intent]
+        await queue.put(message)
+
+    async def explore(payload: dict):
+        started = time.perf_counter()
+        if crawl:
+            exploration_result = await site_exploration_agent(
+                payload["base_url"], payload["description"], max_pages=max_pages, max_depth=max_depth
+            )
+        else:
+            exploration_result = await page_exploration_agent(payload["base_url"], payload["description"])
+        exploration = exploration_text(exploration_result)
+        await events.put(_message(
+            IntentEnum.EXPLORE_PAGE, event="exploration", base_url=payload["base_url"],
+            duration_s=round(time.perf_counter() - started, 3), result=exploration
+        ))
+        await route(_message(IntentEnum.GENERATE_TEST_SUITE, **payload, exploration=exploration))
+
+    async def generate(payload: dict):
+        started = time.perf_counter()
+        streamed = False
+        budget_left = time_budget * max(1, execute_workers) if time_budget else None
+        if incremental and suite_store.get(payload["base_url"]) is not None:
+            test_suite = await incremental_test_suite_generation_agent(payload["base_url"], payload["exploration"])
+            test_cases = test_suite.test_cases
+        elif not stream_generation:
+            test_suite = await test_suite_generation_agent(payload["base_url"], payload["exploration"])
+            test_cases = test_suite.test_cases
+        else:
+            # Dispatch each case for execution the moment it validates
+            streamed = True
+            suite_id = str(uuid.uuid4())
+            test_cases = []
+            dispatched = 0
+            async for test_case in stream_test_suite_generation_agent(payload["base_url"], payload["exploration"]):
+                test_cases.append(test_case)
+                if not execute or (max_tests and dispatched >= max_tests):
+                    continue
+                if budget_left is not None:
+                    duration = estimated_duration(
+                        test_case, results_store.mean_durations(payload["base_url"], [test_case.test_case_id])
+                    )
+                    if duration > budget_left:
+                        continue
+                    budget_left -= duration
+                dispatched += 1
+                await route(_message(
+                    IntentEnum.RUN_TEST, base_url=payload["base_url"], suite_id=suite_id,
+                    test_case=test_case.model_dump()
+                ))
+            test_suite = assemble_test_suite(payload["base_url"], test_cases, suite_id=suite_id)
+
+        await events.put(_message(
+            IntentEnum.GENERATE_TEST_SUITE, event="test_suite", base_url=payload["base_url"],
+            duration_s=round(time.perf_counter() - started, 3), test_suite=test_suite.model_dump()
+        ))
+        if not execute or streamed:
+            return
+        if budget_left is not None:
+            durations = results_store.mean_durations(
+                payload["base_url"], [test_case.test_case_id for test_case in test_cases]
+            )
+            test_cases = select_within_budget(test_cases, budget_left, durations)
+        for test_case in test_cases[:max_tests] if max_tests else test_cases:
+            await route(_message(
+                IntentEnum.RUN_TEST, base_url=payload["base_url"], suite_id=test_suite.suite_id,
+                test_case=test_case.model_dump()
+            ))
+
+    async def run_test(payload: dict):
+        test_case = TestCase.model_validate(payload["test_case"])
+        started = time.perf_counter()
+        execution_result = await execute_test_case(test_case)
+        result_record = execution_record(
+            payload["base_url"], payload["suite_id"], test_case, execution_result, time.perf_counter() - started
+        )
+        await events.put(_message(IntentEnum.RUN_TEST, **result_record))
+
+    handlers = {
+        IntentEnum.EXPLORE_PAGE: explore,
+        IntentEnum.GENERATE_TEST_SUITE: generate,
+        IntentEnum.RUN_TEST: run_test,
+    }
+
+    async def worker(intent: IntentEnum):
+        queue, _ = stages[intent]
+        while (message := await queue.get()) is not None:
+            payload = json.loads(message.response)
+            try:
+                await handlers[intent](payload)
+            except Exception as e:
+                await events.put(_message(
+                    intent, event="error", base_url=payload.get("base_url"), stage=intent.value, error=str(e)
+                ))
+
+    async def supervise():
+        try:
+            for intent, (_, worker_count) in stages.items():
+                stage_workers[intent] = [asyncio.create_task(worker(intent)) for _ in range(worker_count)]
+
+            for target in targets:
+                url, target_description = (target, description) if isinstance(target, str) else target
+                await route(_message(IntentEnum.EXPLORE_PAGE, base_url=url, description=target_description or description))
+
+            # Stop the stages in pipeline order: once every worker of a stage has exited,
+            # nothing else can be routed to the next stage's queue
+            for intent, (queue, _) in stages.items():
+                for _ in stage_workers[intent]:
+                    await queue.put(None)
+                await asyncio.gather(*stage_workers[intent])
+        finally:
+            await events.put(None)
+
+    supervisor = asyncio.create_task(supervise())
+    try:
+        while (event := await events.get()) is not None:
+            yield event
+        await supervisor
+    finally:
+        supervisor.cancel()
+        for workers in stage_workers.values():
+            for task in workers:
+                task.cancel()
 
 
 
@@ -2,9 +2,10 @@ import os
 import platform
 import sys
 import asyncio
+import time
+import uuid
 import streamlit as st
 from datetime import datetime
-import json
 
 if platform.system() == "Windows":
     asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
@@ -13,11 +14,24 @@ sys.path.extend([os.path.abspath('.'), os.getcwd()])
 
 from playwright_llm_integration.agents import (
     test_suite_generation_agent,
-    execute_the_test_case_using_browser_use,
-    page_exploration_agent
+    stream_test_suite_generation_agent,
+    incremental_test_suite_generation_agent,
+    assemble_test_suite,
+    execute_test_case,
+    page_exploration_agent,
+    site_exploration_agent,
+    exploration_text
 )
-from playwright_llm_integration.utils import STREAMLIT_CSS, AsyncRunner
-from playwright_llm_integration.models import TestSuite
+from playwright_llm_integration.batching import execute_batched
+from playwright_llm_integration.utils import STREAMLIT_CSS, AsyncRunner, JobStatus, report_job_progress
+from playwright_llm_integration.incremental import suite_store
+from playwright_llm_integration.models import VerdictEnum
+from playwright_llm_integration.prioritization import select_within_budget
+from playwright_llm_integration.results_store import results_store
+from playwright_llm_integration.run_journal import RunInProgressError, journaled, new_owner, run_journal
+from playwright_llm_integration.telemetry import telemetry, traced
+from playwright_llm_integration.verdicts import flakiness_store
+from settings import settings
 
 
 
@@ -29,6 +43,43 @@ def get_async_runner():
     return AsyncRunner()
 
 
+async def explore_and_generate(
+    base_url: str, description: str, stream_generation: bool, incremental: bool, crawl: bool = False
+) -> dict:
+    """Background job: explore the page (or site), then generate the test suite, reporting progress as it goes."""
+    if crawl:
+        report_job_progress(0.05, {"stage": "Step 1/2: Crawling the site..."})
+        exploration_result = await site_exploration_agent(base_url, description)
+    else:
+        report_job_progress(0.05, {"stage": "Step 1/2: Exploring the page..."})
+        exploration_result = await page_exploration_agent(base_url, description)
+    exploration_prompt = exploration_text(exploration_result)
+
+    report_job_progress(0.5, {"stage": "Step 2/2: Generating test suite...", "test_cases": []})
+    if incremental and suite_store.get(base_url) is not None:
+        report_job_progress(partial_result={"stage": "Step 2/2: Updating the test cases affected by page changes..."})
+        test_suite = await incremental_test_suite_generation_agent(base_url, exploration_prompt)
+    elif stream_generation:
+        generated_cases = []
+        async for test_case in stream_test_suite_generation_agent(base_url, exploration_prompt):
+            generated_cases.append(test_case)
+            report_job_progress(partial_result={
+                "stage": "Step 2/2: Generating test suite...",
+                "test_cases": [generated_case.test_title for generated_case in generated_cases]
+            })
+        test_suite = assemble_test_suite(base_url, generated_cases)
+    else:
+        test_suite = await test_suite_generation_agent(base_url, exploration_prompt)
+
+    report_job_progress(1.0)
+    return {
+        "exploration_result": exploration_prompt,
+        "exploration_final_json": exploration_result.structured_output,
+        "exploration_cached": getattr(exploration_result, "source", None) == "cache",
+        "test_suite": test_suite,
+    }
+
+
 # ============================================================================
 # STREAMLIT APP
 # ============================================================================
@@ -49,10 +100,16 @@ if 'exploration_result' not in st.session_state:
     st.session_state.exploration_result = None
 if 'test_suite' not in st.session_state:
     st.session_state.test_suite = None
-if 'execution_results' not in st.session_state:
-    st.session_state.execution_results = []
+if "results_page" not in st.session_state:
+    st.session_state.results_page = 0
 if "exploration_final_json" not in st.session_state:
     st.session_state.exploration_final_json = None
+if "generation_job" not in st.session_state:
+    st.session_state.generation_job = None
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+if "telemetry_trace_id" not in st.session_state:
+    st.session_state.telemetry_trace_id = uuid.uuid4().hex
 
 # Get async runner
 async_runner = get_async_runner()
@@ -83,15 +140,55 @@ with st.sidebar:
     # Options
     st.subheader("Execution Options")
     auto_execute = st.checkbox("Auto-execute tests after generation", value=False)
-    max_tests = st.number_input("Max tests to execute", min_value=1, max_value=10, value=1)
+    stream_generation = st.checkbox(
+        "Stream test generation",
+        value=settings.STREAM_TEST_GENERATION,
+        help="Show test cases as they are generated instead of waiting for the whole suite"
+    )
+    crawl_site = st.checkbox(
+        "Crawl the whole site",
+        value=False,
+        help=f"Explore every page linked from the URL (up to {settings.CRAWL_MAX_PAGES} pages, "
+             f"{settings.CRAWL_MAX_DEPTH} links deep) and generate tests from the merged site map"
+    )
+    incremental_generation = st.checkbox(
+        "Incremental regeneration",
+        value=settings.INCREMENTAL_GENERATION,
+        help="Only regenerate the test cases touched by page changes since the last suite generated for this URL"
+    )
+    max_tests = st.number_input(
+        "Max tests to execute",
+        min_value=1,
+        max_value=50,
+        value=1,
+        help="How many of the highest-priority test cases the Execute tab selects by default"
+    )
+    parallel_workers = st.number_input(
+        "Parallel workers",
+        min_value=1,
+        max_value=10,
+        value=settings.MAX_PARALLEL_TESTS,
+        help="Maximum number of test cases executed concurrently"
+    )
+    batch_by_precondition = st.checkbox(
+        "Share precondition setup across tests",
+        value=settings.BATCH_BY_PRECONDITION,
+        help="Set up each shared precondition (e.g. a login) once and start those tests from a snapshot of it"
+    )
 
     st.markdown("---")
 
     # Actions
     if st.button("🔄 Clear All Results", use_container_width=True):
+        if st.session_state.generation_job is not None:
+            st.session_state.generation_job.cancel()
+            st.session_state.generation_job = None
         st.session_state.exploration_result = None
         st.session_state.test_suite = None
-        st.session_state.execution_results = []
+        # Results stay in the history store; a new session id just starts an empty session view
+        st.session_state.session_id = uuid.uuid4().hex
+        st.session_state.results_page = 0
+        st.session_state.telemetry_trace_id = uuid.uuid4().hex
         st.rerun()
 
 # Main content area with tabs
@@ -118,36 +215,56 @@ with tab1:
     if generate_button:
         if not base_url or not test_description:
             st.error("Please provide both Base URL and Test Description!")
+        elif st.session_state.generation_job is None:
+            # Runs in the background; this script polls it on every rerun so the UI stays responsive
+            st.session_state.generation_job = async_runner.submit(
+                traced(
+                    explore_and_generate(
+                        base_url, test_description, stream_generation, incremental_generation, crawl_site
+                    ),
+                    name="explore_and_generate",
+                    trace_id=st.session_state.telemetry_trace_id
+                ),
+                name=f"Explore & generate tests for {base_url}",
+                timeout=settings.JOB_TIMEOUT,
+                owner=st.session_state.session_id
+            )
+
+    generation_job = st.session_state.generation_job
+    if generation_job is not None and not generation_job.done():
+        job_state = generation_job.partial_result or {}
+        st.info(f"⏳ {job_state.get('stage', 'Starting...')}")
+        st.progress(generation_job.progress or 0.0)
+        if job_state.get("test_cases"):
+            st.markdown(f"**Generated {len(job_state['test_cases'])} test case(s) so far...**")
+            for idx, test_title in enumerate(job_state["test_cases"], 1):
+                st.markdown(f"{idx}. {test_title}")
+
+        if st.button("⏹️ Cancel", key="cancel_generation"):
+            generation_job.cancel()
+        time.sleep(1)
+        st.rerun()
+
+    elif generation_job is not None:
+        st.session_state.generation_job = None
+        stage = (generation_job.partial_result or {}).get("stage", "exploration")
+
+        if generation_job.status == JobStatus.SUCCEEDED:
+            outcome = generation_job.result()
+            st.session_state.exploration_result = outcome["exploration_result"]
+            st.session_state.exploration_final_json = outcome["exploration_final_json"]
+            st.session_state.test_suite = outcome["test_suite"]
+            if outcome["exploration_cached"]:
+                st.success("✅ Page unchanged since the last exploration - reused cached results!")
+            st.success("✅ Test suite generated successfully!")
+            st.balloons()
+        elif generation_job.status == JobStatus.CANCELLED:
+            st.warning(f"⏹️ Cancelled during: {stage}")
+        elif generation_job.status == JobStatus.TIMED_OUT:
+            st.error(f"❌ Timed out after {generation_job.timeout:.0f}s during: {stage}")
         else:
-            # Step 1: Exploration
-            with st.spinner("🔍 Step 1/2: Exploring the page... This may take a moment."):
-                try:
-                    exploration_result = async_runner.run(
-                        page_exploration_agent(base_url, test_description)
-                    )
-                    st.session_state.exploration_result = exploration_result.final_result()
-                    st.session_state.exploration_final_json = exploration_result.structured_output
-                    st.success("✅ Page exploration completed successfully!")
-                except Exception as e:
-                    st.error(f"❌ Error during exploration: {str(e)}")
-                    st.exception(e)
-                    st.stop()
-
-            # Step 2: Test Suite Generation
-            with st.spinner("🧪 Step 2/2: Generating test suite... This may take a minute."):
-                try:
-                    test_suite = async_runner.run(
-                        test_suite_generation_agent(base_url, st.session_state.exploration_result)
-                    )
-                    st.session_state.test_suite = test_suite
-                    st.success("✅ Test suite generated successfully!")
-                    st.balloons()
-                except Exception as e:
-                    st.error(f"❌ Error during test suite generation: {str(e)}")
-                    st.exception(e)
-                    st.stop()
-
-            st.rerun()
+            st.error(f"❌ Error during {stage} {str(generation_job.error)}")
+            st.exception(generation_job.error)
 
     # Display exploration results
     if st.session_state.exploration_result:
@@ -196,82 +313,197 @@ with tab2:
     st.header("Test Execution")
     st.markdown("Execute generated test cases and monitor results.")
 
+    # Runs cut short by a crash or restart keep their state in the run journal and can pick up where they stopped
+    run_id, run_tests, run_base_url, run_owner = None, [], base_url, new_owner()
+    unfinished_runs = run_journal.unfinished(limit=5)
+    if unfinished_runs:
+        with st.expander(f"⏸️ {len(unfinished_runs)} interrupted run(s)"):
+            for run in unfinished_runs:
+                done = run["counts"].get("passed", 0) + run["counts"].get("failed", 0)
+                info_col, resume_col = st.columns([4, 1])
+                info_col.markdown(
+                    f"**{run['base_url']}**: {done}/{sum(run['counts'].values())} test(s) done, "
+                    f"last activity {run['updated_at'][:19].replace('T', ' ')}"
+                )
+                if resume_col.button("Resume", key=f"resume_{run['run_id']}"):
+                    try:
+                        run_tests = run_journal.resume(run["run_id"], run_owner)
+                    except RunInProgressError:
+                        st.warning("This run is executing again in another session.")
+                        continue
+                    st.session_state.test_suite = run["test_suite"]
+                    run_id, run_base_url = run["run_id"], run["base_url"]
+
     if not st.session_state.test_suite:
         st.warning("⚠️ Please generate a test suite first!")
     else:
         st.info(f"Ready to execute {len(st.session_state.test_suite.test_cases)} test case(s)")
 
-        # Test selection
+        # Test selection: suites are generated in priority order, so the default is the first
+        # ``max_tests`` cases, or those whose estimated run times fit in the time budget
+        test_cases = st.session_state.test_suite.test_cases
+        time_budget = st.number_input(
+            "Time budget (seconds)",
+            min_value=0,
+            value=0,
+            step=30,
+            help="Select only the most valuable tests whose estimated run times fit in this wall time; 0 = no budget"
+        )
+        candidates = list(range(len(test_cases)))
+        if time_budget:
+            durations = results_store.mean_durations(base_url, [test_case.test_case_id for test_case in test_cases])
+            # ``parallel_workers`` tests run at a time, so the budget holds that many test-seconds per second
+            within_budget = {
+                id(test_case) for test_case in select_within_budget(test_cases, time_budget * parallel_workers, durations)
+            }
+            candidates = [test_idx for test_idx in candidates if id(test_cases[test_idx]) in within_budget]
         selected_tests = st.multiselect(
             "Select tests to execute",
-            options=range(len(st.session_state.test_suite.test_cases)),
-            format_func=lambda x: f"Test #{x + 1}: {st.session_state.test_suite.test_cases[x].test_title}",
-            default=[0] if st.session_state.test_suite.test_cases else []
+            options=range(len(test_cases)),
+            format_func=lambda x: f"Test #{x + 1}: {test_cases[x].test_title}",
+            default=candidates[:max_tests]
         )
 
         execute_button = st.button("▶️ Execute Selected Tests", use_container_width=True, type="primary")
 
         if execute_button and selected_tests:
-            st.session_state.execution_results = []
-
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-
-            for idx, test_idx in enumerate(selected_tests):
-                test_case = st.session_state.test_suite.test_cases[test_idx]
-
-                status_text.markdown(f"**Executing:** {test_case.test_title}")
-
-                with st.expander(f"Executing Test #{test_idx + 1}: {test_case.test_title}", expanded=True):
-                    st.markdown(f"**Description:** {test_case.description}")
-                    st.markdown("**Test Steps:**")
-                    st.code(test_case.test_steps, language="text")
+            run_id, run_tests, run_base_url = uuid.uuid4().hex, selected_tests, base_url
+            run_journal.start(
+                run_id, base_url, st.session_state.test_suite, selected_tests,
+                session_id=st.session_state.session_id, owner=run_owner
+            )
 
-                    try:
-                        with st.spinner("🌐 Launching browser and executing test..."):
-                            execution_result = async_runner.run(
-                                execute_the_test_case_using_browser_use(test_case)
-                            )
-
-                        st.success("✅ Test execution completed!")
-                        st.markdown("**Execution Result:**")
-                        st.code(execution_result.structured_output, language="python")
-
-                        st.session_state.execution_results.append({
-                            "test_index": test_idx,
-                            "test_title": test_case.test_title,
-                            "status": "passed",
-                            "result": execution_result.final_result(),
-                            "timestamp": datetime.now().isoformat()
-                        })
-
-                    except Exception as e:
-                        st.error(f"❌ Test execution failed: {str(e)}")
-                        st.exception(e)
-                        st.session_state.execution_results.append({
-                            "test_index": test_idx,
-                            "test_title": test_case.test_title,
-                            "status": "failed",
-                            "error": str(e),
-                            "timestamp": datetime.now().isoformat()
-                        })
-
-                progress_bar.progress((idx + 1) / len(selected_tests))
-
-            status_text.markdown("**✅ All selected tests executed!**")
-            st.balloons()
+        if run_id is not None and run_tests:
+            # The lease marks the run as live, so no other session offers to resume it meanwhile
+            with run_journal.lease(run_id, run_owner):
+                st.session_state.results_page = 0
+
+                progress_bar = st.progress(0)
+                status_text = st.empty()
+                status_text.markdown(
+                    f"**Executing {len(run_tests)} test(s) with up to {parallel_workers} in parallel...**"
+                )
+
+                with st.spinner("🌐 Launching browsers and executing tests..."):
+                    if batch_by_precondition:
+                        completions = async_runner.iterate(execute_batched(
+                            [st.session_state.test_suite.test_cases[test_idx] for test_idx in run_tests],
+                            run_base_url,
+                            concurrency=parallel_workers,
+                            timeout=None,  # each attempt is bounded by TEST_EXECUTION_TIMEOUT
+                            trace_id=st.session_state.telemetry_trace_id,
+                            on_start=lambda position: run_journal.mark_running(run_id, run_tests[position])
+                        ))
+                    else:
+                        completions = async_runner.run_many(
+                            (
+                                traced(
+                                    journaled(
+                                        execute_test_case(st.session_state.test_suite.test_cases[test_idx]),
+                                        run_id,
+                                        test_idx
+                                    ),
+                                    name="test_run",
+                                    trace_id=st.session_state.telemetry_trace_id
+                                )
+                                for test_idx in run_tests
+                            ),
+                            max_concurrency=parallel_workers,
+                            timeout=None,  # each attempt is bounded by TEST_EXECUTION_TIMEOUT
+                            owner=st.session_state.session_id
+                        )
+
+                    # Results are recorded in completion order, not selection order
+                    for completed, (position, execution_result, error) in enumerate(completions, 1):
+                        test_idx = run_tests[position]
+                        test_case = st.session_state.test_suite.test_cases[test_idx]
+                        result_fields = {
+                            "session_id": st.session_state.session_id,
+                            "run_id": run_id,
+                            "suite_id": st.session_state.test_suite.suite_id,
+                            "base_url": run_base_url,
+                            "test_case_id": test_case.test_case_id,
+                        }
+
+                        with st.expander(f"Executed Test #{test_idx + 1}: {test_case.test_title}", expanded=True):
+                            st.markdown(f"**Description:** {test_case.description}")
+                            st.markdown("**Test Steps:**")
+                            st.code(test_case.test_steps, language="text")
+
+                            try:
+                                if error is not None:
+                                    raise error
+
+                                verdict = VerdictEnum(execution_result.verdict)
+                                error_reason = None if verdict == VerdictEnum.PASSED else execution_result.reason
+                                if verdict == VerdictEnum.PASSED:
+                                    st.success("✅ Test passed")
+                                elif verdict == VerdictEnum.BLOCKED:
+                                    st.warning(f"⛔ Test blocked: {execution_result.reason}")
+                                else:
+                                    st.error(f"❌ Test {verdict.value}: {execution_result.reason}")
+                                flaky_note = " · ⚠️ flaky: attempts disagreed" if execution_result.flaky else ""
+                                st.caption(f"{len(execution_result.attempts)} attempt(s){flaky_note}")
+                                st.markdown("**Execution Result:**")
+                                st.code(execution_result.final_result() or execution_result.reason, language="text")
+
+                                results_store.add({
+                                    "test_index": test_idx,
+                                    "test_title": test_case.test_title,
+                                    "status": verdict.value,
+                                    "result": execution_result.final_result(),
+                                    "error": error_reason,
+                                    "timestamp": datetime.now().isoformat()
+                                }, **result_fields)
+                                run_journal.complete(
+                                    run_id, test_idx, verdict.value, result=execution_result.final_result(), error=error_reason
+                                )
+
+                            except Exception as e:
+                                st.error(f"❌ Test execution failed: {str(e)}")
+                                st.exception(e)
+                                results_store.add({
+                                    "test_index": test_idx,
+                                    "test_title": test_case.test_title,
+                                    "status": "failed",
+                                    "error": str(e),
+                                    "timestamp": datetime.now().isoformat()
+                                }, **result_fields)
+                                run_journal.complete(run_id, test_idx, "failed", error=str(e))
+
+                        status_text.markdown(f"**Completed:** {test_case.test_title}")
+                        progress_bar.progress(completed / len(run_tests))
+
+                results_store.flush()
+                status_text.markdown("**✅ All selected tests executed!**")
+                st.balloons()
 
 # Tab 3: Results & Reports
 with tab3:
     st.header("Results & Reports")
     st.markdown("View comprehensive test execution results and generate reports.")
 
-    if not st.session_state.execution_results:
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        results_scope = st.radio("Show", ["This session", "All history"], horizontal=True)
+    result_filters = {"session_id": st.session_state.session_id} if results_scope == "This session" else {}
+    with col2:
+        suite_filter = st.selectbox("Suite", ["All suites"] + results_store.suites(**result_filters))
+    with col3:
+        status_filter = st.selectbox("Status", ["All"] + [verdict.value for verdict in VerdictEnum])
+    if suite_filter != "All suites":
+        result_filters["suite_id"] = suite_filter
+    if status_filter != "All":
+        result_filters["status"] = status_filter
+
+    status_counts = results_store.status_counts(**result_filters)
+    total_tests = sum(status_counts.values())
+
+    if not total_tests:
         st.info("ℹ️ No test execution results yet. Execute tests to see results here.")
     else:
         # Summary metrics
-        total_tests = len(st.session_state.execution_results)
-        passed_tests = sum(1 for r in st.session_state.execution_results if r["status"] == "passed")
+        passed_tests = status_counts.get("passed", 0)
         failed_tests = total_tests - passed_tests
 
         col1, col2, col3 = st.columns(3)
@@ -281,22 +513,91 @@ with tab3:
 
         st.markdown("---")
 
-        # Detailed results
+        # Detailed results, one page at a time, newest first
         st.subheader("Detailed Results")
 
-        for result in st.session_state.execution_results:
-            status_icon = "✅" if result["status"] == "passed" else "❌"
+        page_count = (total_tests - 1) // settings.RESULTS_PAGE_SIZE + 1
+        page = min(st.session_state.results_page, page_count - 1)
+
+        for result in results_store.page(
+            limit=settings.RESULTS_PAGE_SIZE, offset=page * settings.RESULTS_PAGE_SIZE, **result_filters
+        ):
+            status_icon = {"passed": "✅", "blocked": "⛔"}.get(result["status"], "❌")
 
             with st.expander(f"{status_icon} {result['test_title']} - {result['status'].upper()}"):
-                st.markdown(f"**Test Index:** #{result['test_index'] + 1}")
+                if result["test_index"] is not None:
+                    st.markdown(f"**Test Index:** #{result['test_index'] + 1}")
                 st.markdown(f"**Timestamp:** {result['timestamp']}")
 
-                if result["status"] == "passed":
+                if result["status"] != "passed":
+                    st.markdown("**Reason:**")
+                    st.error(result["error"] or "Unknown error")
+                if result["result"] or result["status"] == "passed":
                     st.markdown("**Result:**")
-                    st.code(result.get("result", "No result available"), language="python")
-                else:
-                    st.markdown("**Error:**")
-                    st.error(result.get("error", "Unknown error"))
+                    st.code(result["result"] or "No result available", language="text")
+
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            if st.button("⬅️ Newer", disabled=page == 0, use_container_width=True):
+                st.session_state.results_page = page - 1
+                st.rerun()
+        col2.markdown(
+            f"<div style='text-align: center;'>Page {page + 1} of {page_count}</div>", unsafe_allow_html=True
+        )
+        with col3:
+            if st.button("Older ➡️", disabled=page >= page_count - 1, use_container_width=True):
+                st.session_state.results_page = page + 1
+                st.rerun()
+
+        # Cases whose attempts have disagreed, across every run
+        flaky_cases = flakiness_store.flakiest()
+        if flaky_cases:
+            st.markdown("---")
+            st.subheader("Flaky Tests")
+            st.dataframe(
+                [
+                    {
+                        "Test": case["test_title"],
+                        "Flakiness": f"{case['flakiness']:.0%}",
+                        "Runs": case["runs"],
+                        "Attempts": case["attempts"],
+                        "Last Verdict": case["last_verdict"],
+                    }
+                    for case in flaky_cases
+                ],
+                use_container_width=True,
+                hide_index=True
+            )
+
+        # Per-stage cost and latency breakdown of this session's runs
+        stage_metrics = telemetry.summarize(st.session_state.telemetry_trace_id)
+        if stage_metrics:
+            st.markdown("---")
+            st.subheader("Performance")
+            total_tokens = sum(stage["prompt_tokens"] + stage["completion_tokens"] for stage in stage_metrics)
+            col1, col2, col3 = st.columns(3)
+            col1.metric("LLM Calls", sum(stage["llm_calls"] for stage in stage_metrics))
+            col2.metric("Tokens", total_tokens)
+            col3.metric("Agent Steps", sum(stage["steps"] for stage in stage_metrics))
+            st.dataframe(stage_metrics, use_container_width=True, hide_index=True)
+
+            col1, col2 = st.columns(2)
+            with col1:
+                st.download_button(
+                    label="📥 Download Spans (JSONL)",
+                    data=telemetry.export_jsonl(st.session_state.telemetry_trace_id),
+                    file_name=f"spans_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl",
+                    mime="application/jsonl",
+                    use_container_width=True
+                )
+            with col2:
+                st.download_button(
+                    label="📥 Download Trace (OTLP JSON)",
+                    data=telemetry.export_otlp_json(st.session_state.telemetry_trace_id),
+                    file_name=f"trace_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+                    mime="application/json",
+                    use_container_width=True
+                )
 
         # Export results
         st.markdown("---")
@@ -304,39 +605,20 @@ with tab3:
 
         col1, col2 = st.columns(2)
 
+        # Exports are generated on click, streamed from the store instead of built on every rerun
         with col1:
             st.download_button(
                 label="📥 Download Results (JSON)",
-                data=json.dumps({"test_results": st.session_state.execution_results}, indent=4),
+                data=lambda: results_store.export("json", **result_filters),
                 file_name=f"test_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
                 mime="application/json",
                 use_container_width=True
             )
 
         with col2:
-            # Generate simple text report
-            report = f"""Test Execution Report
-Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-
-Summary:
---------
-Total Tests: {total_tests}
-Passed: {passed_tests}
-Failed: {failed_tests}
-Success Rate: {(passed_tests / total_tests * 100):.1f}%
-
-Detailed Results:
-----------------
-"""
-            for result in st.session_state.execution_results:
-                report += f"\n{result['test_title']}\n"
-                report += f"Status: {result['status'].upper()}\n"
-                report += f"Timestamp: {result['timestamp']}\n"
-                report += "-" * 50 + "\n"
-
             st.download_button(
                 label="📄 Download Report (TXT)",
-                data=report,
+                data=lambda: results_store.export("txt", **result_filters),
                 file_name=f"test_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
                 mime="text/plain",
                 use_container_width=True
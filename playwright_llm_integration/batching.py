@@ -0,0 +1,134 @@
+import asyncio
+import re
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Iterable, Optional
+
+from playwright_llm_integration import agents
+from playwright_llm_integration.browser_pool import capture_storage_state, get_browser_pool
+from playwright_llm_integration.models import TestCase
+from playwright_llm_integration.prompts import PRECONDITION_SETUP_TASK_PROMPT
+from playwright_llm_integration.telemetry import agent_run_metrics, span, traced
+from settings import settings
+
+
+# ============================================================================
+# PRECONDITION GROUPS - Test cases that start from the same state
+# ============================================================================
+
+_NON_WORD = re.compile(r"[^\w]+")
+_NO_PRECONDITION = {"", "none", "n a", "na", "no preconditions", "no precondition", "not applicable"}
+
+
+def precondition_key(preconditions: str) -> Optional[str]:
+    """Case-, punctuation- and whitespace-insensitive form of ``preconditions``; None if there are none."""
+    key = _NON_WORD.sub(" ", (preconditions or "").lower()).strip()
+    return None if key in _NO_PRECONDITION else key
+
+
+@dataclass
+class PreconditionGroup:
+    preconditions: str
+    test_cases: list[tuple[int, TestCase]] = field(default_factory=list)
+
+
+def group_by_precondition(test_cases: Iterable[tuple[int, TestCase]]) -> list[PreconditionGroup]:
+    """
+    Group ``(index, test_case)`` pairs by shared preconditions, in order of first appearance.
+    Cases without preconditions each get a group of their own.
+    """
+    groups: dict[Any, PreconditionGroup] = {}
+    for index, test_case in test_cases:
+        key = precondition_key(test_case.preconditions)
+        group = groups.setdefault(key if key is not None else ("cold", index), PreconditionGroup(test_case.preconditions))
+        group.test_cases.append((index, test_case))
+    return list(groups.values())
+
+
+# ============================================================================
+# BATCHED EXECUTION - Set up each precondition once, start every case from a snapshot
+# ============================================================================
+
+async def establish_precondition(base_url: str, preconditions: str, trace_id: Optional[str] = None) -> Optional[dict]:
+    """Run an agent until ``preconditions`` hold and snapshot the browser's storage state; None if it failed."""
+    with span("precondition_setup", trace_id=trace_id, base_url=base_url) as setup_span:
+        async with get_browser_pool().lease() as browser_session:
+            setup_agent = agents.browser_agent(
+                agents.browser_use_google_llm,
+                settings.EXECUTION_VISION,
+                task=PRECONDITION_SETUP_TASK_PROMPT.format(base_url=base_url, preconditions=preconditions),
+                browser_session=browser_session
+            )
+            history = await setup_agent.run()
+            setup_span.set(established=history.is_successful(), **agent_run_metrics(history))
+            if not history.is_successful():
+                return None
+            return await capture_storage_state(browser_session)
+
+
+async def group_starting_state(
+    base_url: str,
+    group: PreconditionGroup,
+    semaphore: asyncio.Semaphore,
+    min_group_size: int = settings.BATCH_MIN_GROUP_SIZE,
+    trace_id: Optional[str] = None,
+) -> Optional[dict]:
+    """
+    Storage state the cases of ``group`` should start from, set up under ``semaphore``;
+    None (run cold) for groups smaller than ``min_group_size`` or when the setup fails.
+    """
+    if len(group.test_cases) < max(1, min_group_size):
+        return None
+    async with semaphore:
+        try:
+            return await establish_precondition(base_url, group.preconditions, trace_id)
+        except Exception:
+            return None
+
+
+async def execute_batched(
+    test_cases: list[TestCase],
+    base_url: str,
+    concurrency: int = settings.MAX_PARALLEL_TESTS,
+    timeout: Optional[float] = None,
+    min_group_size: int = settings.BATCH_MIN_GROUP_SIZE,
+    trace_id: Optional[str] = None,
+    on_start: Optional[Callable[[int], None]] = None,
+) -> AsyncIterator[tuple[int, Any, Optional[BaseException]]]:
+    """
+    Execute test cases grouped by precondition: each group of at least ``min_group_size`` cases
+    sets its precondition up once and starts every case from a snapshot of that state.
+    Smaller groups, and groups whose setup fails, run cold as usual. At most ``concurrency``
+    setups and cases run at a time; ``timeout`` bounds each case once started, and ``on_start``
+    is called with its index as it starts. Yields ``(index, result, error)`` tuples in completion order, like ``AsyncRunner.run_many``.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    completions: asyncio.Queue[tuple[int, Any, Optional[BaseException]]] = asyncio.Queue()
+
+    async def run_case(index: int, test_case: TestCase, starting_state: Optional[dict]):
+        async with semaphore:
+            if on_start is not None:
+                on_start(index)
+            try:
+                async with asyncio.timeout(timeout):
+                    result = await traced(
+                        agents.execute_test_case(test_case, starting_state=starting_state),
+                        name="test_run",
+                        trace_id=trace_id
+                    )
+                completions.put_nowait((index, result, None))
+            except Exception as e:
+                completions.put_nowait((index, None, e))
+
+    async def run_group(group: PreconditionGroup):
+        starting_state = await group_starting_state(base_url, group, semaphore, min_group_size, trace_id)
+        await asyncio.gather(*(run_case(index, test_case, starting_state) for index, test_case in group.test_cases))
+
+    tasks = [asyncio.create_task(run_group(group)) for group in group_by_precondition(enumerate(test_cases))]
+    try:
+        for _ in range(len(test_cases)):
+            yield await completions.get()
+    finally:
+        # The consumer stopped early (e.g. a Streamlit rerun); don't leave orphans behind
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,282 @@
+import asyncio
+import json
+import time
+import weakref
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Optional
+from urllib.parse import urlparse
+
+from settings import settings
+
+if TYPE_CHECKING:
+    from browser_use import BrowserSession
+
+
+# ============================================================================
+# BROWSER POOL - Warm, reusable browser sessions shared by the agents
+# ============================================================================
+
+@dataclass
+class _PooledBrowser:
+    session: "BrowserSession"
+    last_used: float = field(default_factory=time.monotonic)
+    leases: int = 0
+
+
+class BrowserPool:
+    """
+    A size-capped pool of warm, keep-alive browser sessions bound to one event loop.
+    Agents lease a session exclusively; on return it is reset (extra tabs closed,
+    cookies and site storage cleared, back to about:blank) so the next lease starts clean.
+    """
+
+    def __init__(
+        self,
+        max_size: int = settings.BROWSER_POOL_SIZE,
+        idle_timeout: float = settings.BROWSER_POOL_IDLE_TIMEOUT,
+        max_leases_per_browser: int = settings.BROWSER_POOL_MAX_LEASES,
+        headless: bool = settings.BROWSER_HEADLESS,
+    ):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.max_leases_per_browser = max_leases_per_browser
+        self.launches = 0
+        from browser_use import BrowserProfile
+
+        self._profile = BrowserProfile(
+            minimum_wait_page_load_time=0.1,
+            wait_between_actions=0.1,
+            headless=headless,
+            is_local=True,
+            keep_alive=True
+        )
+        self._idle: list[_PooledBrowser] = []
+        self._slots = asyncio.Semaphore(max_size)
+        self._lock = asyncio.Lock()
+        self._reaper: Optional[asyncio.Task] = None
+        self._closed = False
+
+    @asynccontextmanager
+    async def lease(self):
+        """Lease a clean browser session for the duration of the block."""
+        pooled = await self._acquire()
+        try:
+            yield pooled.session
+        finally:
+            await self._release(pooled)
+
+    async def evict_idle(self) -> int:
+        """Dispose of browsers that have been idle longer than ``idle_timeout``."""
+        now = time.monotonic()
+        async with self._lock:
+            expired = [p for p in self._idle if now - p.last_used >= self.idle_timeout]
+            self._idle = [p for p in self._idle if p not in expired]
+
+        for pooled in expired:
+            await self._dispose(pooled)
+        return len(expired)
+
+    async def close(self):
+        """Dispose of every idle browser and refuse new leases."""
+        self._closed = True
+        if self._reaper:
+            self._reaper.cancel()
+
+        async with self._lock:
+            idle, self._idle = self._idle, []
+        for pooled in idle:
+            await self._dispose(pooled)
+
+    async def _acquire(self) -> _PooledBrowser:
+        if self._closed:
+            raise RuntimeError("Browser pool is closed")
+
+        await self._slots.acquire()
+        try:
+            self._ensure_reaper()
+            while True:
+                async with self._lock:
+                    # LIFO, so the most recently used (warmest) browser is reused first
+                    pooled = self._idle.pop() if self._idle else None
+
+                if pooled is None:
+                    pooled = await self._launch()
+                    break
+                if await self._is_healthy(pooled):
+                    break
+                await self._dispose(pooled)
+        except BaseException:
+            self._slots.release()
+            raise
+
+        pooled.leases += 1
+        return pooled
+
+    async def _release(self, pooled: _PooledBrowser):
+        try:
+            recycle = self._closed or pooled.leases >= self.max_leases_per_browser
+            if recycle or not await self._reset(pooled):
+                await self._dispose(pooled)
+            else:
+                pooled.last_used = time.monotonic()
+                async with self._lock:
+                    self._idle.append(pooled)
+        finally:
+            self._slots.release()
+
+    async def _launch(self) -> _PooledBrowser:
+        # Each browser gets its own profile copy; sessions write their cdp_url back into it
+        from browser_use import BrowserSession
+
+        session = BrowserSession(browser_profile=self._profile.model_copy())
+        await session.start()
+        self.launches += 1
+        return _PooledBrowser(session=session)
+
+    async def _is_healthy(self, pooled: _PooledBrowser) -> bool:
+        try:
+            await asyncio.wait_for(pooled.session.cdp_client.send.Browser.getVersion(), timeout=5)
+            return True
+        except Exception:
+            return False
+
+    async def _reset(self, pooled: _PooledBrowser) -> bool:
+        session = pooled.session
+        try:
+            async with asyncio.timeout(15):
+                origins = {_origin(tab.url) for tab in await session.get_tabs()} - {None}
+
+                # Talk CDP directly: the session's event bus is paused between agents
+                cdp_session = await session.get_or_create_cdp_session(session.agent_focus_target_id, focus=True)
+                await cdp_session.cdp_client.send.Page.navigate(
+                    params={"url": "about:blank"}, session_id=cdp_session.session_id
+                )
+                for tab in await session.get_tabs():
+                    if tab.target_id != session.agent_focus_target_id:
+                        await session.cdp_client.send.Target.closeTarget(params={"targetId": tab.target_id})
+
+                await session.clear_cookies()
+                for origin in origins:
+                    await session.cdp_client.send.Storage.clearDataForOrigin(
+                        params={"origin": origin, "storageTypes": "all"}
+                    )
+            return True
+        except Exception:
+            return False
+
+    async def _dispose(self, pooled: _PooledBrowser):
+        try:
+            await pooled.session.kill()
+        except Exception:
+            pass
+
+    def _ensure_reaper(self):
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap_idle())
+
+    async def _reap_idle(self):
+        while not self._closed:
+            await asyncio.sleep(max(1.0, self.idle_timeout / 2))
+            await self.evict_idle()
+
+
+def _origin(url: str) -> Optional[str]:
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https"):
+        return None
+    return f"{parsed.scheme}://{parsed.netloc}"
+
+
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, BrowserPool]" = weakref.WeakKeyDictionary()
+
+
+def get_browser_pool() -> BrowserPool:
+    """Return the browser pool owned by the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        pool = _pools[loop] = BrowserPool()
+    return pool
+
+
+async def close_browser_pool():
+    """Close the browser pool owned by the running event loop, if any."""
+    pool = _pools.pop(asyncio.get_running_loop(), None)
+    if pool is not None:
+        await pool.close()
+
+
+# ============================================================================
+# STORAGE STATE - Snapshot a session's login state and start other sessions from it
+# ============================================================================
+
+_READ_STORAGE_JS = """() => {
+    const items = (storage) => Object.keys(storage).map((name) => ({name: name, value: storage.getItem(name)}));
+    return JSON.stringify([location.href, location.origin, items(localStorage), items(sessionStorage)]);
+}"""
+
+# Storage.getCookies returns fields that Storage.setCookies rejects (size, session)
+_COOKIE_PARAMS = ("name", "value", "domain", "path", "expires", "httpOnly", "secure", "sameSite", "priority", "partitionKey")
+
+
+async def capture_storage_state(browser_session: "BrowserSession") -> dict:
+    """
+    Cookies, plus the local and session storage of the current page's origin, in Playwright's
+    ``storage_state`` format, with the current ``url`` to resume from.
+    """
+    page = await browser_session.must_get_current_page()
+    url, origin, local_storage, session_storage = json.loads(await page.evaluate(_READ_STORAGE_JS))
+    cookies = [
+        {key: cookie[key] for key in _COOKIE_PARAMS if key in cookie and not (key == "expires" and cookie.get("session"))}
+        for cookie in await browser_session.cookies()
+    ]
+    return {
+        "url": url,
+        "cookies": cookies,
+        "origins": [{"origin": origin, "localStorage": local_storage, "sessionStorage": session_storage}],
+    }
+
+
+def _restore_storage_js(origin: dict) -> str:
+    lines = [
+        f"window.{storage}.setItem({json.dumps(item['name'])}, {json.dumps(item['value'])});"
+        for storage in ("localStorage", "sessionStorage")
+        for item in origin.get(storage) or []
+    ]
+    return (
+        f"if (location.origin === {json.dumps(origin['origin'])}) {{ try {{ {' '.join(lines)} }} catch (e) {{}} }}"
+    )
+
+
+async def apply_storage_state(browser_session: "BrowserSession", storage_state: dict, timeout: float = 15.0):
+    """Restore a ``capture_storage_state`` snapshot into a clean session and open its ``url``."""
+    cdp_session = await browser_session.get_or_create_cdp_session(browser_session.agent_focus_target_id, focus=True)
+    send = cdp_session.cdp_client.send
+    if storage_state.get("cookies"):
+        await send.Storage.setCookies(params={"cookies": storage_state["cookies"]}, session_id=cdp_session.session_id)
+
+    # Storage is per origin, so it is written by a script that runs before the page's own;
+    # the script is removed once the page loaded, so later navigations (e.g. a logout) aren't undone
+    script_ids = []
+    for origin in storage_state.get("origins") or []:
+        if origin.get("localStorage") or origin.get("sessionStorage"):
+            added = await send.Page.addScriptToEvaluateOnNewDocument(
+                params={"source": _restore_storage_js(origin)}, session_id=cdp_session.session_id
+            )
+            script_ids.append(added["identifier"])
+    try:
+        page = await browser_session.must_get_current_page()
+        await page.goto(storage_state["url"])
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while loop.time() < deadline:
+            href, ready_state = json.loads(await page.evaluate("() => JSON.stringify([location.href, document.readyState])"))
+            if href != "about:blank" and ready_state == "complete":
+                break
+            await asyncio.sleep(0.1)
+    finally:
+        for script_id in script_ids:
+            await send.Page.removeScriptToEvaluateOnNewDocument(
+                params={"identifier": script_id}, session_id=cdp_session.session_id
+            )
@@ -0,0 +1,312 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Optional, Protocol
+
+from pydantic import BaseModel
+
+from playwright_llm_integration.models import AgentRunSnapshot
+from playwright_llm_integration.telemetry import record
+from settings import settings
+
+
+# ============================================================================
+# PAGE FINGERPRINTS
+# ============================================================================
+
+# Markup that changes on every request without changing the page itself
+_VOLATILE_MARKUP = [
+    re.compile(r"<script\b[^>]*>.*?</script>", re.IGNORECASE | re.DOTALL),
+    re.compile(r"<style\b[^>]*>.*?</style>", re.IGNORECASE | re.DOTALL),
+    re.compile(r"<!--.*?-->", re.DOTALL),
+    re.compile(r"\s(?:nonce|data-csrf|csrf-token)=\"[^\"]*\"", re.IGNORECASE),
+]
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint_html(html: str) -> str:
+    """Hash the structural content of an HTML document, ignoring scripts, styles and whitespace."""
+    for pattern in _VOLATILE_MARKUP:
+        html = pattern.sub("", html)
+    html = _WHITESPACE.sub(" ", html).strip()
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+
+def _fetch_html(url: str, timeout: float) -> str:
+    request = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0 (playwright-llm-integration)"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        charset = response.headers.get_content_charset() or "utf-8"
+        return response.read().decode(charset, errors="replace")
+
+
+async def fetch_page_fingerprint(url: str, timeout: float = 10.0) -> Optional[str]:
+    """Fetch ``url`` over plain HTTP and fingerprint it. Returns None if the page can't be fetched."""
+    try:
+        html = await asyncio.to_thread(_fetch_html, url, timeout)
+    except Exception:
+        return None
+    return fingerprint_html(html)
+
+
+# ============================================================================
+# EXPLORATION CACHE - On-disk, content-addressed page exploration results
+# ============================================================================
+
+class ExplorationCache:
+    """
+    Caches page exploration results on disk, keyed by URL, description, page fingerprint and
+    exploration mode (a DOM-only inventory must not answer a request for an agent exploration).
+    Entries expire after ``ttl`` seconds; the least recently used entries are evicted
+    once there are more than ``max_entries``.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path = Path(settings.CACHE_DIR) / "exploration",
+        ttl: float = settings.EXPLORATION_CACHE_TTL,
+        max_entries: int = settings.EXPLORATION_CACHE_MAX_ENTRIES,
+    ):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    @staticmethod
+    def key(url: str, description: str, fingerprint: str, mode: str) -> str:
+        payload = json.dumps([url, description or "", fingerprint, mode])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, url: str, description: str, fingerprint: str, mode: str) -> Optional[AgentRunSnapshot]:
+        path = self._path(self.key(url, description, fingerprint, mode))
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+        if time.time() - entry["created_at"] > self.ttl:
+            path.unlink(missing_ok=True)
+            return None
+
+        # Touch the entry so size-based eviction drops the least recently used ones first
+        os.utime(path)
+        return AgentRunSnapshot(final_text=entry["final_text"], structured_output=entry["structured_output"], source="cache")
+
+    def put(
+        self,
+        url: str,
+        description: str,
+        fingerprint: str,
+        mode: str,
+        final_text: str,
+        structured_output: Any = None,
+    ):
+        if isinstance(structured_output, BaseModel):
+            structured_output = structured_output.model_dump(mode="json")
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(self.key(url, description, fingerprint, mode))
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({
+            "created_at": time.time(),
+            "url": url,
+            "description": description,
+            "fingerprint": fingerprint,
+            "mode": mode,
+            "final_text": final_text,
+            "structured_output": structured_output,
+        }), encoding="utf-8")
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def clear(self):
+        for path in self.directory.glob("*.json"):
+            path.unlink(missing_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def _evict(self):
+        now = time.time()
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.ttl:
+                path.unlink(missing_ok=True)
+            else:
+                entries.append((stat.st_mtime, path))
+
+        entries.sort(reverse=True)
+        for _, path in entries[self.max_entries:]:
+            path.unlink(missing_ok=True)
+
+
+exploration_cache = ExplorationCache()
+
+
+# ============================================================================
+# LLM RESPONSE CACHE - Deterministic structured completions
+# ============================================================================
+
+class CacheBackend(Protocol):
+    def get(self, key: str) -> Optional[str]: ...
+
+    def set(self, key: str, value: str) -> None: ...
+
+    def clear(self) -> None: ...
+
+
+class LRUCacheBackend:
+    """In-memory, thread-safe LRU backend."""
+
+    def __init__(self, max_entries: int = settings.LLM_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCacheBackend:
+    """SQLite backend that survives restarts; least recently used rows are pruned beyond ``max_entries``."""
+
+    def __init__(
+        self,
+        path: str | Path = Path(settings.CACHE_DIR) / "llm_cache.sqlite3",
+        max_entries: int = settings.LLM_CACHE_MAX_ENTRIES,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed_at ON llm_cache (accessed_at)")
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, accessed_at) VALUES (?, ?, ?)",
+                (key, value, time.time())
+            )
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key NOT IN "
+                "(SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT ?)",
+                (self.max_entries,)
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+
+
+def build_cache_backend(name: str) -> Optional[CacheBackend]:
+    """Build a cache backend by name: ``memory``, ``sqlite`` or ``none``."""
+    if name == "memory":
+        return LRUCacheBackend()
+    if name == "sqlite":
+        return SQLiteCacheBackend()
+    if name == "none":
+        return None
+    raise ValueError(f"Unknown LLM cache backend: {name!r}")
+
+
+class CachedStructuredClient:
+    """
+    Wraps an instructor client so that deterministic (``temperature: 0``) structured
+    completions are served from a cache. Exposes the same ``chat.completions.create``
+    entry point, so it is a drop-in replacement for the wrapped client.
+    Cached values are stored as JSON and re-validated against ``response_model`` on read.
+    """
+
+    def __init__(self, client, backend: Optional[CacheBackend], model: str):
+        self.client = client
+        self.backend = backend
+        self.model = model
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def cache_key(self, messages: list[dict], response_model: type[BaseModel], generation_config: Optional[dict]) -> str:
+        payload = json.dumps({
+            "model": self.model,
+            "messages": messages,
+            "response_model": {
+                "name": response_model.__qualname__,
+                "schema": response_model.model_json_schema(),
+            },
+            "generation_config": generation_config or {},
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def lookup(self, messages: list[dict], response_model: type[BaseModel], generation_config: Optional[dict] = None):
+        """Return the cached response for this request, or None without calling the LLM."""
+        if self.backend is None or (generation_config or {}).get("temperature") != 0.0:
+            return None
+        cached = self.backend.get(self.cache_key(messages, response_model, generation_config))
+        if cached is None:
+            return None
+        try:
+            return response_model.model_validate_json(cached)
+        except ValueError:
+            return None
+
+    def store(self, messages: list[dict], response_model: type[BaseModel], generation_config: Optional[dict], response: BaseModel):
+        """Cache a response that was produced outside ``create`` (e.g. assembled from a stream)."""
+        if self.backend is None or (generation_config or {}).get("temperature") != 0.0:
+            return
+        self.backend.set(self.cache_key(messages, response_model, generation_config), response.model_dump_json())
+
+    async def create(self, *, messages: list[dict], response_model: type[BaseModel], generation_config: Optional[dict] = None, **kwargs):
+        cacheable = self.backend is not None and (generation_config or {}).get("temperature") == 0.0
+        if not cacheable:
+            return await self.client.chat.completions.create(
+                messages=messages, response_model=response_model, generation_config=generation_config, **kwargs
+            )
+
+        cached = self.lookup(messages, response_model, generation_config)
+        if cached is not None:
+            record(llm_cache_hits=1)
+            return cached
+
+        response = await self.client.chat.completions.create(
+            messages=messages, response_model=response_model, generation_config=generation_config, **kwargs
+        )
+        self.store(messages, response_model, generation_config, response)
+        return response
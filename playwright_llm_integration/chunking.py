@@ -0,0 +1,46 @@
+# ============================================================================
+# INVENTORY CHUNKING - Split an exploration into page / section sized prompts
+# ============================================================================
+
+def estimate_text_tokens(text: str) -> int:
+    return len(text) // 4
+
+
+def _pack(pieces: list[str], token_budget: int) -> list[str]:
+    """Join consecutive pieces while they fit in ``token_budget``."""
+    packed: list[str] = []
+    for piece in pieces:
+        if packed and estimate_text_tokens(packed[-1]) + estimate_text_tokens(piece) <= token_budget:
+            packed[-1] = f"{packed[-1]}\n\n{piece}"
+        else:
+            packed.append(piece)
+    return packed
+
+
+def _split(text: str, token_budget: int, level: int) -> list[str]:
+    if estimate_text_tokens(text) <= token_budget:
+        return [text]
+    lines = text.splitlines()
+    if level > 2:
+        # No headings left to split on: split between lines (list items)
+        return _pack([line for line in lines if line.strip()], token_budget)
+
+    starts = [number for number, line in enumerate(lines) if line.startswith("#" * level + " ")]
+    if not starts:
+        return _split(text, token_budget, level + 1)
+    # Lines above the first heading (e.g. a page's title, URL and summary) head every chunk of it
+    preamble = "\n".join(lines[:starts[0]]).strip()
+    room = max(token_budget - estimate_text_tokens(preamble), token_budget // 2)
+    sections = ["\n".join(lines[start:end]).strip() for start, end in zip(starts, starts[1:] + [len(lines)])]
+    pieces = _pack([piece for section in sections for piece in _split(section, room, level + 1)], room)
+    return [f"{preamble}\n\n{piece}" if preamble else piece for piece in pieces]
+
+
+def split_inventory(exploration: str, token_budget: int) -> list[str]:
+    """
+    Split an exploration into chunks of about ``token_budget`` tokens along its structure:
+    pages (``#`` headings) first, then page sections (``##`` headings), then list items.
+    Small pages are packed together; a page split into several chunks keeps its header in each.
+    """
+    exploration = (exploration or "").strip()
+    return _split(exploration, max(1, token_budget), 1) if exploration else []
@@ -0,0 +1,354 @@
+import argparse
+import asyncio
+import json
+import secrets
+import sys
+import uuid
+from datetime import datetime
+from typing import IO, Optional
+
+from playwright_llm_integration.agents import test_orchestration_agent
+from playwright_llm_integration.browser_pool import close_browser_pool
+from playwright_llm_integration.incremental import suite_store
+from playwright_llm_integration.models import StoredTestSuite, TestSuite
+from playwright_llm_integration.prioritization import select_within_budget
+from playwright_llm_integration.results_store import results_store
+from playwright_llm_integration.run_journal import RunInProgressError, new_owner, run_journal
+from playwright_llm_integration.sharding import default_shard_count, execute_sharded, run_shard_worker
+from settings import settings
+
+
+# ============================================================================
+# HEADLESS BATCH RUNNER - explore, generate and execute without Streamlit
+# ============================================================================
+
+class JsonlWriter:
+    """Writes one JSON record per line and flushes immediately, so results stream as they complete."""
+
+    def __init__(self, stream: IO[str]):
+        self.stream = stream
+
+    def write(self, record: dict):
+        record.setdefault("timestamp", datetime.now().isoformat())
+        self.stream.write(json.dumps(record, default=str) + "\n")
+        self.stream.flush()
+
+
+def read_targets(path: str, default_description: str = "") -> list[tuple[str, str]]:
+    """
+    Read ``(url, description)`` pairs, one per line. A tab after the URL starts a per-URL
+    description; blank lines and lines starting with ``#`` are skipped. ``-`` reads stdin.
+    """
+    stream = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    with stream:
+        targets = []
+        for line in stream:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            url, _, description = line.partition("\t")
+            targets.append((url.strip(), description.strip() or default_description))
+    return targets
+
+
+async def run_batch(
+    targets: list[tuple[str, str]],
+    writer: JsonlWriter,
+    concurrency: int,
+    test_concurrency: int,
+    max_tests: Optional[int] = None,
+    time_budget: Optional[float] = None,
+    execute: bool = True,
+    incremental: bool = settings.INCREMENTAL_GENERATION,
+    crawl: bool = False,
+    max_pages: int = settings.CRAWL_MAX_PAGES,
+    max_depth: int = settings.CRAWL_MAX_DEPTH,
+) -> bool:
+    """Stream every orchestrator event to ``writer``. Returns True if no stage or test failed."""
+    succeeded = True
+    try:
+        async for message in test_orchestration_agent(
+            targets,
+            explore_workers=concurrency,
+            generate_workers=concurrency,
+            execute_workers=test_concurrency,
+            max_tests=max_tests,
+            time_budget=time_budget,
+            execute=execute,
+            incremental=incremental,
+            crawl=crawl,
+            max_pages=max_pages,
+            max_depth=max_depth
+        ):
+            record = json.loads(message.response)
+            writer.write(record)
+            if record["event"] == "test_result":
+                results_store.add(record, session_id="cli")
+            if record["event"] == "error" or record.get("status", "passed") != "passed":
+                succeeded = False
+    finally:
+        results_store.flush()
+        await close_browser_pool()
+    return succeeded
+
+
+def load_test_suite(base_url: str, path: Optional[str] = None) -> TestSuite:
+    """A suite from a ``TestSuite`` / stored-suite JSON file, or else the last suite generated for ``base_url``."""
+    if path is None:
+        stored = suite_store.get(base_url)
+        if stored is None:
+            raise SystemExit(f"No generated test suite for {base_url}; run the pipeline first or pass --suite.")
+        return stored.test_suite
+    with open(path, encoding="utf-8") as suite_file:
+        data = json.load(suite_file)
+    if "test_suite" in data:
+        return StoredTestSuite.model_validate(data).test_suite
+    return TestSuite.model_validate(data)
+
+
+def parse_address(address: str) -> tuple[str, int]:
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+async def run_sharded(
+    test_suite: TestSuite,
+    base_url: str,
+    writer: JsonlWriter,
+    shards: Optional[int],
+    concurrency: int,
+    shard_size: Optional[int] = None,
+    listen: Optional[tuple[str, int]] = None,
+    run_id: Optional[str] = None,
+    token: str = settings.SHARD_COORDINATOR_TOKEN,
+) -> bool:
+    """
+    Execute the suite sharded, journaling each case's state so the run can be resumed. Given the
+    ``run_id`` of an interrupted run, only its pending and in-flight cases are executed. Streams
+    every result to ``writer``, then one ``execution_summary`` of the whole run. Returns True if all passed.
+    A run still executing in another process is refused.
+    """
+    owner = new_owner()
+    if run_id is None:
+        run_id = uuid.uuid4().hex
+        run_journal.start(
+            run_id, base_url, test_suite, list(range(len(test_suite.test_cases))), session_id="cli", owner=owner
+        )
+    try:
+        test_indices = run_journal.resume(run_id, owner)
+    except RunInProgressError:
+        raise SystemExit(f"Run {run_id} is still executing in another process.")
+    remaining = test_suite.model_copy(update={"test_cases": [test_suite.test_cases[index] for index in test_indices]})
+    started = datetime.now()
+    try:
+        with run_journal.lease(run_id, owner):
+            if test_indices:
+                async for record in execute_sharded(
+                    remaining, base_url, shards, concurrency, shard_size, listen,
+                    on_dispatch=lambda positions: run_journal.mark_running(
+                        run_id, [test_indices[position] for position in positions]
+                    ),
+                    token=token
+                ):
+                    record["test_index"] = test_indices[record["test_index"]]
+                    writer.write(record)
+                    results_store.add(record, session_id="cli", run_id=run_id)
+                    run_journal.complete(
+                        run_id, record["test_index"], record["status"], record.get("result"), record.get("error")
+                    )
+    finally:
+        results_store.flush()
+    counts = run_journal.run(run_id)["counts"]
+    writer.write({
+        "event": "execution_summary",
+        "base_url": base_url,
+        "suite_id": test_suite.suite_id,
+        "run_id": run_id,
+        "total": sum(counts.values()),
+        "passed": counts.get("passed", 0),
+        "failed": counts.get("failed", 0),
+        "resumed": len(test_indices) < sum(counts.values()),
+        "duration_s": round((datetime.now() - started).total_seconds(), 3),
+    })
+    return counts.get("passed", 0) == sum(counts.values())
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m playwright_llm_integration",
+        description="Explore, generate and execute LLM-driven browser tests without the Streamlit UI."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the full pipeline for every URL in a file.")
+    run_parser.add_argument("urls_file", help="File with one URL per line (optionally URL<TAB>description), or - for stdin.")
+    run_parser.add_argument("--description", default="", help="Application description used when a line has none.")
+    run_parser.add_argument(
+        "--concurrency", type=int, default=settings.ORCHESTRATOR_EXPLORE_WORKERS,
+        help="URLs explored (and suites generated) at the same time."
+    )
+    run_parser.add_argument(
+        "--test-concurrency", type=int, default=settings.MAX_PARALLEL_TESTS,
+        help="Test cases executed at the same time, across all URLs."
+    )
+    run_parser.add_argument("--max-tests", type=int, default=None, help="Execute at most this many test cases per URL.")
+    run_parser.add_argument(
+        "--time-budget", type=float, default=None, metavar="SECONDS",
+        help="Execute only the most valuable test cases of each URL whose estimated run times fit in this wall time."
+    )
+    run_parser.add_argument("--no-execute", action="store_true", help="Only explore and generate test suites.")
+    run_parser.add_argument(
+        "--full-regeneration", action="store_true",
+        help="Regenerate every test suite from scratch instead of updating the last one for the URL."
+    )
+    run_parser.add_argument(
+        "--crawl", action="store_true",
+        help="Explore every page linked from each URL and generate one suite from the merged site map."
+    )
+    run_parser.add_argument("--max-pages", type=int, default=settings.CRAWL_MAX_PAGES, help="Pages explored per site with --crawl.")
+    run_parser.add_argument("--max-depth", type=int, default=settings.CRAWL_MAX_DEPTH, help="Links followed from each URL with --crawl.")
+    run_parser.add_argument("--output", "-o", default="-", help="JSONL output file, or - for stdout.")
+
+    execute_parser = subparsers.add_parser(
+        "execute", help="Execute a generated test suite sharded across worker processes (and hosts)."
+    )
+    execute_parser.add_argument("base_url", help="URL the suite was generated for.")
+    execute_parser.add_argument("--suite", default=None, help="Test suite JSON file; defaults to the last suite generated for the URL.")
+    execute_parser.add_argument(
+        "--shards", type=int, default=None,
+        help="Local worker processes; defaults to EXECUTION_SHARDS, or one per CPU core."
+    )
+    execute_parser.add_argument(
+        "--concurrency", type=int, default=settings.MAX_PARALLEL_TESTS,
+        help="Test cases each worker process executes at the same time."
+    )
+    execute_parser.add_argument("--shard-size", type=int, default=None, help="Test cases handed to a worker at a time.")
+    execute_parser.add_argument(
+        "--listen", default=None, metavar="HOST:PORT",
+        help="Also accept workers from other hosts on this address (see the worker command)."
+    )
+    execute_parser.add_argument("--max-tests", type=int, default=None, help="Execute at most this many test cases.")
+    execute_parser.add_argument(
+        "--time-budget", type=float, default=None, metavar="SECONDS",
+        help="Execute only the most valuable test cases whose estimated run times fit in this wall time."
+    )
+    execute_parser.add_argument("--output", "-o", default="-", help="JSONL output file, or - for stdout.")
+
+    resume_parser = subparsers.add_parser(
+        "resume", help="Resume an interrupted execute run: only its pending and in-flight test cases run again."
+    )
+    resume_parser.add_argument("run_id", nargs="?", default=None, help="Run to resume; without it, list the unfinished runs.")
+    resume_parser.add_argument(
+        "--shards", type=int, default=None,
+        help="Local worker processes; defaults to EXECUTION_SHARDS, or one per CPU core."
+    )
+    resume_parser.add_argument(
+        "--concurrency", type=int, default=settings.MAX_PARALLEL_TESTS,
+        help="Test cases each worker process executes at the same time."
+    )
+    resume_parser.add_argument("--output", "-o", default="-", help="JSONL output file, or - for stdout.")
+
+    worker_parser = subparsers.add_parser("worker", help="Execute shards handed out by an execute --listen coordinator.")
+    worker_parser.add_argument("coordinator", metavar="HOST:PORT", help="Address of the coordinator.")
+    worker_parser.add_argument(
+        "--concurrency", type=int, default=settings.MAX_PARALLEL_TESTS,
+        help="Test cases executed at the same time."
+    )
+    worker_parser.add_argument(
+        "--token", default=settings.SHARD_COORDINATOR_TOKEN,
+        help="Token the coordinator printed, or its SHARD_COORDINATOR_TOKEN."
+    )
+    return parser
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    if args.command == "run":
+        targets = read_targets(args.urls_file, args.description)
+        output = sys.stdout if args.output == "-" else open(args.output, "a", encoding="utf-8")
+        try:
+            succeeded = asyncio.run(run_batch(
+                targets,
+                JsonlWriter(output),
+                concurrency=max(1, args.concurrency),
+                test_concurrency=max(1, args.test_concurrency),
+                max_tests=args.max_tests,
+                time_budget=args.time_budget,
+                execute=not args.no_execute,
+                incremental=settings.INCREMENTAL_GENERATION and not args.full_regeneration,
+                crawl=args.crawl,
+                max_pages=max(1, args.max_pages),
+                max_depth=max(0, args.max_depth)
+            ))
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        return 0 if succeeded else 1
+
+    if args.command == "execute":
+        test_suite = load_test_suite(args.base_url, args.suite)
+        if args.time_budget:
+            # Every shard runs ``concurrency`` cases at a time, so the budget holds that many case-seconds per second
+            capacity = args.time_budget * max(1, args.concurrency) * (args.shards or default_shard_count())
+            test_cases = test_suite.test_cases
+            durations = results_store.mean_durations(args.base_url, [test_case.test_case_id for test_case in test_cases])
+            test_suite = test_suite.model_copy(update={
+                "test_cases": select_within_budget(test_cases, capacity, durations)
+            })
+        if args.max_tests:
+            test_suite = test_suite.model_copy(update={"test_cases": test_suite.test_cases[:args.max_tests]})
+        token = settings.SHARD_COORDINATOR_TOKEN
+        if args.listen and not token:
+            # Workers on other hosts receive test data, credentials included; never serve them unauthenticated
+            token = secrets.token_urlsafe(16)
+            print(f"Start remote workers with: worker {args.listen} --token {token}", file=sys.stderr)
+        output = sys.stdout if args.output == "-" else open(args.output, "a", encoding="utf-8")
+        try:
+            succeeded = asyncio.run(run_sharded(
+                test_suite,
+                args.base_url,
+                JsonlWriter(output),
+                shards=args.shards,
+                concurrency=max(1, args.concurrency),
+                shard_size=args.shard_size,
+                listen=parse_address(args.listen) if args.listen else None,
+                token=token
+            ))
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        return 0 if succeeded else 1
+
+    if args.command == "resume":
+        output = sys.stdout if args.output == "-" else open(args.output, "a", encoding="utf-8")
+        try:
+            if args.run_id is None:
+                for run in run_journal.unfinished():
+                    JsonlWriter(output).write({
+                        "event": "unfinished_run", "run_id": run["run_id"], "base_url": run["base_url"],
+                        "suite_id": run["suite_id"], "counts": run["counts"], "updated_at": run["updated_at"],
+                    })
+                return 0
+            run = run_journal.run(args.run_id)
+            if run is None:
+                raise SystemExit(f"No run {args.run_id} in the run journal.")
+            succeeded = asyncio.run(run_sharded(
+                run["test_suite"],
+                run["base_url"],
+                JsonlWriter(output),
+                shards=args.shards,
+                concurrency=max(1, args.concurrency),
+                run_id=args.run_id
+            ))
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        return 0 if succeeded else 1
+
+    if args.command == "worker":
+        host, port = parse_address(args.coordinator)
+        asyncio.run(run_shard_worker(host, port, max(1, args.concurrency), args.token))
+        return 0
+
+    return 2
@@ -0,0 +1,203 @@
+import asyncio
+import hashlib
+import re
+from collections import Counter
+from typing import Awaitable, Callable, Optional
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+from playwright_llm_integration.models import PageInventory, SiteMap
+from playwright_llm_integration.telemetry import span
+from settings import settings
+
+
+# ============================================================================
+# URL NORMALIZATION - One key per distinct page, one template per route
+# ============================================================================
+
+# Query parameters that track the visitor rather than select content
+_TRACKING_PARAMETERS = re.compile(r"^(?:utm_\w+|gclid|fbclid|msclkid|mc_\w+|ref|_ga|sessionid|phpsessid|jsessionid)$", re.IGNORECASE)
+# Links a read-only crawl must not follow: they change server-side state on a plain GET
+_UNSAFE_PATH = re.compile(r"(?:^|[/_-])(?:log-?out|sign-?out|logoff|delete|remove|unsubscribe)(?:$|[/_.-])", re.IGNORECASE)
+_NON_PAGE_EXTENSION = re.compile(
+    r"\.(?:pdf|zip|gz|tar|rar|7z|png|jpe?g|gif|svg|webp|ico|mp[34]|avi|mov|webm|woff2?|ttf|css|js|json|xml|txt|csv|xlsx?|docx?)$",
+    re.IGNORECASE
+)
+_ID_SEGMENT = re.compile(r"^(?:\d+|[0-9a-f]{8,}|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})$", re.IGNORECASE)
+_DIGITS = re.compile(r"\d+")
+
+
+def normalize_url(url: str, base_url: Optional[str] = None) -> Optional[str]:
+    """
+    Canonical form of ``url`` (resolved against ``base_url``): lowercase scheme and host, no
+    default port, fragment, tracking parameters or trailing slash, query parameters sorted.
+    None for anything that is not an http(s) page.
+    """
+    url = urljoin(base_url, url.strip()) if base_url else url.strip()
+    parts = urlsplit(url)
+    if parts.scheme.lower() not in ("http", "https") or not parts.hostname:
+        return None
+    scheme = parts.scheme.lower()
+    host = parts.hostname.lower()
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+    path = re.sub(r"/{2,}", "/", parts.path or "/")
+    if len(path) > 1:
+        path = path.rstrip("/")
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True) if not _TRACKING_PARAMETERS.match(key)
+    ))
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+def url_template(url: str) -> str:
+    """
+    The route ``url`` is an instance of: ids, hashes and numbers in the path become
+    placeholders and query values are dropped, so ``/products/42?sort=asc`` and
+    ``/products/7?sort=desc`` share the template ``/products/{id}?sort``.
+    """
+    parts = urlsplit(url)
+    segments = [
+        "{id}" if _ID_SEGMENT.match(segment) else _DIGITS.sub("{n}", segment)
+        for segment in parts.path.split("/")
+    ]
+    query_keys = sorted({key for key, _ in parse_qsl(parts.query, keep_blank_values=True)})
+    return f"{parts.netloc}{'/'.join(segments)}" + (f"?{'&'.join(query_keys)}" if query_keys else "")
+
+
+def inventory_fingerprint(inventory: PageInventory) -> str:
+    """Hash of a page's interactive elements, so one page reached under two URLs is explored once."""
+    signatures = sorted(
+        "|".join(str(value or "") for value in (
+            element.element_type, element.text, element.element_id, element.name, element.href, element.section
+        ))
+        for element in inventory.elements
+    )
+    return hashlib.sha256("\n".join(signatures).encode("utf-8")).hexdigest()
+
+
+def page_links(inventory: PageInventory, origin: str) -> list[str]:
+    """Normalized same-site links of ``inventory``, hidden menus included, in page order."""
+    links = []
+    for element in inventory.elements:
+        if not element.href:
+            continue
+        url = normalize_url(element.href, inventory.url)
+        if url is None or urlsplit(url).netloc != origin:
+            continue
+        path = urlsplit(url).path
+        if _UNSAFE_PATH.search(path) or _NON_PAGE_EXTENSION.search(path):
+            continue
+        if url not in links:
+            links.append(url)
+    return links
+
+
+# ============================================================================
+# CRAWL FRONTIER - Breadth-first, deduplicated, budgeted, explored in parallel
+# ============================================================================
+
+async def crawl_site(
+    base_url: str,
+    explore_page: Callable[[str], Awaitable[Optional[PageInventory]]],
+    max_pages: int = settings.CRAWL_MAX_PAGES,
+    max_depth: int = settings.CRAWL_MAX_DEPTH,
+    workers: int = settings.CRAWL_WORKERS,
+    pages_per_template: int = settings.CRAWL_PAGES_PER_TEMPLATE,
+    max_rejected: Optional[int] = None,
+) -> SiteMap:
+    """
+    Explore the pages of ``base_url``'s site breadth-first with ``workers`` concurrent
+    ``explore_page`` calls, following same-site links up to ``max_depth`` clicks away and
+    stopping at ``max_pages`` distinct pages. A URL is queued once (after normalization), at
+    most ``pages_per_template`` URLs per route template are queued, and a page whose elements
+    match one already explored (the same page under another URL) is dropped. Only accepted
+    pages count against ``max_pages``; duplicates and failures have their own cap,
+    ``max_rejected`` (default ``max_pages``), after which no more URLs are explored.
+    """
+    start_url = normalize_url(base_url)
+    if start_url is None:
+        raise ValueError(f"Not an http(s) URL: {base_url}")
+    origin = urlsplit(start_url).netloc
+    max_rejected = max_pages if max_rejected is None else max_rejected
+
+    frontier: asyncio.Queue[tuple[str, int]] = asyncio.Queue()
+    queued: set[str] = set()
+    templates: Counter[str] = Counter()
+    fingerprints: set[str] = set()
+    pages: list[tuple[int, PageInventory]] = []
+    links: dict[str, list[str]] = {}
+    skipped: Counter[str] = Counter()
+    in_flight = 0
+    budget_changed = asyncio.Condition()
+
+    def enqueue(url: str, depth: int):
+        if url in queued:
+            return
+        template = url_template(url)
+        if depth > max_depth:
+            skipped["depth"] += 1
+        elif templates[template] >= pages_per_template:
+            skipped["template"] += 1
+        else:
+            queued.add(url)
+            templates[template] += 1
+            frontier.put_nowait((url, depth))
+
+    async def worker():
+        nonlocal in_flight
+        while True:
+            url, depth = await frontier.get()
+            explored = False
+            try:
+                # Only accepted pages count against max_pages: while the pages in flight could still fill
+                # the budget, wait to see whether they turn out duplicates or errors
+                async with budget_changed:
+                    await budget_changed.wait_for(lambda: len(pages) + in_flight < max_pages or len(pages) >= max_pages)
+                    if len(pages) >= max_pages:
+                        skipped["budget"] += 1
+                        continue
+                    if skipped["duplicate"] + skipped["error"] >= max_rejected:
+                        skipped["rejected_budget"] += 1
+                        continue
+                    in_flight += 1
+                    explored = True
+                inventory = await explore_page(url)
+                if inventory is None:
+                    skipped["error"] += 1
+                    continue
+
+                fingerprint = inventory_fingerprint(inventory)
+                if fingerprint in fingerprints:
+                    skipped["duplicate"] += 1
+                    continue
+                fingerprints.add(fingerprint)
+                # A redirect lands on another URL; don't explore that one again
+                final_url = normalize_url(inventory.url, url) or url
+                queued.add(final_url)
+                pages.append((depth, inventory.model_copy(update={"url": final_url})))
+                links[final_url] = page_links(inventory, origin)
+                for link in links[final_url]:
+                    enqueue(link, depth + 1)
+            except Exception:
+                skipped["error"] += 1
+            finally:
+                if explored:
+                    async with budget_changed:
+                        in_flight -= 1
+                        budget_changed.notify_all()
+                frontier.task_done()
+
+    with span("crawl", base_url=start_url, max_pages=max_pages, max_depth=max_depth) as crawl_span:
+        enqueue(start_url, 0)
+        tasks = [asyncio.create_task(worker()) for _ in range(max(1, workers))]
+        try:
+            await frontier.join()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        crawl_span.set(pages=len(pages), **{f"skipped_{reason}": count for reason, count in skipped.items()})
+
+    # Workers finish out of order; list pages by depth, then in the order they were found
+    ordered = [inventory for _, inventory in sorted(pages, key=lambda page: page[0])]
+    return SiteMap(base_url=start_url, pages=ordered, links=links, skipped=dict(skipped))
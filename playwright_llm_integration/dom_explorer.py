@@ -0,0 +1,154 @@
+import asyncio
+import json
+from typing import TYPE_CHECKING, Optional
+
+from playwright_llm_integration.models import PageElement, PageInventory
+
+if TYPE_CHECKING:
+    from browser_use import BrowserSession
+
+
+# ============================================================================
+# DOM EXPLORATION - Element inventory from a single page load, without the LLM
+# ============================================================================
+
+_INTERACTIVE_SELECTOR = ", ".join((
+    "a[href]", "button", "input:not([type=hidden])", "select", "textarea", "summary",
+    "[role=button]", "[role=link]", "[role=tab]", "[role=menuitem]", "[role=checkbox]",
+    "[role=radio]", "[role=switch]", "[role=combobox]", "[role=slider]", "[contenteditable=true]",
+))
+
+_EXTRACT_INVENTORY_JS = """(selector, limit) => {
+    const sections = "header, nav, main, aside, footer, form, dialog, [role=dialog], [role=navigation], [role=banner], [role=main], [role=contentinfo]";
+    const clean = (value) => (value || "").replace(/\\s+/g, " ").trim().slice(0, 80) || null;
+    const isVisible = (el) => {
+        const style = getComputedStyle(el);
+        if (style.display === "none" || style.visibility === "hidden" || style.opacity === "0") return false;
+        const rect = el.getBoundingClientRect();
+        return rect.width > 0 && rect.height > 0;
+    };
+    const kind = (el) => {
+        const tag = el.tagName.toLowerCase();
+        const role = el.getAttribute("role");
+        if (role) return role;
+        if (tag === "input") {
+            const type = (el.type || "text").toLowerCase();
+            if (type === "checkbox" || type === "radio") return type;
+            if (["submit", "button", "reset", "image"].includes(type)) return "button";
+            return type === "text" ? "input" : `input ${type}`;
+        }
+        if (tag === "a") return "link";
+        if (tag === "summary") return "button";
+        if (el.isContentEditable) return "textarea";
+        return tag;
+    };
+    const label = (el) => {
+        const tag = el.tagName.toLowerCase();
+        if (tag === "input" && ["submit", "button", "reset"].includes((el.type || "").toLowerCase())) return clean(el.value);
+        if (el.labels && el.labels.length) return clean(el.labels[0].innerText);
+        if (["input", "textarea", "select"].includes(tag)) return null;
+        return clean(el.innerText || el.textContent);
+    };
+    const section = (el) => {
+        const container = el.parentElement && el.parentElement.closest(sections);
+        if (!container) return "main";
+        const tag = container.tagName.toLowerCase();
+        const base = ["header", "nav", "main", "aside", "footer", "form", "dialog"].includes(tag) ? tag : container.getAttribute("role");
+        const name = container.getAttribute("aria-label") || container.id || container.getAttribute("name");
+        return name ? `${base} ${name}`.slice(0, 60) : base;
+    };
+    const state = (el) => {
+        const flags = [];
+        if (el.disabled || el.getAttribute("aria-disabled") === "true") flags.push("disabled");
+        if (el.required || el.getAttribute("aria-required") === "true") flags.push("required");
+        if (el.checked || el.getAttribute("aria-checked") === "true") flags.push("checked");
+        if (el.readOnly) flags.push("readonly");
+        if (el.getAttribute("aria-expanded") === "false" || el.hasAttribute("aria-haspopup")) flags.push("collapsed");
+        return flags.join(", ") || null;
+    };
+    const href = (el) => {
+        const value = el.getAttribute("href");
+        return value && !value.startsWith("javascript:") ? value.slice(0, 120) : null;
+    };
+
+    const elements = [];
+    for (const el of document.querySelectorAll(selector)) {
+        if (elements.length >= limit) break;
+        elements.push({
+            element_type: kind(el),
+            text: label(el),
+            element_id: clean(el.id),
+            name: clean(el.getAttribute("name")),
+            test_id: clean(el.getAttribute("data-testid") || el.getAttribute("data-test")),
+            aria_label: clean(el.getAttribute("aria-label") || el.getAttribute("alt")),
+            placeholder: clean(el.getAttribute("placeholder")),
+            href: href(el),
+            section: section(el),
+            state: state(el),
+            visible: isVisible(el),
+        });
+    }
+    const description = document.querySelector("meta[name=description]");
+    return {
+        url: location.href,
+        title: document.title,
+        description: description ? description.content : null,
+        elements: elements,
+    };
+}"""
+
+_PAGE_STATE_JS = """(selector) => JSON.stringify([
+    location.href, document.readyState, document.querySelectorAll(selector).length
+])"""
+
+
+async def _wait_for_page(page, timeout: float):
+    """Wait for the navigation to commit and load, then for client-side rendering to settle."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    previous_count = None
+    while loop.time() < deadline:
+        url, ready_state, element_count = json.loads(await page.evaluate(_PAGE_STATE_JS, _INTERACTIVE_SELECTOR))
+        if url != "about:blank" and ready_state == "complete":
+            # Two equal element counts in a row: the page stopped rendering new controls
+            if element_count == previous_count:
+                return
+            previous_count = element_count
+        await asyncio.sleep(0.25)
+
+
+async def extract_page_inventory(
+    browser_session: "BrowserSession",
+    url: str,
+    timeout: float = 15.0,
+    max_elements: int = 500,
+) -> PageInventory:
+    """Load ``url`` once and read every interactive element from the DOM."""
+    page = await browser_session.must_get_current_page()
+    await page.goto(url)
+    await _wait_for_page(page, timeout)
+    snapshot = json.loads(await page.evaluate(_EXTRACT_INVENTORY_JS, _INTERACTIVE_SELECTOR, max_elements))
+
+    elements = [PageElement(**element) for element in snapshot["elements"]]
+    visible = sum(1 for element in elements if element.visible)
+    return PageInventory(
+        url=snapshot["url"],
+        title=snapshot["title"] or None,
+        summary=snapshot["description"] or f"{snapshot['title'] or snapshot['url']}: {visible} visible interactive elements.",
+        elements=elements,
+    )
+
+
+def needs_interaction(inventory: PageInventory, min_elements: int) -> Optional[str]:
+    """
+    Why the DOM inventory is not enough and the agent should explore instead, or None.
+    Pages with almost nothing rendered, or with most controls hidden behind menus,
+    tabs or modals, need clicks to reveal their content.
+    """
+    visible = [element for element in inventory.elements if element.visible]
+    if len(visible) < min_elements:
+        return f"only {len(visible)} visible interactive elements"
+    hidden = len(inventory.elements) - len(visible)
+    if hidden > len(visible):
+        return f"{hidden} of {len(inventory.elements)} interactive elements are hidden"
+    return None
@@ -0,0 +1,194 @@
+import hashlib
+import os
+import re
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from playwright_llm_integration.models import StoredTestSuite, TestCase, TestSuite
+from settings import settings
+
+
+# ============================================================================
+# INVENTORY DIFF - Element-level comparison of two exploration outputs
+# ============================================================================
+
+_LIST_ITEM = re.compile(r"^(\s*)(?:[-*+]|\d+[.)])\s+(.*)$")
+_TABLE_ROW = re.compile(r"^\s*\|(.+)\|\s*$")
+_TABLE_SEPARATOR = re.compile(r"^[\s|:-]+$")
+_MARKDOWN = re.compile(r"[*_#>]+")
+_WHITESPACE = re.compile(r"\s+")
+
+# Names that identify an element: quoted text, and id/name/data-* attribute values
+_QUOTED = re.compile(r"[\"'`“”‘’]([^\"'`“”‘’\n]{2,80})[\"'`“”‘’]")
+_ATTRIBUTE_VALUE = re.compile(r"\b(?:id|name|data-[\w-]+|aria-label|placeholder)\s*[:=]\s*[\"'`]?([\w#.-]{2,80})", re.IGNORECASE)
+_LABEL = re.compile(r"^([^:(\[]{2,60})[:(\[]")
+
+
+def normalize_element(text: str) -> str:
+    return _WHITESPACE.sub(" ", _MARKDOWN.sub("", text)).strip().lower()
+
+
+def inventory_elements(exploration: str) -> dict[str, str]:
+    """
+    Split an exploration inventory into elements, keyed by their normalized text. A top-level
+    list item or table row starts an element; more deeply indented lines belong to it.
+    """
+    elements: list[str] = []
+    item_indent: Optional[int] = None
+    for line in (exploration or "").splitlines():
+        if not line.strip():
+            continue
+        list_item = _LIST_ITEM.match(line)
+        table_row = _TABLE_ROW.match(line)
+        if list_item:
+            indent = len(list_item.group(1))
+            if item_indent is None or indent <= item_indent:
+                item_indent = indent
+                elements.append(list_item.group(2))
+            else:
+                elements[-1] += " " + list_item.group(2)
+        elif table_row and not _TABLE_SEPARATOR.match(table_row.group(1)):
+            item_indent = None
+            elements.append(" | ".join(cell.strip() for cell in table_row.group(1).split("|")))
+        elif line.lstrip().startswith("#"):
+            # A heading closes the current element
+            item_indent = None
+        elif elements and item_indent is not None and line.startswith(" "):
+            elements[-1] += " " + line.strip()
+
+    normalized = {}
+    for element in elements:
+        key = normalize_element(element)
+        if key:
+            normalized[key] = element
+    return normalized
+
+
+def element_terms(element: str) -> set[str]:
+    """Names a test case would use to refer to the element."""
+    terms = {match.strip().lower() for match in _QUOTED.findall(element)}
+    terms |= {match.lower() for match in _ATTRIBUTE_VALUE.findall(element)}
+    if not terms:
+        label = _LABEL.match(_MARKDOWN.sub("", element).strip())
+        if label:
+            terms.add(label.group(1).strip().lower())
+    return {term for term in terms if len(term) >= 2}
+
+
+@dataclass
+class InventoryDiff:
+    added: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    unchanged: int = 0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.removed)
+
+    @property
+    def change_ratio(self) -> float:
+        """Share of the elements that were added, removed or changed."""
+        total = len(self.added) + len(self.removed) + self.unchanged
+        return (len(self.added) + len(self.removed)) / total if total else 0.0
+
+
+def diff_inventories(previous: str, current: str) -> InventoryDiff:
+    """A changed element shows up as one removed and one added element."""
+    previous_elements = inventory_elements(previous)
+    current_elements = inventory_elements(current)
+    return InventoryDiff(
+        added=[element for key, element in current_elements.items() if key not in previous_elements],
+        removed=[element for key, element in previous_elements.items() if key not in current_elements],
+        unchanged=sum(1 for key in current_elements if key in previous_elements),
+    )
+
+
+# ============================================================================
+# IMPACT & MERGE
+# ============================================================================
+
+def test_case_text(test_case: TestCase) -> str:
+    return " ".join((
+        test_case.test_title, test_case.description, test_case.preconditions,
+        test_case.test_steps, test_case.test_data, test_case.expected_result,
+    )).lower()
+
+
+def impacted_test_cases(test_suite: TestSuite, diff: InventoryDiff) -> list[TestCase]:
+    """Test cases that mention an added, removed or changed element by name."""
+    terms = set()
+    for element in diff.added + diff.removed:
+        terms |= element_terms(element)
+    patterns = [re.compile(rf"(?<!\w){re.escape(term)}(?!\w)") for term in terms]
+    return [
+        test_case for test_case in test_suite.test_cases
+        if any(pattern.search(test_case_text(test_case)) for pattern in patterns)
+    ]
+
+
+def merge_test_suites(previous: TestSuite, impacted: list[TestCase], regenerated: list[TestCase]) -> TestSuite:
+    """
+    Keep untouched cases as they were, replace impacted cases by their regenerated version
+    (same ``test_case_id``, same position) or drop them if none came back, and append new cases.
+    """
+    impacted_ids = {test_case.test_case_id for test_case in impacted}
+    regenerated_by_id = {test_case.test_case_id: test_case for test_case in regenerated}
+
+    test_cases = []
+    for test_case in previous.test_cases:
+        if test_case.test_case_id not in impacted_ids:
+            test_cases.append(test_case)
+        elif test_case.test_case_id in regenerated_by_id:
+            test_cases.append(regenerated_by_id.pop(test_case.test_case_id))
+
+    taken_ids = {test_case.test_case_id for test_case in test_cases}
+    for test_case in regenerated_by_id.values():
+        if test_case.test_case_id in taken_ids:
+            # The model reused the id of a case it was not asked to update
+            test_case = test_case.model_copy(update={"test_case_id": str(uuid.uuid4())})
+        taken_ids.add(test_case.test_case_id)
+        test_cases.append(test_case)
+
+    return previous.model_copy(update={"test_cases": test_cases})
+
+
+# ============================================================================
+# SUITE STORE - The last generated suite per URL, with the exploration it came from
+# ============================================================================
+
+class SuiteStore:
+    """Stores the most recently generated test suite for each base URL."""
+
+    def __init__(self, directory: str | Path = Path(settings.CACHE_DIR) / "suites"):
+        self.directory = Path(directory)
+
+    def get(self, base_url: str) -> Optional[StoredTestSuite]:
+        try:
+            return StoredTestSuite.model_validate_json(self._path(base_url).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def put(self, base_url: str, exploration: str, test_suite: TestSuite):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(base_url)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(StoredTestSuite(
+            base_url=base_url,
+            exploration=exploration or "",
+            test_suite=test_suite,
+            generated_at=datetime.now().isoformat()
+        ).model_dump_json(indent=2), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def delete(self, base_url: str):
+        self._path(base_url).unlink(missing_ok=True)
+
+    def _path(self, base_url: str) -> Path:
+        safe_url = hashlib.sha256(base_url.encode("utf-8")).hexdigest()[:32]
+        return self.directory / f"{safe_url}.json"
+
+
+suite_store = SuiteStore()
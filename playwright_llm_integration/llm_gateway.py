@@ -0,0 +1,421 @@
+import asyncio
+import functools
+import random
+import threading
+import time
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.rate_limiters import BaseRateLimiter
+
+from playwright_llm_integration.telemetry import record
+from settings import settings
+
+if TYPE_CHECKING:
+    from browser_use import ChatGoogle
+    from google import genai
+
+
+# ============================================================================
+# RATE LIMITER - Global requests/tokens per minute, first come first served
+# ============================================================================
+
+class RateLimiter:
+    """
+    Token buckets for requests and tokens per minute, shared by every LLM client in the
+    process (across threads and event loops). Callers are served strictly in arrival order,
+    so a burst from one agent can't starve the others. A limit of 0 disables that bucket.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+        self._next_ticket = 0
+        self._serving = 0
+        self._abandoned: set[int] = set()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._updated = now
+        if self.requests_per_minute:
+            self._requests = min(self.requests_per_minute, self._requests + elapsed * self.requests_per_minute / 60)
+        if self.tokens_per_minute:
+            self._tokens = min(self.tokens_per_minute, self._tokens + elapsed * self.tokens_per_minute / 60)
+
+    def _take_ticket(self) -> int:
+        with self._lock:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            return ticket
+
+    def _try_acquire(self, ticket: int, tokens: int) -> float:
+        """Grant ``ticket`` if it is next in line and the budget allows. Returns 0, or seconds to wait."""
+        with self._lock:
+            while self._serving in self._abandoned:
+                self._abandoned.discard(self._serving)
+                self._serving += 1
+            if ticket != self._serving:
+                return 0.05
+
+            now = time.monotonic()
+            self._refill(now)
+            wait = self._blocked_until - now
+            if self.requests_per_minute and self._requests < 1:
+                wait = max(wait, (1 - self._requests) * 60 / self.requests_per_minute)
+            # A request larger than the whole budget waits for a full bucket instead of forever
+            tokens = min(tokens, self.tokens_per_minute)
+            if self.tokens_per_minute and self._tokens < tokens:
+                wait = max(wait, (tokens - self._tokens) * 60 / self.tokens_per_minute)
+            if wait > 0:
+                return wait
+
+            if self.requests_per_minute:
+                self._requests -= 1
+            if self.tokens_per_minute:
+                self._tokens -= tokens
+            self._serving += 1
+            return 0.0
+
+    def _abandon(self, ticket: int):
+        with self._lock:
+            if ticket >= self._serving:
+                self._abandoned.add(ticket)
+
+    async def acquire(self, tokens: int = 0):
+        ticket = self._take_ticket()
+        started = time.monotonic()
+        try:
+            while (wait := self._try_acquire(ticket, tokens)) > 0:
+                await asyncio.sleep(min(wait, 1.0))
+        except BaseException:
+            self._abandon(ticket)
+            raise
+        record(llm_queue_time_s=time.monotonic() - started)
+
+    def acquire_blocking(self, tokens: int = 0, blocking: bool = True) -> bool:
+        ticket = self._take_ticket()
+        if not blocking:
+            if self._try_acquire(ticket, tokens) > 0:
+                self._abandon(ticket)
+                return False
+            return True
+        try:
+            while (wait := self._try_acquire(ticket, tokens)) > 0:
+                time.sleep(min(wait, 1.0))
+        except BaseException:
+            self._abandon(ticket)
+            raise
+        return True
+
+    def adjust(self, tokens: int):
+        """Charge (or refund, if negative) the difference between estimated and actual token usage."""
+        if not self.tokens_per_minute:
+            return
+        with self._lock:
+            self._tokens = min(self.tokens_per_minute, self._tokens - tokens)
+
+    def set_limits(self, requests_per_minute: int, tokens_per_minute: int):
+        """Change the budget, e.g. to give each of several worker processes its share."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.requests_per_minute = requests_per_minute
+            self.tokens_per_minute = tokens_per_minute
+            self._requests = min(self._requests, float(requests_per_minute))
+            self._tokens = min(self._tokens, float(tokens_per_minute))
+
+    def pause(self, seconds: float):
+        """Hold every caller for ``seconds``, e.g. after the provider answered 429."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+
+# ============================================================================
+# RETRIES
+# ============================================================================
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    for attribute in ("status_code", "code", "status"):
+        value = getattr(error, attribute, None)
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """True for rate limits, server errors, timeouts and dropped connections, including wrapped ones."""
+    import httpx
+
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if _status_code(error) in RETRYABLE_STATUS_CODES:
+            return True
+        if isinstance(error, (TimeoutError, ConnectionError, httpx.TransportError)):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if _status_code(error) == 429:
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+# ============================================================================
+# GATEWAY - Every LLM call in the process goes through here
+# ============================================================================
+
+# Gemini bills an image as a fixed number of tokens, whatever its size
+_IMAGE_TOKENS = 258
+_EXPECTED_COMPLETION_TOKENS = 500
+
+
+def estimate_tokens(messages: list) -> int:
+    """Rough prompt size (4 characters per token) plus an expected completion, for budgeting."""
+    characters = 0
+    images = 0
+    for message in messages:
+        content = message.get("content") if isinstance(message, dict) else getattr(message, "content", None)
+        if isinstance(content, str):
+            characters += len(content)
+            continue
+        for part in content or []:
+            if getattr(part, "type", None) == "image_url" or (isinstance(part, dict) and "image_url" in part):
+                images += 1
+            else:
+                characters += len(getattr(part, "text", None) or (part.get("text", "") if isinstance(part, dict) else ""))
+    return characters // 4 + images * _IMAGE_TOKENS + _EXPECTED_COMPLETION_TOKENS
+
+
+class LLMGateway:
+    """
+    Runs LLM calls under the shared ``RateLimiter`` and retries transient failures with
+    full-jitter exponential backoff. A 429 also pauses the limiter, so concurrent agents
+    back off together instead of all hitting the quota again.
+    """
+
+    def __init__(self, limiter: RateLimiter, max_retries: int, base_delay: float, max_delay: float):
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff_delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def call(
+        self,
+        request: Callable[[], Awaitable[Any]],
+        estimated_tokens: int,
+        usage_tokens: Optional[Callable[[Any], Optional[int]]] = None,
+    ):
+        """Await ``request()`` within budget, retrying transient errors. ``usage_tokens`` reads actual usage off the result."""
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire(estimated_tokens)
+            try:
+                result = await request()
+            except Exception as e:
+                if attempt >= self.max_retries or not is_transient_error(e):
+                    raise
+                delay = self.backoff_delay(attempt)
+                if is_rate_limit_error(e):
+                    self.limiter.pause(delay)
+                record(llm_retries=1)
+                await asyncio.sleep(delay)
+                continue
+
+            actual_tokens = usage_tokens(result) if usage_tokens else None
+            if actual_tokens:
+                self.limiter.adjust(actual_tokens - estimated_tokens)
+            return result
+
+
+llm_gateway = LLMGateway(
+    RateLimiter(settings.LLM_REQUESTS_PER_MINUTE, settings.LLM_TOKENS_PER_MINUTE),
+    max_retries=settings.LLM_MAX_RETRIES,
+    base_delay=settings.LLM_RETRY_BASE_DELAY,
+    max_delay=settings.LLM_RETRY_MAX_DELAY
+)
+
+@functools.cache
+def gemini_client() -> "genai.Client":
+    """One Gemini client, and so one pool of keep-alive HTTP connections, for every client below."""
+    from google import genai
+
+    return genai.Client(api_key=settings.GOOGLE_API_KEY)
+
+
+# ============================================================================
+# CLIENT ADAPTERS
+# ============================================================================
+
+class LazyClient:
+    """
+    Transparent proxy that builds its client with ``factory`` on first use, so importing a
+    module that defines LLM clients doesn't import their SDKs or open connections.
+    """
+
+    def __init__(self, factory: Callable[[], Any]):
+        self._factory = factory
+        self._resolved = None
+        self._resolve_lock = threading.Lock()
+
+    def resolve(self):
+        if self._resolved is None:
+            with self._resolve_lock:
+                if self._resolved is None:
+                    self._resolved = self._factory()
+        return self._resolved
+
+    def __getattr__(self, name):
+        return getattr(self.resolve(), name)
+
+
+def gateway_chat_google(**kwargs) -> "ChatGoogle":
+    """A ``ChatGoogle`` on the shared Gemini client; retries are left to the gateway."""
+    from browser_use import ChatGoogle
+
+    llm = ChatGoogle(api_key=settings.GOOGLE_API_KEY, max_retries=1, **kwargs)
+    llm._client = gemini_client()  # ChatGoogle caches its genai.Client here
+    return llm
+
+
+class GatewayChatModel:
+    """Transparent proxy that routes a browser-use chat model's ``ainvoke`` through the gateway."""
+
+    def __init__(self, llm, gateway: LLMGateway = llm_gateway):
+        self._llm = llm
+        self._gateway = gateway
+
+    def __getattr__(self, name):
+        return getattr(self._llm, name)
+
+    async def ainvoke(self, messages, output_format=None, **kwargs):
+        return await self._gateway.call(
+            lambda: self._llm.ainvoke(messages, output_format, **kwargs),
+            estimated_tokens=estimate_tokens(messages),
+            usage_tokens=lambda result: result.usage.total_tokens if result.usage else None
+        )
+
+
+def _instructor_usage_tokens(response) -> Optional[int]:
+    raw_response = getattr(response, "_raw_response", None)
+    usage = getattr(raw_response, "usage_metadata", None)
+    return getattr(usage, "total_token_count", None)
+
+
+class GatewayInstructorClient:
+    """
+    Routes an instructor client's ``chat.completions.create`` and ``create_iterable`` through
+    the gateway. A stream is only retried if it fails before yielding its first item.
+    """
+
+    def __init__(self, client, gateway: LLMGateway = llm_gateway):
+        self.client = client
+        self.gateway = gateway
+        self.chat = SimpleNamespace(completions=SimpleNamespace(
+            create=self.create,
+            create_iterable=self.create_iterable,
+        ))
+
+    def on(self, event: str, handler: Callable):
+        self.client.on(event, handler)
+
+    async def create(self, *, messages: list[dict], **kwargs):
+        return await self.gateway.call(
+            lambda: self.client.chat.completions.create(messages=messages, **kwargs),
+            estimated_tokens=estimate_tokens(messages),
+            usage_tokens=_instructor_usage_tokens
+        )
+
+    async def create_iterable(self, *, messages: list[dict], **kwargs):
+        stream = None
+
+        async def first_item():
+            nonlocal stream
+            stream = aiter(self.client.chat.completions.create_iterable(messages=messages, **kwargs))
+            try:
+                return await anext(stream)
+            except StopAsyncIteration:
+                return None
+
+        item = await self.gateway.call(first_item, estimated_tokens=estimate_tokens(messages))
+        if item is None:
+            return
+        yield item
+        async for item in stream:
+            yield item
+
+
+class GatewayRateLimiter(BaseRateLimiter):
+    """LangChain rate limiter backed by the gateway's shared budget."""
+
+    def __init__(self, limiter: RateLimiter, tokens_per_request: int = _EXPECTED_COMPLETION_TOKENS):
+        self.limiter = limiter
+        self.tokens_per_request = tokens_per_request
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        return self.limiter.acquire_blocking(self.tokens_per_request, blocking=blocking)
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        await self.limiter.acquire(self.tokens_per_request)
+        return True
+
+
+class TelemetryCallbackHandler(BaseCallbackHandler):
+    """LangChain callback handler that adds each chat model call's latency and token usage to the current span."""
+
+    # Called in the caller's task rather than on an executor thread, so the current span is the caller's
+    run_inline = True
+
+    def __init__(self):
+        self._started: dict[UUID, float] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs):
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs):
+        self._started[run_id] = time.perf_counter()
+
+    def _finished(self, run_id: UUID):
+        started = self._started.pop(run_id, None)
+        record(llm_calls=1, llm_time_s=time.perf_counter() - started if started else 0.0)
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs):
+        self._finished(run_id)
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    record(prompt_tokens=usage.get("input_tokens", 0), completion_tokens=usage.get("output_tokens", 0))
+
+    def on_llm_error(self, error, *, run_id: UUID, **kwargs):
+        self._finished(run_id)
+
+
+def gateway_langchain_google(**kwargs):
+    """A LangChain ``ChatGoogleGenerativeAI`` under the gateway's rate limit, reporting to telemetry."""
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    return ChatGoogleGenerativeAI(
+        google_api_key=settings.GOOGLE_API_KEY,
+        rate_limiter=GatewayRateLimiter(llm_gateway.limiter),
+        max_retries=settings.LLM_MAX_RETRIES,
+        callbacks=[TelemetryCallbackHandler()],
+        **kwargs
+    )
@@ -1,4 +1,5 @@
 from enum import StrEnum
+from typing import Any, Optional
 
 from pydantic import BaseModel, Field
 
@@ -25,7 +26,214 @@ class IntentEnum(StrEnum):
     EXPLORE_PAGE = "EXPLORE_PAGE"
 
 
+class VerdictEnum(StrEnum):
+    PASSED = "passed"
+    FAILED = "failed"
+    BLOCKED = "blocked"
+    ERROR = "error"
+
+
 class OrchestratorResponse(BaseModel):
     intent: IntentEnum = Field(..., description="Determined intent of the agent.")
     response: str = Field(..., description="Anticipated outcome.")
 
+
+class AgentRunSnapshot(BaseModel):
+    """
+    A plain, serializable stand-in for a browser-use ``AgentHistoryList`` result.
+    Exposes the same ``final_result()`` / ``structured_output`` accessors the app reads.
+    """
+    final_text: Optional[str] = Field(None, description="Final text output of the run.")
+    structured_output: Optional[Any] = Field(None, description="Structured output of the run, if any.")
+    source: Optional[str] = Field(None, description="What produced the result instead of an agent run: cache, dom or replay.")
+
+    def final_result(self) -> Optional[str]:
+        return self.final_text
+
+
+class PageElement(BaseModel):
+    element_type: str = Field(..., description="Kind of element: button, link, input, textarea, checkbox, radio, select, tab, menu, etc.")
+    text: Optional[str] = Field(None, description="Visible text or label of the element.")
+    element_id: Optional[str] = Field(None, description="id attribute.")
+    name: Optional[str] = Field(None, description="name attribute.")
+    test_id: Optional[str] = Field(None, description="data-testid / data-test attribute.")
+    aria_label: Optional[str] = Field(None, description="aria-label, or alt text for images.")
+    placeholder: Optional[str] = Field(None, description="Placeholder text of inputs.")
+    href: Optional[str] = Field(None, description="Link target.")
+    section: Optional[str] = Field(None, description="Area of the page: header, navigation, main, sidebar, footer, or a form / modal name.")
+    state: Optional[str] = Field(None, description="Notable state such as disabled, required, checked or selected; omit when enabled and optional.")
+    visible: bool = Field(True, description="False if the element is hidden until an interaction reveals it.")
+
+
+# Rendered in this order; earlier kinds are kept first when the inventory is cut to a token budget
+_ELEMENT_PRIORITY = ("input", "textarea", "select", "checkbox", "radio", "button", "submit", "tab", "menu", "link")
+
+
+class PageInventory(BaseModel):
+    url: str = Field(..., description="URL of the explored page.")
+    title: Optional[str] = Field(None, description="Page title.")
+    summary: str = Field(..., description="One or two sentences on what the page is for.")
+    elements: list[PageElement] = Field(..., description="Every interactive element on the page.")
+
+    def to_prompt(self, token_budget: int = 2000, include_hidden: bool = False) -> str:
+        """
+        Compact markdown rendering for downstream prompts: elements grouped by section,
+        duplicates collapsed, defaults and attributes that repeat the text dropped, hidden
+        elements skipped. Elements are cut by priority (form controls first, links last)
+        once the rendering would exceed ``token_budget`` (at ~4 characters per token).
+        """
+        lines: dict[tuple, str] = {}
+        counts: dict[tuple, int] = {}
+        for element in self.elements:
+            if not element.visible and not include_hidden:
+                continue
+            line = _compact_element(element)
+            if line is None:
+                continue
+            key = (element.section or "page", line)
+            counts[key] = counts.get(key, 0) + 1
+            lines.setdefault(key, line)
+
+        def priority(key: tuple) -> int:
+            line = key[1].split(" ", 1)[0]
+            return next((rank for rank, kind in enumerate(_ELEMENT_PRIORITY) if line.startswith(kind)), len(_ELEMENT_PRIORITY))
+
+        header = f"# {self.title or self.url}\nURL: {self.url}\n{self.summary}\n"
+        budget = token_budget * 4 - len(header)
+        kept = set()
+        for key in sorted(lines, key=priority):
+            cost = len(lines[key]) + 12
+            if cost > budget:
+                break
+            budget -= cost
+            kept.add(key)
+
+        rendered = [header]
+        current_section = None
+        for key in lines:
+            if key not in kept:
+                continue
+            if key[0] != current_section:
+                current_section = key[0]
+                rendered.append(f"## {current_section}")
+            rendered.append(f"- {lines[key]}" + (f" (x{counts[key]})" if counts[key] > 1 else ""))
+        if len(kept) < len(lines):
+            rendered.append(f"\n({len(lines) - len(kept)} more elements omitted)")
+        return "\n".join(rendered)
+
+
+class SiteMap(BaseModel):
+    base_url: str = Field(..., description="URL the crawl started from.")
+    pages: list[PageInventory] = Field(..., description="Inventory of every distinct page, in crawl order.")
+    links: dict[str, list[str]] = Field(default_factory=dict, description="Same-site links found on each page, by page URL.")
+    skipped: dict[str, int] = Field(default_factory=dict, description="URLs not explored, by reason: duplicate, template, depth, budget or error.")
+
+    def to_prompt(self, token_budget: int = 8000) -> str:
+        """
+        Compact markdown rendering of the whole site within ``token_budget``: the elements every
+        page shares (navigation, header, footer) once, then each page's own elements, the budget
+        split evenly across as many pages (in crawl order) as can get ``_MIN_PAGE_TOKENS`` each.
+        The pages past that get a one-line entry, and the entries past the budget are only counted.
+        """
+        shared: set[tuple] = set()
+        if len(self.pages) > 1:
+            element_keys = [{(element.section, _compact_element(element)) for element in page.elements} for page in self.pages]
+            shared = set.intersection(*element_keys)
+        pages = list(self.pages)
+        if shared:
+            layout = [element for element in self.pages[0].elements if (element.section, _compact_element(element)) in shared]
+            pages = [
+                page.model_copy(update={"elements": [
+                    element for element in page.elements if (element.section, _compact_element(element)) not in shared
+                ]})
+                for page in self.pages
+            ]
+            pages.insert(0, PageInventory(
+                url=self.base_url, title="Shared layout", summary="Elements present on every page.", elements=layout
+            ))
+
+        header = f"# Site map of {self.base_url}\n{len(self.pages)} pages explored.\n"
+        entries = [f"- {page.url}" + (f" ({page.title})" if page.title else "") + f": {page.summary}" for page in pages]
+        available = token_budget - len(header) // 4
+        # Most pages in detail such that the one-line entries of the rest still fit beside them
+        entry_tokens = [len(entry) // 4 + 1 for entry in entries]
+        detailed = len(pages)
+        while detailed and detailed * _MIN_PAGE_TOKENS + sum(entry_tokens[detailed:]) > available:
+            detailed -= 1
+
+        sections = [header]
+        if detailed:
+            page_budget = (available - sum(entry_tokens[detailed:])) // detailed
+            sections.extend(page.to_prompt(page_budget) for page in pages[:detailed])
+            available -= page_budget * detailed
+        if detailed < len(pages):
+            listed = []
+            for entry, tokens in zip(entries[detailed:], entry_tokens[detailed:]):
+                if tokens > available:
+                    break
+                listed.append(entry)
+                available -= tokens
+            unlisted = len(pages) - detailed - len(listed)
+            sections.append(
+                "# Other pages\n" + "\n".join(listed) + (f"\n({unlisted} more pages omitted)" if unlisted else "")
+            )
+        return "\n\n".join(sections)
+
+
+# Pages that can't get this many tokens of the site map budget are listed in one line instead
+_MIN_PAGE_TOKENS = 200
+
+
+def _compact_element(element: PageElement) -> Optional[str]:
+    text = (element.text or "").strip()
+    attributes = []
+    for label, value in (
+        ("id", element.element_id), ("name", element.name), ("data-test", element.test_id),
+        ("aria-label", element.aria_label), ("placeholder", element.placeholder), ("href", element.href),
+    ):
+        value = (value or "").strip()
+        # Attributes that only repeat the visible text add tokens, not information
+        if value and value.lower() != text.lower():
+            attributes.append(f"{label}={value}")
+    if not text and not attributes:
+        return None
+
+    parts = [element.element_type.strip().lower()]
+    if text:
+        parts.append(f'"{text}"')
+    parts.extend(attributes)
+    if element.state and element.state.strip().lower() not in ("enabled", "optional", "visible", "enabled, optional"):
+        parts.append(f"[{element.state.strip()}]")
+    return " ".join(parts)
+
+
+class RecordedAction(BaseModel):
+    action: str = Field(..., description="Replayable action: navigate, click, input, send_keys, select_dropdown, scroll or go_back.")
+    url: Optional[str] = Field(None, description="Target URL for navigate actions.")
+    css_selector: Optional[str] = Field(None, description="Stable CSS selector of the interacted element, if one could be derived.")
+    xpath: Optional[str] = Field(None, description="XPath of the interacted element.")
+    value: Optional[str] = Field(None, description="Typed text, pressed keys, selected option or scroll direction.")
+    test_data_span: Optional[tuple[int, int]] = Field(
+        None,
+        description="Offsets of a typed password in the test case's test_data; the password itself is not stored."
+    )
+
+
+class ActionTrace(BaseModel):
+    test_case_id: str = Field(..., description="Identifier of the recorded test case.")
+    test_case_hash: str = Field(..., description="Hash of the test case the trace was recorded for.")
+    actions: list[RecordedAction] = Field(..., description="Concrete actions of the successful run, in order.")
+    final_url: Optional[str] = Field(None, description="URL the recorded run finished on.")
+    final_report: Optional[str] = Field(None, description="Final report of the recorded run.")
+    expected_texts: list[str] = Field(
+        default_factory=list,
+        description="Text of the recorded run's final page that shows the expected result; a replay must find it too."
+    )
+    recorded_at: str = Field(..., description="ISO timestamp of the recording.")
+
+
+class StoredTestSuite(BaseModel):
+    base_url: str = Field(..., description="URL the suite was generated for.")
+    exploration: str = Field(..., description="Exploration output the suite was generated from.")
+    test_suite: TestSuite = Field(..., description="The generated test suite.")
+    generated_at: str = Field(..., description="ISO timestamp of the generation.")
@@ -0,0 +1,230 @@
+import hashlib
+import random
+import re
+from typing import Optional
+
+from playwright_llm_integration.incremental import element_terms, inventory_elements, test_case_text
+from playwright_llm_integration.models import TestCase, TestSuite
+from settings import settings
+
+
+# ============================================================================
+# NEAR-DUPLICATE DETECTION - MinHash over word shingles of steps and expected result
+# ============================================================================
+
+_WORD = re.compile(r"\w+")
+_SHINGLE_SIZE = 3
+_BANDS, _ROWS = 16, 4
+_PRIME = (1 << 61) - 1
+# Fixed seed: the same suite always yields the same signatures
+_PERMUTATIONS = [
+    (rng.randrange(1, _PRIME), rng.randrange(0, _PRIME))
+    for rng in [random.Random(20240101)] for _ in range(_BANDS * _ROWS)
+]
+
+
+def _shingles(test_case: TestCase) -> set[str]:
+    words = _WORD.findall(f"{test_case.test_steps} {test_case.expected_result}".lower())
+    if len(words) < _SHINGLE_SIZE:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[start:start + _SHINGLE_SIZE]) for start in range(len(words) - _SHINGLE_SIZE + 1)}
+
+
+def minhash_signature(shingles: set[str]) -> Optional[tuple[int, ...]]:
+    """MinHash signature of a shingle set; the share of equal positions estimates Jaccard similarity."""
+    if not shingles:
+        return None
+    hashes = [int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big") for shingle in shingles]
+    return tuple(min((a * value + b) % _PRIME for value in hashes) for a, b in _PERMUTATIONS)
+
+
+def estimated_similarity(first: tuple[int, ...], second: tuple[int, ...]) -> float:
+    return sum(1 for a, b in zip(first, second) if a == b) / len(first)
+
+
+def near_duplicate_clusters(test_cases: list[TestCase], threshold: float = settings.DEDUP_SIMILARITY) -> list[list[int]]:
+    """
+    Indices of ``test_cases`` grouped into clusters of near-duplicates (estimated Jaccard
+    similarity of their steps and expected result at least ``threshold``), in suite order.
+    Candidate pairs come from locality-sensitive hashing of the signature bands, so only
+    cases that share a band are compared.
+    """
+    signatures = [minhash_signature(_shingles(test_case)) for test_case in test_cases]
+    parent = list(range(len(test_cases)))
+
+    def root(index: int) -> int:
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    buckets: dict[tuple, list[int]] = {}
+    for index, signature in enumerate(signatures):
+        if signature is None:
+            continue
+        for band in range(_BANDS):
+            key = (band, signature[band * _ROWS:(band + 1) * _ROWS])
+            for other in buckets.setdefault(key, []):
+                first, second = sorted((root(other), root(index)))
+                if first != second and estimated_similarity(signatures[other], signature) >= threshold:
+                    parent[second] = first
+            buckets[key].append(index)
+
+    clusters: dict[int, list[int]] = {}
+    for index in range(len(test_cases)):
+        clusters.setdefault(root(index), []).append(index)
+    return list(clusters.values())
+
+
+class NearDuplicateFilter:
+    """Online variant for streamed generation: ``admit`` is False for a near-duplicate of an admitted case."""
+
+    def __init__(self, threshold: float = settings.DEDUP_SIMILARITY):
+        self.threshold = threshold
+        self._signatures: list[tuple[int, ...]] = []
+
+    def admit(self, test_case: TestCase) -> bool:
+        signature = minhash_signature(_shingles(test_case))
+        if signature is None:
+            return True
+        if any(estimated_similarity(signature, admitted) >= self.threshold for admitted in self._signatures):
+            return False
+        self._signatures.append(signature)
+        return True
+
+
+# ============================================================================
+# COVERAGE & RISK - Which inventory elements a case exercises, and how much a failure would cost
+# ============================================================================
+
+# Flows whose failure hurts most, with their weight
+_RISK_TERMS = [
+    (re.compile(r"\b(?:log ?in|sign ?in|sign ?up|register|password|auth\w*|session|permission|access)\b"), 3.0),
+    (re.compile(r"\b(?:pay\w*|checkout|card|purchase|order|cart|billing|price|refund)\b"), 3.0),
+    (re.compile(r"\b(?:xss|injection|script|security|csrf|unauthori[sz]ed)\b"), 2.0),
+    (re.compile(r"\b(?:delete|remove|cancel|update|edit|save|submit|upload)\b"), 1.5),
+    (re.compile(r"\b(?:invalid|error|required|empty|validation|boundary|limit|maximum|minimum)\b"), 1.0),
+]
+
+
+def risk_score(test_case: TestCase) -> float:
+    text = test_case_text(test_case)
+    return sum(weight for pattern, weight in _RISK_TERMS if pattern.search(text))
+
+
+def covered_elements(test_case: TestCase, element_patterns: dict[str, list[re.Pattern]]) -> set[str]:
+    """Keys of the inventory elements the case mentions by name."""
+    text = test_case_text(test_case)
+    return {key for key, patterns in element_patterns.items() if any(pattern.search(text) for pattern in patterns)}
+
+
+def _element_patterns(exploration: str) -> dict[str, list[re.Pattern]]:
+    return {
+        key: [re.compile(rf"(?<!\w){re.escape(term)}(?!\w)") for term in terms]
+        for key, element in inventory_elements(exploration).items()
+        if (terms := element_terms(element))
+    }
+
+
+# ============================================================================
+# SUITE REFINEMENT - Drop redundant cases, run the most valuable first
+# ============================================================================
+
+def deduplicate_test_cases(
+    test_cases: list[TestCase],
+    exploration: str = "",
+    threshold: float = settings.DEDUP_SIMILARITY,
+) -> list[TestCase]:
+    """
+    Keep one case per cluster of near-duplicates: the one covering the most inventory elements,
+    then the riskiest, then the first. A near-duplicate that covers elements its cluster's kept
+    case doesn't is kept too, so coverage is never lost. The kept case's comments name the
+    cases merged into it.
+    """
+    element_patterns = _element_patterns(exploration)
+    coverage = [covered_elements(test_case, element_patterns) for test_case in test_cases]
+    kept: dict[int, TestCase] = {}
+    for cluster in near_duplicate_clusters(test_cases, threshold):
+        representative = max(cluster, key=lambda index: (len(coverage[index]), risk_score(test_cases[index]), -index))
+        merged = []
+        for index in cluster:
+            if index != representative and not coverage[index] <= coverage[representative]:
+                kept[index] = test_cases[index]
+            elif index != representative:
+                merged.append(test_cases[index])
+        test_case = test_cases[representative]
+        if merged:
+            note = "Also covers near-duplicate test cases: " + "; ".join(
+                f"{duplicate.test_case_id} ({duplicate.test_title})" for duplicate in merged
+            )
+            test_case = test_case.model_copy(update={"comments": f"{test_case.comments}\n{note}".strip()})
+        kept[representative] = test_case
+    return [kept[index] for index in sorted(kept)]
+
+
+def prioritize_test_cases(test_cases: list[TestCase], exploration: str = "") -> list[TestCase]:
+    """
+    Order cases so any prefix is the most valuable selection of its size: each next case is the
+    one covering the most inventory elements not covered yet, weighted by its risk score
+    (ties keep suite order). Running the first ``max_tests`` cases then covers as much of the
+    page as that many cases can; ``select_within_budget`` picks from this order by run time.
+    """
+    element_patterns = _element_patterns(exploration)
+    remaining = {
+        index: (covered_elements(test_case, element_patterns), risk_score(test_case))
+        for index, test_case in enumerate(test_cases)
+    }
+    covered: set[str] = set()
+    ordered = []
+    while remaining:
+        best = max(remaining, key=lambda index: (
+            len(remaining[index][0] - covered) * (1 + remaining[index][1]), remaining[index][1], -index
+        ))
+        covered |= remaining.pop(best)[0]
+        ordered.append(test_cases[best])
+    return ordered
+
+
+# ============================================================================
+# TIME BUDGET - As many of the most valuable cases as fit in the time available
+# ============================================================================
+
+_NUMBERED_STEP = re.compile(r"(?:^|\s)\d+[.)]\s")
+
+
+def estimated_duration(test_case: TestCase, durations: Optional[dict[str, float]] = None) -> float:
+    """
+    Seconds a run of the case should take: its mean recorded run time from ``durations`` (by
+    ``test_case_id``), else ``TEST_STEP_SECONDS`` per step.
+    """
+    if durations and durations.get(test_case.test_case_id):
+        return durations[test_case.test_case_id]
+    lines = [line for line in test_case.test_steps.splitlines() if line.strip()]
+    steps = max(len(lines), len(_NUMBERED_STEP.findall(test_case.test_steps)), 1)
+    return steps * settings.TEST_STEP_SECONDS
+
+
+def select_within_budget(
+    test_cases: list[TestCase],
+    budget_s: float,
+    durations: Optional[dict[str, float]] = None,
+) -> list[TestCase]:
+    """
+    The cases, taken in the given (prioritized) order, whose estimated run times fit in
+    ``budget_s`` seconds together. A case too long for what is left is skipped in favour of
+    shorter ones further down the order.
+    """
+    selected = []
+    remaining = budget_s
+    for test_case in test_cases:
+        duration = estimated_duration(test_case, durations)
+        if duration <= remaining:
+            selected.append(test_case)
+            remaining -= duration
+    return selected
+
+
+def refine_test_suite(test_suite: TestSuite, exploration: str = "") -> TestSuite:
+    """Deduplicate, then prioritize, a generated suite against the exploration it was generated from."""
+    test_cases = deduplicate_test_cases(test_suite.test_cases, exploration)
+    return test_suite.model_copy(update={"test_cases": prioritize_test_cases(test_cases, exploration)})
@@ -51,18 +51,42 @@ Execute this test systematically:
 3. Use appropriate browser-use actions (click, type, navigate, etc.)
 4. Validate actual results against expected results
 5. Report any discrepancies clearly
-6. Capture screenshots for critical steps
+6. Note what the page shows at critical steps
 
 Provide a detailed execution report including:
 - Status (PASS/FAIL/BLOCKED)
 - Actual results at each step
 - Any issues encountered
-- Screenshots or evidence where relevant
+- Evidence (visible text, URLs, element states) where relevant
 
 Return the execution report in a structured format in markdown in the final output
 note: File outputs are not supported in this environment. Its only for your understanding.
 """
 
+CHUNK_GENERATION_NOTE = """
+This description is part {part} of {parts} of the application; the other parts are covered separately.
+Generate test cases only for the pages and elements in this part.
+"""
+
+PRECONDITIONS_ESTABLISHED_NOTE = """
+The preconditions of this test case are already met: the browser is on {url} with the required
+session state (for example, already logged in). Start from the current page with the first test step
+and do not repeat the precondition setup.
+"""
+
+PRECONDITION_SETUP_TASK_PROMPT = """
+You are preparing the browser for a group of test cases of the web application at {base_url}.
+
+Establish the following preconditions, and nothing more:
+---
+{preconditions}
+---
+
+Start at {base_url}. Perform only the actions needed for the preconditions to hold (for example,
+log in if they require a logged-in user). Do not execute any test steps. Finish as soon as the
+preconditions hold, reporting success, or report failure if they cannot be established.
+"""
+
 
 PAGE_EXPLORATION_PROMPT_TEMPLATE = """
 You are a meticulous web page analyst conducting a comprehensive UI exploration.
@@ -85,12 +109,53 @@ ELEMENTS TO CATALOG:
 - Other: Search bars, filters, sort options, pagination controls
 
 FOR EACH ELEMENT, EXTRACT:
-- Element Type: (e.g., button, link, input field)
-- Identifying Attributes: ID, class names, data attributes
-- Visible Text: Button labels, link text, placeholder text
-- Location Context: Section/area of page (header, sidebar, main content, footer)
-- State Information: Enabled/disabled, required/optional, visible/hidden
-- Accessibility Info: ARIA labels, roles, alt text where present
-
-provide the element inventory to the next agent in a md formatted list.
-"""
\ No newline at end of file
+- Element Type: (e.g., button, link, input, select)
+- Identifying Attributes: id, name, data-testid / data-test
+- Visible Text: Button labels, link text; placeholder text for inputs
+- Location Context: Section/area of page (header, sidebar, main content, footer, or the form / modal name)
+- State Information: disabled, required, checked; leave empty when enabled and optional
+- Visibility: mark elements hidden until an interaction reveals them as not visible
+- Accessibility Info: ARIA labels, alt text where present
+
+Return the inventory as your structured output: the page URL, its title, a one or two sentence summary
+of what the page is for, and one entry per element. Keep values short and leave absent attributes empty.
+"""
+
+INCREMENTAL_TEST_SUITE_PROMPT = """
+You are a world-class software engineer with expertise in test automation using Playwright. An existing Playwright test suite must be updated because some elements of the page under test changed.
+
+Elements that were added or changed:
+{changed_elements}
+
+Elements that were removed or changed:
+{removed_elements}
+
+Existing test cases that touch these elements:
+{impacted_test_cases}
+
+Guidelines:
+1. Return an updated version of every existing test case above that is still meaningful, keeping its test_case_id
+2. Omit existing test cases that only exercise removed elements
+3. Add new test cases, with new unique test_case_ids, for added elements not covered yet
+4. Do not return any other test case; the rest of the suite is kept unchanged
+5. Cover both positive and negative scenarios for new elements
+
+output the test cases in the following JSON format:
+{{
+  "suite_id": "<any identifier, it is ignored>",
+  "suite_name": "<any name, it is ignored>",
+  "test_cases": [
+    {{
+      "test_case_id": "<existing test_case_id, or a new uuid4 in string format>",
+      "test_title": "<title of the test case in the string format>",
+      "description": "<detailed description of what the test case covers in the string format>",
+      "preconditions": "<any setup required before execution in the string format>",
+      "test_steps": "<step-by-step execution guide in the string format>",
+      "test_data": "<input values required for the test in string format or NA if none>",
+      "expected_result": "<the anticipated outcome of the test case in the string format>",
+      "comments": "<additional notes or observations in the string format>"
+    }},
+    ...
+  ]
+}}
+"""
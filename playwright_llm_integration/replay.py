@@ -0,0 +1,323 @@
+import asyncio
+import hashlib
+import json
+import math
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+from playwright_llm_integration.models import ActionTrace, RecordedAction, TestCase
+from settings import settings
+
+if TYPE_CHECKING:
+    from browser_use import AgentHistoryList, BrowserSession
+
+
+# ============================================================================
+# RECORDING - Turn a successful agent run into a concrete action trace
+# ============================================================================
+
+# Agent actions that only read the page; they are dropped from the trace
+_READ_ONLY_ACTIONS = {
+    "done", "extract", "find_text", "find_elements", "search_page", "screenshot",
+    "dropdown_options", "wait", "read_file", "write_file", "replace_file", "save_as_pdf",
+}
+_ELEMENT_ACTIONS = {"click", "input", "select_dropdown"}
+
+# Attributes that usually identify an element across page loads, most stable first
+_STABLE_ATTRIBUTES = ("data-testid", "data-test", "data-qa", "id", "name")
+
+
+class ReplayError(Exception):
+    """A recorded action could not be replayed against the current page."""
+
+
+def test_case_hash(test_case: TestCase) -> str:
+    return hashlib.sha256(test_case.model_dump_json().encode("utf-8")).hexdigest()
+
+
+def _css_selector(node_name: str, attributes: Optional[dict]) -> Optional[str]:
+    for attribute in _STABLE_ATTRIBUTES:
+        value = (attributes or {}).get(attribute)
+        if value:
+            return f'{node_name.lower()}[{attribute}={json.dumps(value)}]'
+    return None
+
+
+# ============================================================================
+# OUTCOME CHECKS - Page text that shows the expected result, asserted on replay
+# ============================================================================
+
+_PAGE_TEXT_JS = "() => document.body ? document.body.innerText : ''"
+_QUOTED = re.compile(r'"([^"\n]{2,120})"|\u201c([^\u201d\n]{2,120})\u201d')
+_WORD = re.compile(r"[^\W_]{3,}")
+_STOP_WORDS = {
+    "the", "and", "for", "with", "that", "this", "are", "was", "you", "your", "should", "will", "be", "is",
+    "page", "user", "users", "displayed", "shown", "appears", "visible", "then", "after", "successfully",
+}
+
+
+def _normalize_text(text: str) -> str:
+    return " ".join(text.split()).casefold()
+
+
+def _significant_words(text: str) -> set[str]:
+    return set(_WORD.findall(text.casefold())) - _STOP_WORDS
+
+
+def expected_page_texts(expected_result: str, page_text: str, limit: int = 5) -> list[str]:
+    """
+    Text of a page that shows ``expected_result``: the phrases it quotes that the page
+    contains, then the page lines made up mostly of its words, best matches first.
+    """
+    page = _normalize_text(page_text)
+    texts = [
+        phrase for match in _QUOTED.finditer(expected_result)
+        if _normalize_text(phrase := match.group(1) or match.group(2)) in page
+    ]
+    expected_words = _significant_words(expected_result)
+    scored = []
+    for line in page_text.splitlines():
+        line = " ".join(line.split())
+        words = _significant_words(line)
+        if not 3 <= len(line) <= 120 or not words:
+            continue
+        overlap = len(words & expected_words)
+        if overlap and overlap >= math.ceil(len(words) / 2):
+            scored.append((overlap, line))
+    for _, line in sorted(scored, key=lambda item: -item[0]):
+        if line not in texts:
+            texts.append(line)
+    return texts[:limit]
+
+
+async def final_page_text(browser_session: "BrowserSession") -> Optional[str]:
+    """Visible text of the session's current page, or None if it can't be read."""
+    try:
+        page = await browser_session.must_get_current_page()
+        return await page.evaluate(_PAGE_TEXT_JS)
+    except Exception:
+        return None
+
+
+def record_action_trace(
+    test_case: TestCase,
+    history: "AgentHistoryList",
+    page_text: Optional[str] = None,
+) -> Optional[ActionTrace]:
+    """
+    Extract the replayable actions of a successful run, with the text of its final page
+    (``page_text``) that shows the expected result. Passwords are recorded as their position in
+    the test case's ``test_data``, never in plain text. Returns None if the run used an action
+    that can't be replayed deterministically (e.g. web search, tab switching, file upload, a
+    password not taken from ``test_data``), or if nothing on the final page shows the expected
+    result, so a replay could not verify it.
+    """
+    actions = []
+    for model_action in history.model_actions():
+        element = model_action.pop("interacted_element", None)
+        (action, params), = model_action.items()
+        params = params or {}
+
+        if action in _READ_ONLY_ACTIONS:
+            continue
+
+        if action == "navigate" and not params.get("new_tab"):
+            actions.append(RecordedAction(action="navigate", url=params["url"]))
+        elif action == "go_back":
+            actions.append(RecordedAction(action="go_back"))
+        elif action == "send_keys":
+            actions.append(RecordedAction(action="send_keys", value=params["keys"]))
+        elif action == "scroll" and params.get("index") is None:
+            actions.append(RecordedAction(action="scroll", value="down" if params.get("down", True) else "up"))
+        elif action in _ELEMENT_ACTIONS and element is not None:
+            value, test_data_span = params.get("text"), None
+            if action == "input" and (element.attributes or {}).get("type", "").lower() == "password":
+                start = test_case.test_data.find(value) if value else -1
+                if start < 0:
+                    return None
+                value, test_data_span = None, (start, start + len(value))
+            actions.append(RecordedAction(
+                action=action,
+                css_selector=_css_selector(element.node_name, element.attributes),
+                xpath=element.x_path,
+                value=value,
+                test_data_span=test_data_span,
+            ))
+        else:
+            return None
+
+    expected_texts = expected_page_texts(test_case.expected_result, page_text or "")
+    if not actions or not expected_texts:
+        return None
+
+    final_url = next((url for url in reversed(history.urls()) if url), None)
+    return ActionTrace(
+        test_case_id=test_case.test_case_id,
+        test_case_hash=test_case_hash(test_case),
+        actions=actions,
+        final_url=final_url,
+        final_report=history.final_result(),
+        expected_texts=expected_texts,
+        recorded_at=datetime.now().isoformat()
+    )
+
+
+# ============================================================================
+# REPLAY - Execute a recorded trace directly over CDP, without the LLM
+# ============================================================================
+
+_XPATH_ELEMENT_JS = """(xpath, action, value) => {
+    const node = document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    if (!node) return "missing";
+    node.scrollIntoView({block: "center"});
+    if (action === "click") {
+        node.click();
+    } else {
+        node.focus();
+        // The prototype's setter, so frameworks that track the value (e.g. React) see the change
+        Object.getOwnPropertyDescriptor(Object.getPrototypeOf(node), "value").set.call(node, value);
+        node.dispatchEvent(new Event("input", {bubbles: true}));
+        node.dispatchEvent(new Event("change", {bubbles: true}));
+    }
+    return "ok";
+}"""
+
+
+async def _find_element(page, selector: str, timeout: float):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        elements = await page.get_elements_by_css_selector(selector)
+        if elements:
+            return elements[0]
+        if asyncio.get_running_loop().time() >= deadline:
+            return None
+        await asyncio.sleep(0.1)
+
+
+async def _replay_element_action(page, action: RecordedAction, timeout: float, test_data: str = ""):
+    value = action.value
+    if action.test_data_span is not None:
+        start, end = action.test_data_span
+        value = test_data[start:end]
+        if len(value) != end - start:
+            raise ReplayError("The recorded password is no longer in the test case's test data")
+    if action.css_selector:
+        element = await _find_element(page, action.css_selector, timeout)
+        if element is not None:
+            if action.action == "click":
+                await element.click()
+            elif action.action == "input":
+                await element.fill(value or "")
+            else:
+                await element.select_option(value or "")
+            return
+
+    if not action.xpath:
+        raise ReplayError(f"No element matches {action.css_selector!r}")
+
+    xpath = action.xpath if action.xpath.startswith("/") else f"/{action.xpath}"
+    deadline = asyncio.get_running_loop().time() + timeout
+    js_action = "click" if action.action == "click" else "set_value"
+    while await page.evaluate(_XPATH_ELEMENT_JS, xpath, js_action, value or "") != "ok":
+        if asyncio.get_running_loop().time() >= deadline:
+            raise ReplayError(f"No element matches {action.css_selector or xpath!r}")
+        await asyncio.sleep(0.1)
+
+
+async def replay_action_trace(
+    trace: ActionTrace,
+    browser_session: "BrowserSession",
+    step_timeout: float = 5.0,
+    test_data: str = "",
+):
+    """
+    Replay ``trace`` on ``browser_session``, typing recorded passwords from ``test_data``. Raises
+    ReplayError on the first step that fails, or if the final page doesn't show the recorded
+    run's ``expected_texts``.
+    """
+    if not trace.expected_texts:
+        raise ReplayError("The trace records no outcome to check the replay against")
+    page = await browser_session.must_get_current_page()
+
+    for step, action in enumerate(trace.actions, 1):
+        try:
+            if action.action == "navigate":
+                await page.goto(action.url)
+            elif action.action == "go_back":
+                await page.go_back()
+            elif action.action == "send_keys":
+                await page.press(action.value)
+            elif action.action == "scroll":
+                direction = 1 if action.value == "down" else -1
+                await page.evaluate("(direction) => window.scrollBy(0, direction * window.innerHeight)", direction)
+            else:
+                await _replay_element_action(page, action, step_timeout, test_data)
+        except Exception as e:
+            raise ReplayError(f"Step {step} ({action.action}) failed: {e}") from e
+
+        if settings.REPLAY_STEP_DELAY:
+            await asyncio.sleep(settings.REPLAY_STEP_DELAY)
+
+    if trace.final_url:
+        current_url = await page.get_url()
+        if current_url.rstrip("/") != trace.final_url.rstrip("/"):
+            raise ReplayError(f"Replay finished on {current_url}, recorded run finished on {trace.final_url}")
+
+    try:
+        page_text = _normalize_text(await page.evaluate(_PAGE_TEXT_JS) or "")
+    except Exception as e:
+        raise ReplayError(f"Could not read the final page: {e}") from e
+    missing = [text for text in trace.expected_texts if _normalize_text(text) not in page_text]
+    if missing:
+        raise ReplayError(f"The final page doesn't show {missing[0]!r}")
+
+
+def replay_report(trace: ActionTrace) -> str:
+    checks = "\n".join(f"- {text}" for text in trace.expected_texts)
+    return (
+        f"Status: PASS\n\n"
+        f"Replayed {len(trace.actions)} recorded action(s) for test case {trace.test_case_id} "
+        f"without the LLM agent (recorded {trace.recorded_at}). "
+        f"The run finished on {trace.final_url}, matching the recorded run, and the page shows the "
+        f"expected result:\n{checks}"
+    )
+
+
+# ============================================================================
+# TRACE STORE - Recorded traces on disk, keyed by test_case_id
+# ============================================================================
+
+class TraceStore:
+    """Stores one action trace per ``test_case_id``; a trace is ignored once its test case changes."""
+
+    def __init__(self, directory: str | Path = Path(settings.CACHE_DIR) / "traces"):
+        self.directory = Path(directory)
+
+    def get(self, test_case: TestCase) -> Optional[ActionTrace]:
+        try:
+            trace = ActionTrace.model_validate_json(self._path(test_case.test_case_id).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if trace.test_case_hash != test_case_hash(test_case):
+            return None
+        return trace
+
+    def put(self, trace: ActionTrace):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(trace.test_case_id)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(trace.model_dump_json(indent=2), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def delete(self, test_case_id: str):
+        self._path(test_case_id).unlink(missing_ok=True)
+
+    def _path(self, test_case_id: str) -> Path:
+        safe_id = hashlib.sha256(test_case_id.encode("utf-8")).hexdigest()[:32]
+        return self.directory / f"{safe_id}.json"
+
+
+trace_store = TraceStore()
@@ -0,0 +1,212 @@
+import io
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Iterator, Optional
+
+from settings import settings
+
+
+# ============================================================================
+# RESULTS STORE - Indexed, persistent history of test executions
+# ============================================================================
+
+_COLUMNS = (
+    "session_id", "run_id", "suite_id", "base_url", "test_case_id", "test_index",
+    "test_title", "status", "result", "error", "duration_s", "timestamp",
+)
+_FILTERS = ("session_id", "run_id", "suite_id", "test_case_id", "status")
+
+
+class ResultsStore:
+    """
+    SQLite store for test results. ``add`` buffers records and writes them in one
+    transaction per ``batch_size``; every read flushes first. Queries are filtered by any
+    of ``session_id``, ``run_id``, ``suite_id``, ``test_case_id``, ``status`` and a
+    ``since``/``until`` timestamp range, and paginated newest first by row id.
+    """
+
+    def __init__(
+        self,
+        path: str | Path = Path(settings.CACHE_DIR) / "results.sqlite3",
+        batch_size: int = settings.RESULTS_STORE_BATCH_SIZE,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self._pending: list[tuple] = []
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS test_results ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT, run_id TEXT, suite_id TEXT, base_url TEXT, "
+            "test_case_id TEXT, test_index INTEGER, test_title TEXT, status TEXT NOT NULL, result TEXT, error TEXT, "
+            "duration_s REAL, timestamp TEXT NOT NULL)"
+        )
+        for column in ("suite_id", "test_case_id", "status", "timestamp", "session_id"):
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS test_results_{column} ON test_results ({column})")
+
+
+    def add(self, record: dict, **fields):
+        """Buffer one result; ``fields`` (e.g. ``session_id``, ``run_id``) override the record's own."""
+        record = {**record, **fields}
+        record.setdefault("timestamp", datetime.now().isoformat())
+        row = tuple(
+            str(record[column]) if column in ("result", "error") and record.get(column) is not None
+            else record.get(column)
+            for column in _COLUMNS
+        )
+        with self._lock:
+            self._pending.append(row)
+            if len(self._pending) >= self.batch_size:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.executemany(
+                f"INSERT INTO test_results ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})",
+                self._pending
+            )
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._pending.clear()
+
+    def clear(self, **filters):
+        where, params = self._where(filters)
+        with self._lock:
+            self._flush_locked()
+            self._conn.execute(f"DELETE FROM test_results{where}", params)
+
+
+    @staticmethod
+    def _where(filters: dict, before_id: Optional[int] = None) -> tuple[str, list]:
+        clauses, params = [], []
+        for column in _FILTERS:
+            if filters.get(column) is not None:
+                clauses.append(f"{column} = ?")
+                params.append(filters[column])
+        if filters.get("since") is not None:
+            clauses.append("timestamp >= ?")
+            params.append(filters["since"])
+        if filters.get("until") is not None:
+            clauses.append("timestamp < ?")
+            params.append(filters["until"])
+        if before_id is not None:
+            clauses.append("id < ?")
+            params.append(before_id)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def _query(self, sql: str, params: list) -> list[dict]:
+        with self._lock:
+            self._flush_locked()
+            return [dict(row) for row in self._conn.execute(sql, params).fetchall()]
+
+    def page(self, limit: int = 50, offset: int = 0, before_id: Optional[int] = None, **filters) -> list[dict]:
+        """One page of results, newest first. Pass the last row's id as ``before_id`` to page without OFFSET scans."""
+        where, params = self._where(filters, before_id)
+        return self._query(f"SELECT * FROM test_results{where} ORDER BY id DESC LIMIT ? OFFSET ?", params + [limit, offset])
+
+    def count(self, **filters) -> int:
+        where, params = self._where(filters)
+        return self._query(f"SELECT COUNT(*) AS total FROM test_results{where}", params)[0]["total"]
+
+    def status_counts(self, **filters) -> dict[str, int]:
+        where, params = self._where(filters)
+        rows = self._query(f"SELECT status, COUNT(*) AS total FROM test_results{where} GROUP BY status", params)
+        return {row["status"]: row["total"] for row in rows}
+
+    def mean_durations(self, base_url: str, test_case_ids: list[str]) -> dict[str, float]:
+        """Mean recorded run time of each of ``test_case_ids`` on ``base_url``, for the ones that have run."""
+        if not test_case_ids:
+            return {}
+        rows = self._query(
+            f"SELECT test_case_id, AVG(duration_s) AS duration_s FROM test_results "
+            f"WHERE base_url = ? AND test_case_id IN ({', '.join('?' * len(test_case_ids))}) AND duration_s IS NOT NULL "
+            f"GROUP BY test_case_id",
+            [base_url, *test_case_ids]
+        )
+        return {row["test_case_id"]: row["duration_s"] for row in rows}
+
+    def suites(self, **filters) -> list[str]:
+        where, params = self._where(filters)
+        where += (" AND" if where else " WHERE") + " suite_id IS NOT NULL"
+        rows = self._query(f"SELECT DISTINCT suite_id FROM test_results{where} ORDER BY suite_id", params)
+        return [row["suite_id"] for row in rows]
+
+    def iter_results(self, chunk_size: int = 1000, **filters) -> Iterator[dict]:
+        """Every matching result, oldest first, fetched ``chunk_size`` rows at a time."""
+        after_id = 0
+        while True:
+            where, params = self._where(filters)
+            where += (" AND" if where else " WHERE") + " id > ?"
+            rows = self._query(
+                f"SELECT * FROM test_results{where} ORDER BY id LIMIT ?", params + [after_id, chunk_size]
+            )
+            yield from rows
+            if len(rows) < chunk_size:
+                return
+            after_id = rows[-1]["id"]
+
+
+    def write_json(self, stream: IO[str], **filters):
+        """Write ``{"test_results": [...]}`` to ``stream`` one record at a time."""
+        stream.write('{"test_results": [')
+        for position, row in enumerate(self.iter_results(**filters)):
+            stream.write(("," if position else "") + "\n    " + json.dumps(row, default=str))
+        stream.write("\n]}\n")
+
+    def write_text_report(self, stream: IO[str], **filters):
+        counts = self.status_counts(**filters)
+        total = sum(counts.values())
+        passed = counts.get("passed", 0)
+        stream.write(
+            f"Test Execution Report\n"
+            f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+            f"Summary:\n--------\n"
+            f"Total Tests: {total}\n"
+            f"Passed: {passed}\n"
+            f"Failed: {total - passed}\n"
+            f"Success Rate: {(passed / total * 100 if total else 0.0):.1f}%\n\n"
+            f"Detailed Results:\n----------------\n"
+        )
+        for row in self.iter_results(**filters):
+            stream.write(
+                f"\n{row['test_title']}\n"
+                f"Status: {row['status'].upper()}\n"
+                f"Timestamp: {row['timestamp']}\n"
+                + "-" * 50 + "\n"
+            )
+
+    def export(self, export_format: str, **filters) -> io.BytesIO:
+        """
+        Export (``json`` or ``txt``) to an in-memory buffer, returned rewound. Streamlit's
+        ``download_button`` reads its data fully into memory anyway and only accepts bytes
+        and a few stream types, ``BytesIO`` among them.
+        """
+        buffer = io.BytesIO()
+        stream = io.TextIOWrapper(buffer, encoding="utf-8")
+        if export_format == "json":
+            self.write_json(stream, **filters)
+        else:
+            self.write_text_report(stream, **filters)
+        stream.flush()
+        stream.detach()
+        buffer.seek(0)
+        return buffer
+
+
+results_store = ResultsStore()
@@ -0,0 +1,242 @@
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Optional
+
+from playwright_llm_integration.models import TestSuite
+from settings import settings
+
+
+# ============================================================================
+# RUN JOURNAL - Durable per-case state of suite executions, for resuming them
+# ============================================================================
+
+PENDING, RUNNING, PASSED, FAILED = "pending", "running", "passed", "failed"
+
+
+class RunInProgressError(Exception):
+    """The run is still executing: another session or process holds its lease."""
+
+
+def new_owner() -> str:
+    """A lease owner id, unique per executing session even within one process."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class RunJournal:
+    """
+    SQLite journal of suite executions. A run records its suite and the cases selected for
+    it; every case moves from ``pending`` to ``running`` to ``passed`` or ``failed``, and each
+    transition is committed immediately, so a crashed or restarted process loses at most the
+    cases that were in flight. ``resume`` re-queues those along with the pending ones.
+
+    Whoever executes a run holds its lease and renews it (see ``lease``); a run counts as
+    interrupted, and can be resumed, only once its lease has lapsed for ``lease_timeout``.
+    """
+
+    def __init__(
+        self,
+        path: str | Path = Path(settings.CACHE_DIR) / "runs.sqlite3",
+        lease_timeout: float = settings.RUN_LEASE_TIMEOUT,
+    ):
+        self.path = Path(path)
+        self.lease_timeout = lease_timeout
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            "run_id TEXT PRIMARY KEY, base_url TEXT NOT NULL, suite_id TEXT, test_suite TEXT NOT NULL, "
+            "session_id TEXT, finished INTEGER NOT NULL DEFAULT 0, created_at TEXT NOT NULL, updated_at TEXT NOT NULL, "
+            "owner TEXT, lease_until REAL)"
+        )
+        # Journals written before runs were leased
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(runs)")}
+        for column, column_type in (("owner", "TEXT"), ("lease_until", "REAL")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE runs ADD COLUMN {column} {column_type}")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS run_cases ("
+            "run_id TEXT NOT NULL, test_index INTEGER NOT NULL, test_case_id TEXT, state TEXT NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, result TEXT, error TEXT, updated_at TEXT NOT NULL, "
+            "PRIMARY KEY (run_id, test_index))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS runs_finished ON runs (finished, updated_at)")
+
+    def _execute(self, sql: str, params: tuple | list = ()) -> list[dict]:
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params).fetchall()]
+
+    def _touch(self, run_id: str, now: str):
+        self._conn.execute("UPDATE runs SET updated_at = ? WHERE run_id = ?", (now, run_id))
+
+    def start(
+        self,
+        run_id: str,
+        base_url: str,
+        test_suite: TestSuite,
+        test_indices: list[int],
+        session_id: Optional[str] = None,
+        owner: Optional[str] = None,
+    ):
+        """Record a new run of ``test_indices`` (positions in ``test_suite``), all pending, leased to ``owner``."""
+        now = datetime.now().isoformat()
+        lease_until = time.time() + self.lease_timeout if owner else None
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(
+                    "INSERT INTO runs (run_id, base_url, suite_id, test_suite, session_id, created_at, updated_at, "
+                    "owner, lease_until) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (run_id, base_url, test_suite.suite_id, test_suite.model_dump_json(), session_id, now, now,
+                     owner, lease_until)
+                )
+                self._conn.executemany(
+                    "INSERT INTO run_cases (run_id, test_index, test_case_id, state, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    [(run_id, index, test_suite.test_cases[index].test_case_id, PENDING, now) for index in test_indices]
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _acquire(self, run_id: str, owner: str) -> bool:
+        """Take or renew the run's lease for ``owner``; False while someone else's lease is live."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE runs SET owner = ?, lease_until = ? WHERE run_id = ? "
+                "AND (owner IS NULL OR owner = ? OR lease_until IS NULL OR lease_until < ?)",
+                (owner, now + self.lease_timeout, run_id, owner, now)
+            )
+            return cursor.rowcount > 0
+
+    @contextmanager
+    def lease(self, run_id: str, owner: Optional[str] = None) -> Iterator[str]:
+        """
+        Hold the run's lease while executing it, renewing it in the background, and release it
+        on exit. Raises RunInProgressError if another owner's lease is live.
+        """
+        owner = owner or new_owner()
+        if not self._acquire(run_id, owner):
+            raise RunInProgressError(run_id)
+        stopped = threading.Event()
+
+        def renew():
+            while not stopped.wait(self.lease_timeout / 3):
+                self._acquire(run_id, owner)
+
+        renewer = threading.Thread(target=renew, name=f"run-lease-{run_id[:8]}", daemon=True)
+        renewer.start()
+        try:
+            yield owner
+        finally:
+            stopped.set()
+            with self._lock:
+                self._conn.execute(
+                    "UPDATE runs SET owner = NULL, lease_until = NULL WHERE run_id = ? AND owner = ?", (run_id, owner)
+                )
+
+    def mark_running(self, run_id: str, test_indices: int | list[int]):
+        now = datetime.now().isoformat()
+        indices = [test_indices] if isinstance(test_indices, int) else test_indices
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE run_cases SET state = ?, attempts = attempts + 1, updated_at = ? "
+                "WHERE run_id = ? AND test_index = ? AND state IN (?, ?)",
+                [(RUNNING, now, run_id, index, PENDING, RUNNING) for index in indices]
+            )
+            self._touch(run_id, now)
+
+    def complete(self, run_id: str, test_index: int, status: str, result: Optional[str] = None, error: Optional[str] = None):
+        """Record a case's outcome; ``status`` is ``passed`` or ``failed``."""
+        now = datetime.now().isoformat()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE run_cases SET state = ?, result = ?, error = ?, updated_at = ? WHERE run_id = ? AND test_index = ?",
+                (PASSED if status == PASSED else FAILED, result, error, now, run_id, test_index)
+            )
+            self._touch(run_id, now)
+            remaining = self._conn.execute(
+                "SELECT COUNT(*) FROM run_cases WHERE run_id = ? AND state IN (?, ?)", (run_id, PENDING, RUNNING)
+            ).fetchone()[0]
+            if not remaining:
+                self._conn.execute("UPDATE runs SET finished = 1 WHERE run_id = ?", (run_id,))
+
+    def run(self, run_id: str) -> Optional[dict]:
+        """The run's row, with its ``test_suite`` parsed and a ``counts`` of cases per state."""
+        rows = self._execute("SELECT * FROM runs WHERE run_id = ?", (run_id,))
+        if not rows:
+            return None
+        run = rows[0]
+        run["test_suite"] = TestSuite.model_validate_json(run["test_suite"])
+        run["counts"] = {
+            row["state"]: row["total"] for row in self._execute(
+                "SELECT state, COUNT(*) AS total FROM run_cases WHERE run_id = ? GROUP BY state", (run_id,)
+            )
+        }
+        return run
+
+    def cases(self, run_id: str, *states: str) -> list[dict]:
+        """The run's cases in suite order, optionally only those in ``states``."""
+        sql = "SELECT * FROM run_cases WHERE run_id = ?"
+        params: list = [run_id]
+        if states:
+            sql += f" AND state IN ({', '.join('?' * len(states))})"
+            params.extend(states)
+        return self._execute(sql + " ORDER BY test_index", params)
+
+    def unfinished(self, limit: int = 10, **filters) -> list[dict]:
+        """
+        Most recently active interrupted runs: runs that still have pending or in-flight cases
+        and whose lease has lapsed, optionally filtered, e.g. ``base_url=...``.
+        """
+        clauses, params = ["finished = 0", "(lease_until IS NULL OR lease_until < ?)"], [time.time()]
+        for column in ("base_url", "session_id", "suite_id"):
+            if filters.get(column) is not None:
+                clauses.append(f"{column} = ?")
+                params.append(filters[column])
+        rows = self._execute(
+            f"SELECT run_id FROM runs WHERE {' AND '.join(clauses)} ORDER BY updated_at DESC LIMIT ?", params + [limit]
+        )
+        return [self.run(row["run_id"]) for row in rows]
+
+    def resume(self, run_id: str, owner: str) -> list[int]:
+        """
+        Take the run's lease for ``owner``, re-queue its in-flight cases (their process died
+        mid-case) as pending, and return every case still to execute. Passed and failed cases
+        keep their results and are skipped. Raises RunInProgressError if the run is still executing.
+        """
+        if not self._acquire(run_id, owner):
+            raise RunInProgressError(run_id)
+        now = datetime.now().isoformat()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE run_cases SET state = ?, updated_at = ? WHERE run_id = ? AND state = ?",
+                (PENDING, now, run_id, RUNNING)
+            )
+            self._touch(run_id, now)
+        return [row["test_index"] for row in self.cases(run_id, PENDING)]
+
+    def delete(self, run_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM run_cases WHERE run_id = ?", (run_id,))
+            self._conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+
+
+run_journal = RunJournal()
+
+
+async def journaled(coro, run_id: str, test_index: int):
+    """Await ``coro``, a case of ``run_id``, marking it running in the journal once it starts."""
+    run_journal.mark_running(run_id, test_index)
+    return await coro
@@ -0,0 +1,324 @@
+import asyncio
+import hmac
+import json
+import multiprocessing
+import os
+import secrets
+import socket
+import time
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+from playwright_llm_integration.agents import execute_test_case, execution_record
+from playwright_llm_integration.batching import PreconditionGroup, group_by_precondition, group_starting_state
+from playwright_llm_integration.browser_pool import close_browser_pool
+from playwright_llm_integration.llm_gateway import llm_gateway
+from playwright_llm_integration.models import TestCase, TestSuite
+from settings import settings
+
+
+# ============================================================================
+# SHARD EXECUTION - One shard of a suite on this process's loop and browser pool
+# ============================================================================
+
+# Shard messages carry whole test cases; the default 64 KiB line limit is too small
+_STREAM_LIMIT = 16 * 1024 * 1024
+
+
+async def execute_shard(
+    base_url: str,
+    suite_id: str,
+    test_cases: list[tuple[int, TestCase]],
+    concurrency: int,
+    emit: Callable[[dict], Awaitable[None]],
+    worker: Optional[str] = None,
+):
+    """
+    Execute ``(index, test_case)`` pairs, at most ``concurrency`` at a time, passing each record to
+    ``emit``. With ``BATCH_BY_PRECONDITION``, cases sharing preconditions start from one setup.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(index: int, test_case: TestCase, starting_state: Optional[dict] = None):
+        async with semaphore:
+            started = time.perf_counter()
+            execution_result = await execute_test_case(test_case, starting_state=starting_state)
+            record = execution_record(base_url, suite_id, test_case, execution_result, time.perf_counter() - started)
+            await emit({**record, "test_index": index, "worker": worker})
+
+    async def run_group(group: PreconditionGroup):
+        starting_state = await group_starting_state(base_url, group, semaphore)
+        await asyncio.gather(*(run(index, test_case, starting_state) for index, test_case in group.test_cases))
+
+    if not settings.BATCH_BY_PRECONDITION:
+        await asyncio.gather(*(run(index, test_case) for index, test_case in test_cases))
+        return
+    await asyncio.gather(*(run_group(group) for group in group_by_precondition(test_cases)))
+
+
+async def _read_message(reader: asyncio.StreamReader) -> Optional[dict]:
+    line = await reader.readline()
+    return json.loads(line) if line else None
+
+
+async def _write_message(writer: asyncio.StreamWriter, message: dict):
+    writer.write(json.dumps(message, default=str).encode("utf-8") + b"\n")
+    await writer.drain()
+
+
+async def run_shard_worker(host: str, port: int, concurrency: int, token: str = settings.SHARD_COORDINATOR_TOKEN) -> int:
+    """
+    Connect to a ``ShardCoordinator`` and execute the shards it hands out until it says stop.
+    Returns the number of test cases executed.
+    """
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    reader, writer = await asyncio.open_connection(host, port, limit=_STREAM_LIMIT)
+    write_lock = asyncio.Lock()
+    executed = 0
+
+    async def emit(record: dict):
+        nonlocal executed
+        executed += 1
+        async with write_lock:
+            await _write_message(writer, {"type": "result", "record": record})
+
+    try:
+        await _write_message(writer, {"type": "hello", "worker": worker, "token": token})
+        while (message := await _read_message(reader)) is not None and message["type"] == "shard":
+            test_cases = [(index, TestCase.model_validate(test_case)) for index, test_case in message["test_cases"]]
+            await execute_shard(message["base_url"], message["suite_id"], test_cases, concurrency, emit, worker)
+            async with write_lock:
+                await _write_message(writer, {"type": "shard_done"})
+    finally:
+        writer.close()
+        await close_browser_pool()
+    return executed
+
+
+def _shard_worker_process(host: str, port: int, concurrency: int, token: str, rate_share: float):
+    """Entry point of a local worker process; it gets ``rate_share`` of the LLM budget."""
+    llm_gateway.limiter.set_limits(
+        int(settings.LLM_REQUESTS_PER_MINUTE * rate_share),
+        int(settings.LLM_TOKENS_PER_MINUTE * rate_share)
+    )
+    asyncio.run(run_shard_worker(host, port, concurrency, token))
+
+
+# ============================================================================
+# SHARD COORDINATOR - Hands a suite out to worker processes over a socket
+# ============================================================================
+
+class ShardCoordinator:
+    """
+    Serves a test suite to shard workers as newline-delimited JSON over TCP. Workers pull
+    one shard of ``shard_size`` cases at a time, so faster workers and hosts take more shards.
+    If a worker disconnects mid-shard, its unfinished cases go back in the queue for another
+    worker, up to ``max_attempts`` times each. Records arrive on ``results``, then ``None``;
+    ``on_dispatch`` is called with the indices of each shard as it is handed out. Workers must
+    present ``token``; without one, a random token is generated for this coordinator only.
+    """
+
+    def __init__(
+        self,
+        test_suite: TestSuite,
+        base_url: str,
+        shard_size: int,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        token: str = settings.SHARD_COORDINATOR_TOKEN,
+        max_attempts: int = 2,
+        on_dispatch: Optional[Callable[[list[int]], None]] = None,
+    ):
+        self.base_url = base_url
+        self.suite_id = test_suite.suite_id
+        self.host = host
+        self.port = port
+        self.token = token or secrets.token_urlsafe(16)
+        self.max_attempts = max_attempts
+        self.on_dispatch = on_dispatch
+        self.results: asyncio.Queue[Optional[dict]] = asyncio.Queue()
+        self.workers = 0
+        self._remaining: dict[int, TestCase] = dict(enumerate(test_suite.test_cases))
+        self._attempts: dict[int, int] = {}
+        # Cases sharing preconditions go out together, so a worker sets each one up once
+        indexed = [pair for group in group_by_precondition(enumerate(test_suite.test_cases)) for pair in group.test_cases]
+        shard_size = max(1, shard_size)
+        self._pending = deque(indexed[start:start + shard_size] for start in range(0, len(indexed), shard_size))
+        self._changed = asyncio.Condition()
+        self._server: Optional[asyncio.Server] = None
+        if not self._remaining:
+            self.results.put_nowait(None)
+
+    @property
+    def remaining(self) -> int:
+        return len(self._remaining)
+
+    async def start(self) -> tuple[str, int]:
+        """Start listening; returns the bound address (useful with ``port=0``)."""
+        self._server = await asyncio.start_server(self._serve, self.host, self.port, limit=_STREAM_LIMIT)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+        async with self._changed:
+            self._pending.clear()
+            self._changed.notify_all()
+
+    async def fail_remaining(self, reason: str):
+        """Report every case not executed yet as failed, e.g. when no worker is left to run it."""
+        for index, test_case in list(self._remaining.items()):
+            self._complete(self._failed_record(index, test_case, reason))
+        await self.close()
+
+    def _failed_record(self, index: int, test_case: TestCase, reason: str) -> dict:
+        record = execution_record(self.base_url, self.suite_id, test_case, f"Error during test execution: {reason}", 0.0)
+        return {**record, "test_index": index, "worker": None}
+
+    def _complete(self, record: dict):
+        # A requeued case may be reported twice; the first report wins
+        if self._remaining.pop(record["test_index"], None) is None:
+            return
+        self.results.put_nowait(record)
+        if not self._remaining:
+            self.results.put_nowait(None)
+
+    async def _next_shard(self) -> Optional[list[tuple[int, TestCase]]]:
+        """The next shard, waiting while others are in flight (they may come back). None once all are done."""
+        async with self._changed:
+            while True:
+                while self._pending:
+                    shard = [(index, test_case) for index, test_case in self._pending.popleft() if index in self._remaining]
+                    if shard:
+                        return shard
+                if not self._remaining or self._server is None or not self._server.is_serving():
+                    return None
+                await self._changed.wait()
+
+    async def _requeue(self, shard: list[tuple[int, TestCase]], worker: str):
+        retry = []
+        for index, test_case in shard:
+            if index not in self._remaining:
+                continue
+            self._attempts[index] = self._attempts.get(index, 0) + 1
+            if self._attempts[index] >= self.max_attempts:
+                self._complete(self._failed_record(index, test_case, f"shard worker {worker} disconnected"))
+            else:
+                retry.append((index, test_case))
+        async with self._changed:
+            if retry:
+                self._pending.append(retry)
+            self._changed.notify_all()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        worker = "unknown"
+        shard = None
+        registered = False
+        try:
+            hello = await _read_message(reader)
+            if not hello or hello.get("type") != "hello" or not hmac.compare_digest(str(hello.get("token", "")), self.token):
+                return
+            worker = hello.get("worker") or worker
+            self.workers += 1
+            registered = True
+            while (shard := await self._next_shard()) is not None:
+                if self.on_dispatch is not None:
+                    self.on_dispatch([index for index, _ in shard])
+                await _write_message(writer, {
+                    "type": "shard", "base_url": self.base_url, "suite_id": self.suite_id,
+                    "test_cases": [(index, test_case.model_dump()) for index, test_case in shard],
+                })
+                dispatched = {index for index, _ in shard}
+                while (message := await _read_message(reader)) is not None and message["type"] == "result":
+                    # A worker may only report the cases of the shard it was handed
+                    if message["record"].get("test_index") in dispatched:
+                        self._complete(message["record"])
+                if message is None:
+                    return
+                shard = None
+                async with self._changed:
+                    self._changed.notify_all()
+            await _write_message(writer, {"type": "stop"})
+        except (ConnectionError, ValueError, KeyError):
+            pass
+        finally:
+            if registered:
+                self.workers -= 1
+            if shard is not None:
+                await self._requeue(shard, worker)
+            writer.close()
+
+
+# ============================================================================
+# SHARDED EXECUTOR - A suite across worker processes, merged into one stream
+# ============================================================================
+
+def default_shard_count() -> int:
+    return settings.EXECUTION_SHARDS or os.cpu_count() or 1
+
+
+async def execute_sharded(
+    test_suite: TestSuite,
+    base_url: str,
+    shards: Optional[int] = None,
+    concurrency: int = settings.MAX_PARALLEL_TESTS,
+    shard_size: Optional[int] = None,
+    listen: Optional[tuple[str, int]] = None,
+    on_dispatch: Optional[Callable[[list[int]], None]] = None,
+    token: str = settings.SHARD_COORDINATOR_TOKEN,
+) -> AsyncIterator[dict]:
+    """
+    Execute a suite on ``shards`` worker processes (one per CPU core by default), each with its
+    own event loop and browser pool running ``concurrency`` tests at a time and an equal share of
+    the LLM budget. Yields one ``test_result`` record per test case, in completion order.
+
+    With ``listen=(host, port)`` the coordinator also accepts ``run_shard_worker`` processes on
+    other hosts (``python -m playwright_llm_integration worker host:port --token TOKEN``), and keeps
+    waiting for them even when ``shards`` is 0 or every local worker has exited.
+    """
+    shards = default_shard_count() if shards is None else shards
+    if listen is None:
+        shards = max(1, min(shards, len(test_suite.test_cases)))
+    host, port = listen or ("127.0.0.1", 0)
+    coordinator = ShardCoordinator(
+        test_suite, base_url,
+        # Small shards balance the load; at least a full batch keeps each worker's pool busy
+        shard_size=shard_size or max(concurrency, len(test_suite.test_cases) // (max(1, shards) * 4)),
+        host=host,
+        port=port,
+        token=token,
+        on_dispatch=on_dispatch
+    )
+    _, port = await coordinator.start()
+
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(
+            target=_shard_worker_process,
+            args=("127.0.0.1", port, concurrency, coordinator.token, 1 / shards),
+            name=f"shard-{shard_id}",
+            daemon=True
+        )
+        for shard_id in range(shards)
+    ]
+    for process in processes:
+        process.start()
+
+    try:
+        while True:
+            try:
+                record = await asyncio.wait_for(coordinator.results.get(), timeout=1.0)
+            except TimeoutError:
+                if listen is None and coordinator.workers == 0 and not any(process.is_alive() for process in processes):
+                    exit_codes = ", ".join(str(process.exitcode) for process in processes)
+                    await coordinator.fail_remaining(f"every shard worker exited (exit codes {exit_codes})")
+                continue
+            if record is None:
+                return
+            yield record
+    finally:
+        await coordinator.close()
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
@@ -0,0 +1,262 @@
+import contextvars
+import json
+import secrets
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from settings import settings
+
+
+# ============================================================================
+# SPANS - Wall time, token usage and step counts per pipeline stage
+# ============================================================================
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str = field(default_factory=lambda: secrets.token_hex(8))
+    parent_id: Optional[str] = None
+    start_time: float = field(default_factory=time.time)
+    end_time: Optional[float] = None
+    status: str = "OK"
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration_s(self) -> float:
+        return (self.end_time or time.time()) - self.start_time
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def add(self, **counters):
+        """Increment numeric attributes, e.g. ``span.add(prompt_tokens=120, llm_calls=1)``."""
+        for key, amount in counters.items():
+            self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "duration_s": round(self.duration_s, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+
+class TelemetryCollector:
+    """
+    Keeps the most recent finished spans in memory and, when ``export_path`` is set,
+    appends each one to a JSONL file as it finishes.
+    """
+
+    def __init__(self, max_spans: int = 10_000, export_path: Optional[str | Path] = None):
+        self._spans: deque[Span] = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+        self.export_path = Path(export_path) if export_path else None
+
+    def record(self, span: Span):
+        with self._lock:
+            self._spans.append(span)
+            if self.export_path is not None:
+                self.export_path.parent.mkdir(parents=True, exist_ok=True)
+                with self.export_path.open("a", encoding="utf-8") as export_file:
+                    export_file.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+    def spans(self, trace_id: Optional[str] = None) -> list[Span]:
+        with self._lock:
+            return [span for span in self._spans if trace_id is None or span.trace_id == trace_id]
+
+    def summarize(self, trace_id: Optional[str] = None) -> list[dict]:
+        """Per-stage breakdown of a trace: count, wall time, LLM calls, tokens, agent steps and screenshots (taken, sent, skipped, bytes sent)."""
+        stages: dict[str, dict] = {}
+        for span in self.spans(trace_id):
+            stage = stages.setdefault(span.name, {
+                "stage": span.name, "count": 0, "errors": 0, "wall_time_s": 0.0, "llm_calls": 0,
+                "llm_time_s": 0.0, "prompt_tokens": 0, "completion_tokens": 0, "steps": 0, "screenshots": 0,
+                "screenshots_sent": 0, "screenshots_skipped": 0, "screenshot_bytes": 0,
+            })
+            stage["count"] += 1
+            stage["errors"] += span.status != "OK"
+            stage["wall_time_s"] += span.duration_s
+            for key in (
+                "llm_calls", "llm_time_s", "prompt_tokens", "completion_tokens", "steps", "screenshots",
+                "screenshots_sent", "screenshots_skipped", "screenshot_bytes",
+            ):
+                stage[key] += span.attributes.get(key, 0)
+
+        for stage in stages.values():
+            stage["avg_time_s"] = stage["wall_time_s"] / stage["count"]
+            for key in ("wall_time_s", "avg_time_s", "llm_time_s"):
+                stage[key] = round(stage[key], 3)
+        return list(stages.values())
+
+    def export_jsonl(self, trace_id: Optional[str] = None) -> str:
+        return "".join(json.dumps(span.to_dict(), default=str) + "\n" for span in self.spans(trace_id))
+
+    def export_otlp_json(self, trace_id: Optional[str] = None) -> str:
+        """Export spans in the OpenTelemetry OTLP/JSON trace format."""
+        return json.dumps({
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", "playwright_llm_integration")]},
+                "scopeSpans": [{
+                    "scope": {"name": "playwright_llm_integration"},
+                    "spans": [_otlp_span(span) for span in self.spans(trace_id)],
+                }],
+            }]
+        })
+
+
+def _otlp_attribute(key: str, value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def _otlp_span(span: Span) -> dict:
+    return {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "parentSpanId": span.parent_id or "",
+        "name": span.name,
+        "kind": 1,
+        "startTimeUnixNano": str(int(span.start_time * 1e9)),
+        "endTimeUnixNano": str(int((span.end_time or span.start_time) * 1e9)),
+        "attributes": [_otlp_attribute(key, value) for key, value in span.attributes.items()],
+        "status": {"code": 1 if span.status == "OK" else 2},
+    }
+
+
+telemetry = TelemetryCollector(
+    export_path=Path(settings.TELEMETRY_DIR) / "spans.jsonl" if settings.TELEMETRY_EXPORT else None
+)
+
+
+@contextmanager
+def span(name: str, trace_id: Optional[str] = None, **attributes) -> Iterator[Span]:
+    """
+    Open a span as a child of the current one. A root span starts a new trace, or joins
+    ``trace_id`` when given (e.g. to group all test executions of one run).
+    """
+    parent = _current_span.get()
+    current = Span(
+        name=name,
+        trace_id=parent.trace_id if parent else (trace_id or uuid.uuid4().hex),
+        parent_id=parent.span_id if parent else None,
+        attributes=dict(attributes),
+    )
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.status = "ERROR"
+        current.set(error=f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            pass  # An async generator closed from another context (e.g. garbage collected)
+        current.end_time = time.time()
+        telemetry.record(current)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def record(**counters):
+    """Add counters to the current span; no-op outside a span."""
+    active = _current_span.get()
+    if active is not None:
+        active.add(**counters)
+
+
+async def traced(coro, name: str, trace_id: str, **attributes):
+    """Await ``coro`` inside a root span of ``trace_id``; for coroutines scheduled onto another thread's loop."""
+    with span(name, trace_id=trace_id, **attributes):
+        return await coro
+
+
+def agent_run_metrics(history) -> dict:
+    """Step and screenshot counts of a browser-use ``AgentHistoryList``."""
+    return {
+        "steps": history.number_of_steps(),
+        "screenshots": sum(1 for path in history.screenshot_paths() if path),
+    }
+
+
+# ============================================================================
+# LLM CLIENT INSTRUMENTATION
+# ============================================================================
+
+class InstrumentedChatModel:
+    """
+    Transparent proxy over a browser-use chat model that adds each call's latency and
+    token usage to the current span. Everything except ``ainvoke`` is delegated unchanged.
+    """
+
+    def __init__(self, llm):
+        self._llm = llm
+
+    def __getattr__(self, name):
+        return getattr(self._llm, name)
+
+    async def ainvoke(self, messages, output_format=None, **kwargs):
+        started = time.perf_counter()
+        try:
+            result = await self._llm.ainvoke(messages, output_format, **kwargs)
+        finally:
+            record(llm_calls=1, llm_time_s=time.perf_counter() - started)
+
+        usage = getattr(result, "usage", None)
+        if usage is not None:
+            record(
+                prompt_tokens=usage.prompt_tokens or 0,
+                completion_tokens=usage.completion_tokens or 0,
+                image_tokens=usage.prompt_image_tokens or 0
+            )
+        return result
+
+
+_instructor_call_started: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    "instructor_call_started", default=None
+)
+
+
+def instrument_instructor_client(client):
+    """Register instructor hooks that add each completion's latency and Gemini token usage to the current span."""
+
+    def on_kwargs(*args, **kwargs):
+        _instructor_call_started.set(time.perf_counter())
+
+    def on_response(response):
+        started = _instructor_call_started.get()
+        record(llm_calls=1, llm_time_s=time.perf_counter() - started if started else 0.0)
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            record(
+                prompt_tokens=usage.prompt_token_count or 0,
+                completion_tokens=usage.candidates_token_count or 0
+            )
+
+    client.on("completion:kwargs", on_kwargs)
+    client.on("completion:response", on_response)
+    return client
@@ -1,23 +1,19 @@
-from browser_use import ChatGoogle, Agent
-from langchain_google_genai import ChatGoogleGenerativeAI
-
-
+from playwright_llm_integration.llm_gateway import GatewayChatModel, LazyClient, gateway_chat_google, \
+    gateway_langchain_google
+from playwright_llm_integration.telemetry import InstrumentedChatModel
 from settings import settings
 
-llm = ChatGoogleGenerativeAI(
-    model=settings.GEMINI_MODEL,
-    google_api_key=settings.GOOGLE_API_KEY,
-    temperature=0.0
-)
 
-browser_use_llm = ChatGoogle(
-    model="gemini-flash-latest",
-    temperature=0.0,
-    api_key=settings.GOOGLE_API_KEY
+llm = LazyClient(lambda: gateway_langchain_google(model=settings.GEMINI_MODEL, temperature=0.0))
 
-)
+browser_use_llm = LazyClient(lambda: GatewayChatModel(InstrumentedChatModel(gateway_chat_google(
+    model="gemini-flash-latest",
+    temperature=0.0
+))))
 
 async def perform_browser_task(task) -> str:
+    from browser_use import Agent
+
     agent = Agent(task=task, llm=browser_use_llm)
     result = await agent.run()
     return result
@@ -1,33 +1,48 @@
+import queue
 import threading
-from concurrent.futures import ThreadPoolExecutor
-from typing import Optional, Dict
+from concurrent.futures import CancelledError, Future, as_completed
+from typing import Optional, Dict, Iterable, Iterator, AsyncIterable
 
-import instructor
-from langchain_google_genai import ChatGoogleGenerativeAI
-from browser_use import Browser, Agent, ChatGoogle, BrowserProfile
 import asyncio
 import sys
 
+from playwright_llm_integration.browser_pool import close_browser_pool
+from playwright_llm_integration.cache import CachedStructuredClient, build_cache_backend
+from playwright_llm_integration.llm_gateway import GatewayChatModel, GatewayInstructorClient, LazyClient, \
+    gateway_chat_google, gateway_langchain_google, gemini_client
+from playwright_llm_integration.telemetry import InstrumentedChatModel, instrument_instructor_client
 from settings import settings
 
 
-langchain_google_llm = ChatGoogleGenerativeAI(
-        model=settings.GEMINI_MODEL,
-        google_api_key=settings.GOOGLE_API_KEY,
-        temperature=0.0
-)
+# Every client shares one Gemini connection pool and goes through the rate-limited, retrying gateway.
+# They are built on first use: the SDKs take seconds to import, and most entry points need only some of them.
 
-instructor_patched_google_llm_client = instructor.from_provider(
-    "google/" + settings.GEMINI_MODEL,
-    api_key=settings.GOOGLE_API_KEY,
-    async_client=True
-)
+def _instructor_patched_google_llm_client():
+    import instructor
 
-browser_use_google_llm = ChatGoogle(
+    return GatewayInstructorClient(instrument_instructor_client(instructor.from_genai(
+        gemini_client(),
+        mode=instructor.Mode.TOOLS,
+        use_async=True,
+        model=settings.GEMINI_MODEL
+    )))
+
+
+langchain_google_llm = LazyClient(lambda: gateway_langchain_google(model=settings.GEMINI_MODEL, temperature=0.0))
+
+instructor_patched_google_llm_client = LazyClient(_instructor_patched_google_llm_client)
+
+# Deterministic structured completions go through this cache before reaching Gemini
+cached_instructor_client = LazyClient(lambda: CachedStructuredClient(
+    instructor_patched_google_llm_client.resolve(),
+    backend=build_cache_backend(settings.LLM_CACHE_BACKEND),
+    model=settings.GEMINI_MODEL
+))
+
+browser_use_google_llm = LazyClient(lambda: GatewayChatModel(InstrumentedChatModel(gateway_chat_google(
     model=settings.GEMINI_MODEL,
-    api_key=settings.GOOGLE_API_KEY,
     temperature=0.0
-)
+))))
 
 
 
@@ -60,9 +75,93 @@ STREAMLIT_CSS = """
 </style>
 """
 import asyncio
+import contextvars
 import platform
+import time
+import uuid
+from concurrent.futures import CancelledError as FutureCancelledError
+from enum import StrEnum
 from typing import Any
 
+# ============================================================================
+# JOBS - Handles for coroutines running on the AsyncRunner loop
+# ============================================================================
+
+class JobStatus(StrEnum):
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    SUCCEEDED = "SUCCEEDED"
+    FAILED = "FAILED"
+    CANCELLED = "CANCELLED"
+    TIMED_OUT = "TIMED_OUT"
+
+
+_FINISHED_STATUSES = {JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED, JobStatus.TIMED_OUT}
+
+_current_job: contextvars.ContextVar[Optional["JobHandle"]] = contextvars.ContextVar("current_job", default=None)
+
+
+class JobHandle:
+    """
+    Thread-safe handle for a coroutine submitted to the AsyncRunner.
+    Callers poll ``status``, ``progress`` and ``partial_result``, wait on ``result()``,
+    or request cancellation with ``cancel()``.
+    """
+
+    def __init__(self, name: str, owner: Optional[str] = None, timeout: Optional[float] = None):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.owner = owner
+        self.timeout = timeout
+        self.status = JobStatus.PENDING
+        self.progress: Optional[float] = None
+        self.partial_result: Any = None
+        self.error: Optional[BaseException] = None
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._future = None
+        self._lock = threading.Lock()
+
+    def done(self) -> bool:
+        return self.status in _FINISHED_STATUSES
+
+    def cancel_requested(self) -> bool:
+        return self._future is not None and self._future.cancelled()
+
+    def cancel(self):
+        """Request cancellation; the coroutine is cancelled at its next await point."""
+        if self._future is not None:
+            self._future.cancel()
+
+    def report_progress(self, progress: Optional[float] = None, partial_result: Any = None):
+        with self._lock:
+            if progress is not None:
+                self.progress = max(0.0, min(1.0, progress))
+            if partial_result is not None:
+                self.partial_result = partial_result
+
+    def result(self, timeout: Optional[float] = None):
+        """Block until the job finishes and return its result, re-raising its error."""
+        try:
+            return self._future.result(timeout=timeout)
+        except FutureCancelledError:
+            raise asyncio.CancelledError(f"Job {self.name!r} was cancelled") from None
+
+    def _finish(self, status: JobStatus, error: Optional[BaseException] = None):
+        with self._lock:
+            self.status = status
+            self.error = error
+            self.finished_at = time.time()
+
+
+def report_job_progress(progress: Optional[float] = None, partial_result: Any = None):
+    """Report progress from inside a coroutine submitted to ``AsyncRunner.submit``. No-op elsewhere."""
+    job = _current_job.get()
+    if job is not None:
+        job.report_progress(progress, partial_result)
+
+
 # ============================================================================
 # ASYNC RUNNER - Handles async operations in a dedicated thread
 # ============================================================================
@@ -71,16 +170,19 @@ class AsyncRunner:
     """
     Manages async operations in a dedicated thread with a persistent event loop.
     This prevents event loop conflicts in Streamlit's synchronous environment.
+    Work is submitted as jobs, so several Streamlit sessions can share the loop safely.
     """
 
     def __init__(self):
         self._loop = None
         self._thread = None
-        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._jobs: Dict[str, JobHandle] = {}
+        self._jobs_lock = threading.Lock()
         self._setup_loop()
 
     def _setup_loop(self):
         """Initialize event loop in a dedicated thread."""
+        ready = threading.Event()
 
         def run_loop():
             if platform.system() == "Windows":
@@ -88,28 +190,160 @@ class AsyncRunner:
 
             self._loop = asyncio.new_event_loop()
             asyncio.set_event_loop(self._loop)
+            self._loop.call_soon(ready.set)
             self._loop.run_forever()
 
         self._thread = threading.Thread(target=run_loop, daemon=True)
         self._thread.start()
 
         # Wait for loop to be ready
-        import time
-        while self._loop is None:
-            time.sleep(0.01)
+        ready.wait()
 
-    def run(self, coro):
-        """Run a coroutine and return the result."""
+    def _ensure_running(self):
         if self._loop is None or not self._loop.is_running():
             raise RuntimeError("Event loop is not running")
 
-        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
-        return future.result()
+    def submit(self, coro, name: Optional[str] = None, timeout: Optional[float] = None, owner: Optional[str] = None) -> JobHandle:
+        """
+        Schedule a coroutine as a background job and return its handle immediately.
+        The job is cancelled (status ``TIMED_OUT``) if it runs longer than ``timeout`` seconds.
+        """
+        self._ensure_running()
+
+        job = JobHandle(name=name or getattr(coro, "__qualname__", "job"), owner=owner, timeout=timeout)
+        with self._jobs_lock:
+            self._prune_jobs()
+            self._jobs[job.id] = job
+        job._future = asyncio.run_coroutine_threadsafe(self._run_job(job, coro), self._loop)
+        # A job cancelled before it started never reaches _run_job
+        job._future.add_done_callback(lambda future: future.cancelled() and not job.done() and job._finish(JobStatus.CANCELLED))
+        return job
+
+    async def _run_job(self, job: JobHandle, coro):
+        _current_job.set(job)
+        job.status = JobStatus.RUNNING
+        job.started_at = time.time()
+        deadline = asyncio.timeout(job.timeout)
+        try:
+            async with deadline:
+                result = await coro
+        except TimeoutError as e:
+            if not deadline.expired():
+                job._finish(JobStatus.FAILED, e)
+                raise
+            job._finish(JobStatus.TIMED_OUT, e)
+            raise TimeoutError(f"Job {job.name!r} exceeded its {job.timeout}s deadline") from e
+        except asyncio.CancelledError as e:
+            job._finish(JobStatus.CANCELLED, e)
+            raise
+        except Exception as e:
+            job._finish(JobStatus.FAILED, e)
+            raise
+        job._finish(JobStatus.SUCCEEDED)
+        return result
+
+    def get_job(self, job_id: str) -> Optional[JobHandle]:
+        with self._jobs_lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self, owner: Optional[str] = None) -> list[JobHandle]:
+        """All known jobs, optionally only those submitted by ``owner``."""
+        with self._jobs_lock:
+            return [job for job in self._jobs.values() if owner is None or job.owner == owner]
+
+    def _prune_jobs(self, keep_finished: int = 100):
+        finished = sorted((job for job in self._jobs.values() if job.done()), key=lambda job: job.finished_at)
+        for job in finished[:-keep_finished]:
+            del self._jobs[job.id]
+
+    def run(self, coro, timeout: Optional[float] = None):
+        """Run a coroutine and return the result, giving up (and cancelling it) after ``timeout`` seconds."""
+        return self.submit(coro, timeout=timeout).result()
+
+    def run_many(
+        self,
+        coros: Iterable,
+        max_concurrency: int = 1,
+        timeout: Optional[float] = None,
+        owner: Optional[str] = None
+    ) -> Iterator[tuple[int, Any, Optional[BaseException]]]:
+        """
+        Schedule many coroutines on the loop at once, with at most ``max_concurrency`` running.
+        Yields ``(index, result, error)`` tuples in completion order, so callers can report
+        progress as each coroutine finishes. ``timeout`` bounds each coroutine once it has started.
+        """
+        self._ensure_running()
+
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def bounded(coro):
+            async with semaphore:
+                async with asyncio.timeout(timeout):
+                    return await coro
+
+        jobs = {
+            self.submit(bounded(coro), name=f"{getattr(coro, '__qualname__', 'job')}[{idx}]", owner=owner)._future: idx
+            for idx, coro in enumerate(coros)
+        }
+        try:
+            for future in as_completed(jobs):
+                try:
+                    yield jobs[future], future.result(), None
+                except Exception as e:
+                    yield jobs[future], None, e
+        finally:
+            # The caller stopped iterating early (e.g. a Streamlit rerun); don't leave orphans behind.
+            for future in jobs:
+                future.cancel()
+
+    def iterate(self, async_iterable: AsyncIterable) -> Iterator:
+        """
+        Consume an async iterable on the loop and yield its items in the calling thread
+        as they arrive, e.g. to render streamed results incrementally.
+        """
+        self._ensure_running()
+
+        items = queue.Queue()
+        finished = object()
+
+        async def pump():
+            async for item in async_iterable:
+                items.put((item, None))
+
+        def on_done(done: Future):
+            # Also runs when the pump is cancelled from outside, e.g. by cleanup()
+            error = CancelledError("The iteration was cancelled") if done.cancelled() else done.exception()
+            items.put((finished, error))
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self._loop)
+        future.add_done_callback(on_done)
+        try:
+            while True:
+                try:
+                    item, error = items.get(timeout=1.0)
+                except queue.Empty:
+                    # A stopped loop never finishes the pump, so nothing would ever arrive
+                    if not future.done() and not self._loop.is_running():
+                        raise RuntimeError("The event loop stopped before the iteration finished")
+                    continue
+                if error is not None:
+                    raise error
+                if item is finished:
+                    return
+                yield item
+        finally:
+            future.cancel()
 
     def cleanup(self):
-        """Clean up the event loop and thread."""
+        """Cancel outstanding jobs, then clean up the browser pool, the event loop and thread."""
+        for job in self.jobs():
+            job.cancel()
+        if self._loop and self._loop.is_running():
+            try:
+                asyncio.run_coroutine_threadsafe(close_browser_pool(), self._loop).result(timeout=30)
+            except Exception:
+                pass
         if self._loop:
             self._loop.call_soon_threadsafe(self._loop.stop)
         if self._thread:
             self._thread.join(timeout=5)
-        self._executor.shutdown(wait=True)
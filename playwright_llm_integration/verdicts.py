@@ -0,0 +1,276 @@
+import re
+import sqlite3
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional
+
+from playwright_llm_integration.models import AgentRunSnapshot, VerdictEnum
+from settings import settings
+
+
+# ============================================================================
+# RESULT CLASSIFIER - A verdict from the executor's report, not from "no exception"
+# ============================================================================
+
+# A status label and its value: "Status: FAIL", "**Status**: **FAIL**", "Status: ❌ FAIL", "| Status | BLOCKED |",
+# "## Status\nFAIL" and the prompt's own "Status (PASS/FAIL/BLOCKED): FAIL" (matched once markup is stripped).
+# What precedes the label on its line tells an overall status from a step's.
+_REPORT_STATUS = re.compile(
+    r"^(?P<prefix>[^\n]*?)\bstatus\b[ \t]*(?:\([^)\n]*\))?[ \t]*(?:[:|=\-\u2013\u2014]+[ \t]*|\n\s*)+"
+    r"(?P<value>pass(?:ed)?|fail(?:ed)?|blocked)\b",
+    re.IGNORECASE | re.MULTILINE
+)
+_STEP_PREFIX = re.compile(r"\bstep\b", re.IGNORECASE)
+_OVERALL_PREFIX = re.compile(r"\b(?:overall|final|test|result)\b", re.IGNORECASE)
+# Markdown emphasis and headings, and emoji and other symbols, between a label and its value
+_MARKUP = re.compile(r"[*_`#>~]|[^\w\s\u0000-\u007f]")
+_STATUS_CHOICES = re.compile(r"pass\s*/\s*fail\s*/\s*blocked", re.IGNORECASE)
+# A verdict written without a label, in capitals
+_STANDALONE_STATUS = re.compile(r"\b(FAIL(?:ED)?|BLOCKED)\b")
+# Failures of the environment rather than of the application under test
+_TRANSIENT = re.compile(
+    r"timed? ?out|timeout|net::err_|err_(?:connection|name_not_resolved|internet)|econn\w+|"
+    r"connection (?:reset|refused|closed|aborted)|navigation (?:failed|timeout|interrupted)|failed to navigate|"
+    r"page (?:crashed|did not load|failed to load)|target (?:page|closed|crashed)|browser (?:has been )?closed|"
+    r"session (?:closed|not found)|websocket|\b(?:429|502|503|504)\b|rate limit|too many requests|"
+    r"service unavailable|temporarily unavailable",
+    re.IGNORECASE
+)
+
+_STATUS_VERDICTS = {"PASS": VerdictEnum.PASSED, "FAIL": VerdictEnum.FAILED, "BLOCKED": VerdictEnum.BLOCKED}
+
+
+@dataclass(frozen=True)
+class Classification:
+    verdict: VerdictEnum
+    transient: bool
+    reason: str
+    report: Optional[str] = None
+
+
+def _status_word(value: str) -> str:
+    value = value.upper()
+    return "BLOCKED" if value == "BLOCKED" else value[:4]
+
+
+def _worst(statuses: list[str]) -> str:
+    return "FAIL" if "FAIL" in statuses else "BLOCKED" if "BLOCKED" in statuses else "PASS"
+
+
+def report_status(report: Optional[str]) -> Optional[str]:
+    """
+    The verdict of an execution report (``PASS``, ``FAIL`` or ``BLOCKED``), or None. An overall
+    ``Status`` label wins over the others, any report-level label over ``Step N status`` lines,
+    and among equals the last one, so a report that quotes the prompt first is read correctly.
+    With only step statuses, the worst one stands; with no label at all, a capitalized FAIL or
+    BLOCKED anywhere in the report does.
+
+    >>> report_status("**Status:** PASSED")
+    'PASS'
+    >>> report_status("| Status | BLOCKED |")
+    'BLOCKED'
+    >>> report_status("- Status (PASS/FAIL/BLOCKED): FAIL")
+    'FAIL'
+    >>> report_status("Status (PASS/FAIL/BLOCKED)\\n\\nStatus: FAILED")
+    'FAIL'
+    >>> report_status("Status: **FAIL**")
+    'FAIL'
+    >>> report_status("**Status**: **FAIL**")
+    'FAIL'
+    >>> report_status("Status: ❌ FAIL")
+    'FAIL'
+    >>> report_status("## Status\\nFAIL\\n\\n## Details")
+    'FAIL'
+    >>> report_status("Overall Status: FAIL\\nStep 3 status: PASS")
+    'FAIL'
+    >>> report_status("Step 1 status: PASS\\nStep 2 status: BLOCKED")
+    'BLOCKED'
+    >>> report_status("The login button did nothing. Test FAILED.")
+    'FAIL'
+    >>> report_status("The status bar shows PASS") is None
+    True
+    """
+    text = _MARKUP.sub("", report or "")
+    overall, report_level, steps = [], [], []
+    for match in _REPORT_STATUS.finditer(text):
+        status = _status_word(match.group("value"))
+        prefix = match.group("prefix")
+        if _STEP_PREFIX.search(prefix):
+            steps.append(status)
+        else:
+            (overall if _OVERALL_PREFIX.search(prefix) else report_level).append(status)
+    if overall or report_level:
+        return (overall or report_level)[-1]
+    if steps:
+        return _worst(steps)
+    standalone = _STANDALONE_STATUS.findall(_STATUS_CHOICES.sub("", text))
+    return _worst([_status_word(value) for value in standalone]) if standalone else None
+
+
+def _transient_reason(*texts: Optional[str]) -> Optional[str]:
+    for text in texts:
+        match = _TRANSIENT.search(text or "")
+        if match:
+            return match.group(0)
+    return None
+
+
+def classify_result(execution_result: Any) -> Classification:
+    """
+    Verdict of one ``execute_the_test_case_using_browser_use`` attempt. The agent's report
+    decides (its ``Status:`` line); without one, whether the agent judged its run successful.
+    Errors, and failed or blocked runs that ran into timeouts, navigation or connection errors,
+    are flagged ``transient``: worth another attempt.
+    """
+    if isinstance(execution_result, str):
+        transient = _transient_reason(execution_result)
+        return Classification(VerdictEnum.ERROR, transient is not None, execution_result)
+    if isinstance(execution_result, AgentRunSnapshot):
+        # A replay reports PASS only once its steps ran again and the page showed the expected result
+        report = execution_result.final_result()
+        status = report_status(report)
+        if status is None:
+            return Classification(VerdictEnum.ERROR, False, f"no status in the {execution_result.source} report", report)
+        verdict = _STATUS_VERDICTS[status]
+        return Classification(verdict, False, f"the {execution_result.source} report says {status}", report)
+
+    report = execution_result.final_result()
+    errors = "\n".join(error for error in execution_result.errors() if error)
+    if not execution_result.is_done():
+        transient = _transient_reason(errors)
+        return Classification(
+            VerdictEnum.ERROR, transient is not None,
+            f"the agent stopped before finishing the test ({transient or 'step limit or repeated failures'})", report
+        )
+
+    status = report_status(report)
+    if status:
+        verdict = _STATUS_VERDICTS[status]
+        reason = f"the execution report says {status}"
+    else:
+        verdict = VerdictEnum.PASSED if execution_result.is_successful() else VerdictEnum.FAILED
+        judged = "successful" if verdict == VerdictEnum.PASSED else "unsuccessful"
+        reason = f"no status in the execution report; the agent judged the run {judged}"
+    transient = _transient_reason(errors, report) if verdict != VerdictEnum.PASSED else None
+    if transient:
+        reason += f" after a transient error ({transient})"
+    return Classification(verdict, transient is not None, reason, report)
+
+
+# ============================================================================
+# RETRY POLICY - Attempts go to transient failures and to cases known to be flaky
+# ============================================================================
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    After each attempt: stop once the verdict is stable (the last two attempts agree) or after
+    ``max_attempts``; otherwise retry transient failures, break ties between disagreeing
+    attempts, and confirm a first failure of a case whose flakiness is at least ``flaky_threshold``.
+    A clean pass or a deterministic failure of a stable case costs a single attempt.
+    """
+    max_attempts: int = settings.TEST_MAX_ATTEMPTS
+    flaky_threshold: float = settings.FLAKY_THRESHOLD
+
+    def should_retry(self, attempts: list[Classification], flakiness: float = 0.0) -> bool:
+        if len(attempts) >= self.max_attempts:
+            return False
+        last = attempts[-1]
+        if len(attempts) >= 2 and attempts[-2].verdict == last.verdict:
+            return False
+        if last.transient or len(attempts) >= 2:
+            return True
+        return last.verdict != VerdictEnum.PASSED and flakiness >= self.flaky_threshold
+
+
+def final_verdict(attempts: list[Classification]) -> tuple[int, bool]:
+    """
+    Index of the attempt whose verdict stands, and whether the case was flaky (its attempts
+    disagreed). Errors only stand when no attempt reached a verdict; otherwise the most
+    frequent verdict wins, ties going to the latest attempt.
+    """
+    decided = [index for index, attempt in enumerate(attempts) if attempt.verdict != VerdictEnum.ERROR]
+    decided = decided or list(range(len(attempts)))
+    counts = Counter(attempts[index].verdict for index in decided)
+    top = max(counts.values())
+    standing = next(index for index in reversed(decided) if counts[attempts[index].verdict] == top)
+    return standing, len({attempt.verdict for attempt in attempts}) > 1
+
+
+@dataclass
+class ExecutionOutcome:
+    """A test case's verdict over all of its attempts, with the result of the attempt that stands."""
+    verdict: VerdictEnum
+    reason: str
+    result: Any
+    attempts: list[Classification] = field(default_factory=list)
+    flaky: bool = False
+
+    def final_result(self) -> Optional[str]:
+        if isinstance(self.result, str):
+            return None
+        return self.result.final_result()
+
+
+# ============================================================================
+# FLAKINESS STATS - Per test case, across runs
+# ============================================================================
+
+class FlakinessStore:
+    """
+    SQLite statistics per ``test_case_id``: runs, attempts, final verdicts, and flaky runs
+    (runs whose attempts disagreed). ``flakiness`` is the share of flaky runs, which the retry
+    policy uses to spend confirmation attempts only on cases that have flaked before.
+    """
+
+    def __init__(self, path: str | Path = Path(settings.CACHE_DIR) / "flakiness.sqlite3"):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS test_case_stats ("
+            "test_case_id TEXT PRIMARY KEY, test_title TEXT, runs INTEGER NOT NULL DEFAULT 0, "
+            "attempts INTEGER NOT NULL DEFAULT 0, passed INTEGER NOT NULL DEFAULT 0, failed INTEGER NOT NULL DEFAULT 0, "
+            "blocked INTEGER NOT NULL DEFAULT 0, error INTEGER NOT NULL DEFAULT 0, flaky_runs INTEGER NOT NULL DEFAULT 0, "
+            "last_verdict TEXT, updated_at TEXT NOT NULL)"
+        )
+
+    def record(self, test_case_id: str, test_title: str, outcome: ExecutionOutcome):
+        verdict = VerdictEnum(outcome.verdict).value
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO test_case_stats (test_case_id, test_title, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (test_case_id) DO NOTHING",
+                (test_case_id, test_title, datetime.now().isoformat())
+            )
+            self._conn.execute(
+                f"UPDATE test_case_stats SET test_title = ?, runs = runs + 1, attempts = attempts + ?, "
+                f"{verdict} = {verdict} + 1, flaky_runs = flaky_runs + ?, last_verdict = ?, updated_at = ? "
+                f"WHERE test_case_id = ?",
+                (test_title, len(outcome.attempts), int(outcome.flaky), verdict, datetime.now().isoformat(), test_case_id)
+            )
+
+    def flakiness(self, test_case_id: str) -> float:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT runs, flaky_runs FROM test_case_stats WHERE test_case_id = ?", (test_case_id,)
+            ).fetchone()
+        return row["flaky_runs"] / row["runs"] if row and row["runs"] else 0.0
+
+    def flakiest(self, limit: int = 20) -> list[dict]:
+        """Cases that have flaked at least once, flakiest first, with their ``flakiness``."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT *, CAST(flaky_runs AS REAL) / runs AS flakiness FROM test_case_stats "
+                "WHERE flaky_runs > 0 ORDER BY flakiness DESC, runs DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+
+flakiness_store = FlakinessStore()
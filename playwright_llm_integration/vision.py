@@ -0,0 +1,235 @@
+import base64
+import hashlib
+import io
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+from browser_use.llm.messages import ContentPartImageParam, ContentPartTextParam, ImageURL
+from PIL import Image, ImageChops
+
+from playwright_llm_integration.telemetry import record
+from settings import settings
+
+
+# ============================================================================
+# VISION POLICY - What each agent step sends to the model as screenshots
+# ============================================================================
+
+# Actions whose outcome shows up in the DOM text; the step after them rarely needs to see the page
+TEXT_ONLY_ACTIONS = frozenset({
+    "input", "send_keys", "wait", "extract", "find_text", "find_elements", "search_page",
+    "dropdown_options", "select_dropdown", "read_file", "write_file", "replace_file",
+})
+
+
+@dataclass(frozen=True)
+class VisionPolicy:
+    """
+    How screenshots are sent. ``max_width`` and ``image_format``/``quality`` downscale and
+    re-encode them; ``skip_unchanged`` drops a screenshot when the DOM is the same as at the
+    last one sent; ``crop_to_changes`` sends only the region that changed since then;
+    ``skip_after_text_actions`` drops it after steps made only of ``TEXT_ONLY_ACTIONS``.
+    Every ``keyframe_interval`` steps a full screenshot goes out regardless.
+    """
+    enabled: bool = True
+    max_width: Optional[int] = None
+    image_format: str = "png"
+    quality: int = 70
+    skip_unchanged: bool = False
+    crop_to_changes: bool = False
+    max_crop_ratio: float = 0.6
+    skip_after_text_actions: bool = False
+    keyframe_interval: int = 5
+
+    @property
+    def passthrough(self) -> bool:
+        return not (self.max_width or self.image_format != "png" or self.skip_unchanged
+                    or self.crop_to_changes or self.skip_after_text_actions)
+
+
+def vision_policy(mode: str) -> VisionPolicy:
+    """``full`` sends screenshots untouched, ``adaptive`` applies every optimization, ``off`` sends none."""
+    if mode == "off":
+        return VisionPolicy(enabled=False)
+    if mode == "full":
+        return VisionPolicy()
+    return VisionPolicy(
+        max_width=settings.VISION_MAX_WIDTH,
+        image_format=settings.VISION_IMAGE_FORMAT,
+        quality=settings.VISION_IMAGE_QUALITY,
+        skip_unchanged=True,
+        crop_to_changes=True,
+        skip_after_text_actions=True,
+        keyframe_interval=settings.VISION_KEYFRAME_INTERVAL,
+    )
+
+
+_BROWSER_STATE = re.compile(r"<browser_state>(.*?)</browser_state>", re.DOTALL)
+# Pixel differences below this (out of 255) are antialiasing and caret blinks, not changes
+_DIFF_THRESHOLD = 24
+_CROP_MARGIN = 16
+
+
+def _decode(url: str) -> Optional[Image.Image]:
+    _, _, data = url.partition("base64,")
+    try:
+        return Image.open(io.BytesIO(base64.b64decode(data))).convert("RGB")
+    except (ValueError, OSError):
+        return None
+
+
+def _changed_region(previous: Image.Image, current: Image.Image) -> Optional[tuple[int, int, int, int]]:
+    """Bounding box of the pixels that changed between two same-sized screenshots, or None."""
+    if previous.size != current.size:
+        return (0, 0) + current.size
+    difference = ImageChops.difference(previous, current).convert("L")
+    box = difference.point(lambda value: 255 if value > _DIFF_THRESHOLD else 0).getbbox()
+    if box is None:
+        return None
+    left, top, right, bottom = box
+    return (
+        max(0, left - _CROP_MARGIN), max(0, top - _CROP_MARGIN),
+        min(current.width, right + _CROP_MARGIN), min(current.height, bottom + _CROP_MARGIN),
+    )
+
+
+class VisionPolicyChatModel:
+    """
+    Transparent proxy over a browser-use chat model that applies a ``VisionPolicy`` to the
+    screenshots of each step's browser state message before the model sees them. It keeps
+    state across steps, so use one per agent run.
+    """
+
+    def __init__(self, llm, policy: VisionPolicy):
+        self._llm = llm
+        self._policy = policy
+        self._sent_dom: Optional[str] = None
+        self._last_image: Optional[Image.Image] = None
+        self._last_actions: list[str] = []
+        self._steps_since_keyframe = 0
+
+    def __getattr__(self, name):
+        return getattr(self._llm, name)
+
+    async def ainvoke(self, messages, output_format=None, **kwargs):
+        messages = [self._apply(message) if self._is_step_state(message) else message for message in messages]
+        result = await self._llm.ainvoke(messages, output_format, **kwargs)
+        self._last_actions = _action_names(result)
+        return result
+
+    @staticmethod
+    def _is_step_state(message) -> bool:
+        content = getattr(message, "content", None)
+        return (
+            isinstance(content, list)
+            and any(isinstance(part, ContentPartImageParam) for part in content)
+            and any(isinstance(part, ContentPartTextParam) and "<browser_state>" in part.text for part in content)
+        )
+
+    def _apply(self, message):
+        """Replace the "Current screenshot:" label and image; sample and read-file images pass through."""
+        content = message.content
+        text = next(part.text for part in content if isinstance(part, ContentPartTextParam))
+        dom_state = _BROWSER_STATE.search(text)
+        dom_hash = hashlib.sha256(dom_state.group(1).encode("utf-8")).hexdigest() if dom_state else None
+
+        parts = list(content)
+        for position in range(len(content) - 1):
+            label, image = content[position], content[position + 1]
+            if (isinstance(label, ContentPartTextParam) and label.text == "Current screenshot:"
+                    and isinstance(image, ContentPartImageParam)):
+                parts[position:position + 2] = self._screenshot_parts(image, dom_hash)
+                break
+        return message.model_copy(update={"content": parts})
+
+    def _screenshot_parts(self, part: ContentPartImageParam, dom_hash: Optional[str]) -> list:
+        policy = self._policy
+        original_size = len(part.image_url.url)
+        keyframe_due = self._steps_since_keyframe + 1 >= policy.keyframe_interval or self._last_image is None
+
+        skip_reason = None
+        if not keyframe_due and policy.skip_unchanged and dom_hash is not None and dom_hash == self._sent_dom:
+            skip_reason = "the page has not changed since the previous step"
+        elif (not keyframe_due and policy.skip_after_text_actions and self._last_actions
+              and all(action in TEXT_ONLY_ACTIONS for action in self._last_actions)):
+            skip_reason = "the previous step only typed, waited or read text; rely on the browser state above"
+        if skip_reason is not None:
+            self._steps_since_keyframe += 1
+            record(screenshots_skipped=1, screenshot_bytes_saved=original_size)
+            return [ContentPartTextParam(text=f"No screenshot this step: {skip_reason}.")]
+
+        image = _decode(part.image_url.url)
+        if image is None:
+            return [ContentPartTextParam(text="Current screenshot:"), part]
+        original_dimensions = image.size
+        if policy.max_width and image.width > policy.max_width:
+            image = image.resize((policy.max_width, round(image.height * policy.max_width / image.width)), Image.LANCZOS)
+
+        label, sent = "Current screenshot:", image
+        if policy.crop_to_changes and not keyframe_due and self._last_image is not None:
+            region = _changed_region(self._last_image, image)
+            if region is None and policy.skip_unchanged:
+                self._steps_since_keyframe += 1
+                record(screenshots_skipped=1, screenshot_bytes_saved=original_size)
+                return [ContentPartTextParam(text="No screenshot this step: the page looks the same as in the previous step.")]
+            if region is not None:
+                left, top, right, bottom = region
+                if (right - left) * (bottom - top) <= policy.max_crop_ratio * image.width * image.height:
+                    sent = image.crop(region)
+                    label = (
+                        f"Current screenshot, cropped to the region that changed since the previous screenshot "
+                        f"(x {left}-{right}, y {top}-{bottom} of a {image.width}x{image.height} viewport):"
+                    )
+
+        if sent is image:
+            self._steps_since_keyframe = 0
+        else:
+            self._steps_since_keyframe += 1
+        self._last_image = image
+        self._sent_dom = dom_hash
+
+        url, media_type = self._encode(sent)
+        if sent.size == original_dimensions and len(url) >= original_size:
+            # Flat pages can compress better as the original PNG
+            url, media_type = part.image_url.url, part.image_url.media_type
+        record(screenshots_sent=1, screenshot_bytes=len(url), screenshot_bytes_saved=max(0, original_size - len(url)))
+        return [
+            ContentPartTextParam(text=label),
+            ContentPartImageParam(image_url=ImageURL(url=url, media_type=media_type, detail=part.image_url.detail)),
+        ]
+
+    def _encode(self, image: Image.Image) -> tuple[str, str]:
+        image_format = self._policy.image_format.lower()
+        buffer = io.BytesIO()
+        if image_format in ("jpeg", "jpg"):
+            image.save(buffer, "JPEG", quality=self._policy.quality, optimize=True)
+            media_type = "image/jpeg"
+        elif image_format == "webp":
+            image.save(buffer, "WEBP", quality=self._policy.quality)
+            media_type = "image/webp"
+        else:
+            image.save(buffer, "PNG", optimize=True)
+            media_type = "image/png"
+        return f"data:{media_type};base64,{base64.b64encode(buffer.getvalue()).decode('ascii')}", media_type
+
+
+def _action_names(result) -> list[str]:
+    """Names of the actions the model chose in a browser-use step completion, if it is one."""
+    actions = getattr(getattr(result, "completion", None), "action", None) or []
+    names = []
+    for action in actions:
+        try:
+            names.extend(action.model_dump(exclude_unset=True, exclude_none=True).keys())
+        except AttributeError:
+            continue
+    return names
+
+
+def vision_agent_options(llm, mode: str) -> dict:
+    """``llm`` and ``use_vision`` arguments of a browser-use ``Agent`` running under the ``mode`` policy."""
+    policy = vision_policy(mode)
+    return {
+        "llm": llm if policy.passthrough else VisionPolicyChatModel(llm, policy),
+        "use_vision": policy.enabled,
+    }
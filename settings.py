@@ -1,5 +1,3 @@
-from pprint import pprint
-
 from pydantic import ConfigDict
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv, find_dotenv
@@ -10,10 +8,72 @@ class Settings(BaseSettings):
     GEMINI_MODEL: str = "gemini-2.5-flash"
     FIRE_CRAWL_API_KEY: str
     VECTOR_COLLECTION: str = ""
+    MAX_PARALLEL_TESTS: int = 4
+    JOB_TIMEOUT: float = 30 * 60
+    TEST_EXECUTION_TIMEOUT: float = 15 * 60
+    ORCHESTRATOR_EXPLORE_WORKERS: int = 2
+    ORCHESTRATOR_GENERATE_WORKERS: int = 2
+    ORCHESTRATOR_QUEUE_SIZE: int = 16
+    STREAM_TEST_GENERATION: bool = True
+    BROWSER_HEADLESS: bool = True
+    BROWSER_POOL_SIZE: int = 4
+    BROWSER_POOL_IDLE_TIMEOUT: float = 300.0
+    BROWSER_POOL_MAX_LEASES: int = 50
+    CACHE_DIR: str = ".cache"
+    EXPLORATION_CACHE_TTL: float = 24 * 60 * 60
+    EXPLORATION_CACHE_MAX_ENTRIES: int = 256
+    LLM_CACHE_BACKEND: str = "sqlite"  # memory | sqlite | none
+    LLM_CACHE_MAX_ENTRIES: int = 512
+    REPLAY_ENABLED: bool = True
+    REPLAY_STEP_DELAY: float = 0.1
+    TELEMETRY_EXPORT: bool = True
+    TELEMETRY_DIR: str = ".cache/telemetry"
+    LLM_REQUESTS_PER_MINUTE: int = 300  # 0 disables the limit
+    LLM_TOKENS_PER_MINUTE: int = 1_000_000  # 0 disables the limit
+    LLM_MAX_RETRIES: int = 5
+    LLM_RETRY_BASE_DELAY: float = 1.0
+    LLM_RETRY_MAX_DELAY: float = 60.0
+    RESULTS_STORE_BATCH_SIZE: int = 50
+    RESULTS_PAGE_SIZE: int = 20
+    INCREMENTAL_GENERATION: bool = True
+    INCREMENTAL_MAX_CHANGE_RATIO: float = 0.5
+    INVENTORY_TOKEN_BUDGET: int = 2000
+    EXPLORATION_MODE: str = "auto"  # auto | dom | agent
+    EXPLORATION_DOM_MIN_ELEMENTS: int = 3
+    EXECUTION_SHARDS: int = 0  # worker processes for sharded execution; 0 = one per CPU core
+    SHARD_COORDINATOR_TOKEN: str = ""  # shared secret remote shard workers must present
+    EXPLORATION_VISION: str = "adaptive"  # full | adaptive | off
+    EXECUTION_VISION: str = "adaptive"  # full | adaptive | off
+    VISION_MAX_WIDTH: int = 768
+    VISION_IMAGE_FORMAT: str = "jpeg"  # jpeg | webp | png
+    VISION_IMAGE_QUALITY: int = 70
+    VISION_KEYFRAME_INTERVAL: int = 5
+    BATCH_BY_PRECONDITION: bool = True
+    BATCH_MIN_GROUP_SIZE: int = 2
+    CRAWL_MAX_PAGES: int = 25
+    CRAWL_MAX_DEPTH: int = 3
+    CRAWL_WORKERS: int = 4
+    CRAWL_PAGES_PER_TEMPLATE: int = 1  # e.g. explore one /products/{id} page, not every product
+    SITE_MAP_TOKEN_BUDGET: int = 8000
+    REFINE_TEST_SUITES: bool = True  # drop near-duplicate test cases and run the most valuable first
+    DEDUP_SIMILARITY: float = 0.8  # estimated Jaccard similarity above which two test cases are duplicates
+    TEST_STEP_SECONDS: float = 20.0  # estimated run time per step of a test case that hasn't run before
+    GENERATION_MODE: str = "auto"  # auto | single | chunked
+    GENERATION_CHUNK_TOKENS: int = 2500
+    GENERATION_CHUNK_CONCURRENCY: int = 4
+    GENERATION_CHUNK_RETRIES: int = 1
+    RUN_LEASE_TIMEOUT: float = 60.0  # an executing run renews its lease; one unrenewed for this long was interrupted
+    TEST_MAX_ATTEMPTS: int = 3  # 1 disables retries
+    TEST_RETRY_DELAY: float = 5.0
+    FLAKY_THRESHOLD: float = 0.2  # share of flaky runs above which a failure is confirmed by a retry
 
     model_config = ConfigDict(use_enum_values=True)
 
 
 settings = Settings()
 
-pprint(settings.model_dump())
\ No newline at end of file
+if __name__ == "__main__":
+    # python settings.py prints the effective configuration
+    from pprint import pprint
+
+    pprint(settings.model_dump())
\ No newline at end of file